@@ -0,0 +1,181 @@
+"""
+Streaming anomaly detection over activity frequency
+
+Each (pet, activity type) keeps one ActivityBaseline row: the count for the
+day in progress plus an exponentially weighted mean and variance of completed
+daily counts. Inserting an activity is an O(1) update of that row, and alerts
+are derived from it at read time without touching the activity history.
+
+Days are UTC days. Activities dated after today are stored but left out of the
+baseline, since advancing it to a future day would drop the rest of today.
+"""
+import math
+import uuid
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import ActivityBaseline, ActivityType
+
+# Smoothing factor equivalent to a 14-day moving window
+ALPHA = 2 / (14 + 1)
+
+# Baselines need this many completed days before they raise alerts
+MIN_DAYS_OBSERVED = 7
+
+# Longest gap folded into the baseline as zero-count days
+MAX_GAP_DAYS = 60
+
+# Daily count deviation (in standard deviations) that raises an alert
+Z_THRESHOLD = 3.0
+
+# Floor on the standard deviation so perfectly regular routines are not noisy
+MIN_STD = 0.5
+
+
+def _fold_day(baseline: ActivityBaseline, count: int):
+    """Fold one completed day's count into the running mean and variance"""
+    if baseline.days_observed == 0:
+        baseline.mean = float(count)
+        baseline.variance = 0.0
+    else:
+        diff = count - baseline.mean
+        increment = ALPHA * diff
+        baseline.mean += increment
+        baseline.variance = (1 - ALPHA) * (baseline.variance + diff * increment)
+
+    baseline.days_observed += 1
+
+
+def _advance(baseline: ActivityBaseline, day: date):
+    """Close the current day and any empty days before the given day"""
+    _fold_day(baseline, baseline.current_count)
+
+    empty_days = min((day - baseline.current_day).days - 1, MAX_GAP_DAYS)
+    for _ in range(empty_days):
+        _fold_day(baseline, 0)
+
+    baseline.current_day = day
+    baseline.current_count = 0
+
+
+def _utc(timestamp: datetime) -> datetime:
+    """Naive UTC time, as stored in the database"""
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def _lock_baseline(db: Session, pet_id: uuid.UUID, activity_type: ActivityType, day: date) -> ActivityBaseline:
+    # Create the row if needed, then lock it so concurrent inserts serialize
+    db.execute(
+        insert(ActivityBaseline)
+        .values(pet_id=pet_id, type=activity_type, current_day=day, current_count=0,
+                mean=0.0, variance=0.0, days_observed=0)
+        .on_conflict_do_nothing(index_elements=["pet_id", "type"])
+    )
+    return db.query(ActivityBaseline).filter(
+        ActivityBaseline.pet_id == pet_id,
+        ActivityBaseline.type == activity_type
+    ).with_for_update().one()
+
+
+def record_activity(
+    db: Session,
+    pet_id: uuid.UUID,
+    activity_type: ActivityType,
+    timestamp: datetime,
+    now: Optional[datetime] = None
+):
+    """Update the baseline for a new activity; call before committing the activity"""
+    timestamp = _utc(timestamp)
+    day = timestamp.date()
+    if day > (now or datetime.utcnow()).date():
+        return
+
+    baseline = _lock_baseline(db, pet_id, activity_type, day)
+
+    if day > baseline.current_day:
+        _advance(baseline, day)
+
+    # Backdated entries for days already folded into the baseline are skipped
+    if day == baseline.current_day:
+        baseline.current_count += 1
+
+    if baseline.last_activity_at is None or timestamp > baseline.last_activity_at:
+        baseline.last_activity_at = timestamp
+
+
+def forget_activity(db: Session, pet_id: uuid.UUID, activity_type: ActivityType, timestamp: datetime):
+    """Undo a deleted activity if it still counts toward the day in progress"""
+    baseline = db.query(ActivityBaseline).filter(
+        ActivityBaseline.pet_id == pet_id,
+        ActivityBaseline.type == activity_type
+    ).with_for_update().first()
+
+    if baseline and _utc(timestamp).date() == baseline.current_day and baseline.current_count > 0:
+        baseline.current_count -= 1
+
+
+def detect_anomalies(baselines: List[ActivityBaseline], now: datetime) -> List[dict]:
+    """Compare each baseline's recent counts with its usual daily frequency"""
+    today = now.date()
+    alerts = []
+
+    for baseline in baselines:
+        if baseline.days_observed < MIN_DAYS_OBSERVED:
+            continue
+
+        mean = baseline.mean
+        std = max(math.sqrt(baseline.variance), MIN_STD)
+        # Baselines written before future days were skipped can be ahead of today
+        day_age = max((today - baseline.current_day).days, 0)
+        label = baseline.type.value.lower().replace("_", " ")
+        alert = None
+
+        # Full days with nothing logged since the last day that had activity
+        if baseline.current_count > 0:
+            empty_days = max(day_age - 1, 0)
+        else:
+            empty_days = day_age
+
+        # The total over k empty days deviates by sqrt(k) * mean / std
+        gap_z_score = -math.sqrt(empty_days) * mean / std
+
+        if empty_days > 0 and gap_z_score < -Z_THRESHOLD:
+            alert = {
+                "kind": "missed",
+                "message": f"No {label} logged for {empty_days} day(s)",
+                "z_score": round(gap_z_score, 2),
+            }
+
+        elif baseline.current_count > 0:
+            z_score = (baseline.current_count - mean) / std
+            day_complete = day_age >= 1
+
+            if z_score > Z_THRESHOLD:
+                alert = {
+                    "kind": "above_usual",
+                    "message": f"More {label} than usual on {baseline.current_day.isoformat()}",
+                    "z_score": round(z_score, 2),
+                }
+            elif day_complete and z_score < -Z_THRESHOLD:
+                alert = {
+                    "kind": "below_usual",
+                    "message": f"Less {label} than usual on {baseline.current_day.isoformat()}",
+                    "z_score": round(z_score, 2),
+                }
+
+        if alert:
+            alerts.append({
+                "type": baseline.type.value,
+                "day": baseline.current_day.isoformat(),
+                "count": baseline.current_count,
+                "usual_per_day": round(mean, 2),
+                "last_activity_at": baseline.last_activity_at.isoformat() if baseline.last_activity_at else None,
+                **alert
+            })
+
+    return alerts
@@ -1,10 +1,11 @@
 from datetime import datetime, timedelta
 from typing import Optional
 import hashlib
+import hmac
 import base64
 import bcrypt
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
@@ -145,3 +146,17 @@ async def get_current_user(
         )
 
     return user
+
+
+def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    """Allow worker metrics only to operators holding METRICS_TOKEN"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    if x_metrics_token is None or not hmac.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid metrics token"
+        )
@@ -0,0 +1,196 @@
+"""
+In-process response cache for per-pet analytics
+
+Entries are keyed by pet, endpoint and parameters. Writes to a pet's data call
+invalidate_pet(), which drops the pet's entries locally and notifies the other
+workers over LISTEN/NOTIFY.
+
+A key also records the cache clock when it was built, before the payload is
+queried; store() refuses it if the pet was invalidated after that moment, so a
+write racing a request is never cached over. The clock time of each pet's
+latest invalidation is kept in a tombstone LRU as large as the cache; once a
+tombstone is evicted only its time is remembered, as a floor every unknown pet
+is assumed to have been invalidated at.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+from fastapi import HTTPException, Request, Response, status
+from pydantic_core import to_json
+
+from app.config import settings
+from app.etag import etag_matches, not_modified
+from app.pubsub import notifier
+
+PET_INVALIDATION_CHANNEL = "pawmetric_pet_invalidate"
+
+
+@dataclass
+class CacheEntry:
+    owner_id: uuid.UUID
+    body: bytes
+    etag: Optional[str]
+    expires_at: float
+
+
+class AnalyticsCache:
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self._keys_by_pet: Dict[uuid.UUID, Set[tuple]] = {}
+        # Clock time of each recently invalidated pet's latest invalidation
+        self._invalidated: "OrderedDict[uuid.UUID, int]" = OrderedDict()
+        self._invalidated_floor = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, pet_id: uuid.UUID, endpoint: str, **params) -> tuple:
+        """Build a cache key; capture it before querying so racing writes are not cached"""
+        return (pet_id, self._clock, endpoint, tuple(sorted(params.items())))
+
+    @staticmethod
+    def _entry_key(key: tuple) -> tuple:
+        # Entries are found regardless of when their key was built
+        return (key[0],) + key[2:]
+
+    def get(self, key: tuple) -> Optional[CacheEntry]:
+        entry_key = self._entry_key(key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires_at < time.monotonic():
+                self._remove(entry_key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return entry
+
+    def store(self, key: tuple, owner_id: uuid.UUID, payload: dict, etag: Optional[str] = None) -> Response:
+        """Encode the payload (response models included) once, cache the bytes and return the response"""
+        response = Response(content=to_json(payload), media_type="application/json")
+        if etag:
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = "private, no-cache"
+
+        pet_id, built_at = key[0], key[1]
+        entry_key = self._entry_key(key)
+        entry = CacheEntry(
+            owner_id=owner_id,
+            body=response.body,
+            etag=etag,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+
+        with self._lock:
+            # A write landed while this payload was being computed
+            if self._invalidated.get(pet_id, self._invalidated_floor) > built_at:
+                return response
+
+            if entry_key in self._entries:
+                self._remove(entry_key)
+
+            self._entries[entry_key] = entry
+            self._keys_by_pet.setdefault(pet_id, set()).add(entry_key)
+            self._bytes += len(entry.body)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+        return response
+
+    def bump(self, pet_id: uuid.UUID):
+        """Drop a pet's cached entries and refuse payloads computed before now"""
+        with self._lock:
+            for key in list(self._keys_by_pet.get(pet_id, ())):
+                self._remove(key)
+
+            self._clock += 1
+            self._invalidated[pet_id] = self._clock
+            self._invalidated.move_to_end(pet_id)
+            while len(self._invalidated) > self.max_entries:
+                _, invalidated_at = self._invalidated.popitem(last=False)
+                self._invalidated_floor = max(self._invalidated_floor, invalidated_at)
+            self.invalidations += 1
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        keys = self._keys_by_pet.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_pet[key[0]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "cached_pets": len(self._keys_by_pet),
+                "tombstones": len(self._invalidated),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+analytics_cache = AnalyticsCache(
+    max_entries=settings.ANALYTICS_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS
+)
+
+
+def cached_response(entry: CacheEntry, request: Request, current_user) -> Response:
+    """Serve a cache hit, enforcing pet ownership and conditional requests"""
+    if entry.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have access to this pet"
+        )
+
+    if entry.etag:
+        if etag_matches(request, entry.etag):
+            return not_modified(entry.etag)
+        return Response(
+            content=entry.body,
+            media_type="application/json",
+            headers={"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+        )
+
+    return Response(content=entry.body, media_type="application/json")
+
+
+def invalidate_pet(pet_id: uuid.UUID):
+    """Invalidate cached analytics for a pet in this and every other worker"""
+    analytics_cache.bump(pet_id)
+    notifier.publish(PET_INVALIDATION_CHANNEL, f"{notifier.origin}:{pet_id}")
+
+
+def _on_pet_invalidated(payload: str):
+    origin, pet_id = payload.split(":", 1)
+    if origin != notifier.origin:
+        analytics_cache.bump(uuid.UUID(pet_id))
+
+
+notifier.subscribe(PET_INVALIDATION_CHANNEL, _on_pet_invalidated)
@@ -0,0 +1,60 @@
+"""
+Chat WebSocket frame formats
+
+Clients pick a format with the WebSocket subprotocol: "pawmetric.json" (the
+default, text frames) or "pawmetric.msgpack" (binary MessagePack frames).
+Either way the frame content is the same dict. Per-message deflate is
+negotiated separately by the server (WS_PER_MESSAGE_DEFLATE).
+
+An outbound Frame caches its encoding per codec, so an event fanned out to
+many connections is encoded at most once per format.
+"""
+import enum
+import json
+from typing import Dict, List, Optional, Union
+
+import msgpack
+
+
+class Codec(str, enum.Enum):
+    JSON = "pawmetric.json"
+    MSGPACK = "pawmetric.msgpack"
+
+
+def negotiate(subprotocols: List[str]) -> Optional[Codec]:
+    """First codec the client offered, or None to accept without a subprotocol"""
+    for subprotocol in subprotocols:
+        try:
+            return Codec(subprotocol)
+        except ValueError:
+            continue
+    return None
+
+
+def encode(message: dict, codec: Codec) -> Union[str, bytes]:
+    if codec == Codec.MSGPACK:
+        return msgpack.packb(message)
+    return json.dumps(message, separators=(",", ":"))
+
+
+def decode(data: Union[str, bytes]) -> dict:
+    """Binary frames are MessagePack and text frames JSON, whatever was negotiated"""
+    if isinstance(data, bytes):
+        return msgpack.unpackb(data)
+    return json.loads(data)
+
+
+class Frame:
+    """An outbound message with its encodings cached per codec"""
+
+    __slots__ = ("message", "_encoded")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._encoded: Dict[Codec, Union[str, bytes]] = {}
+
+    def encoded(self, codec: Codec) -> Union[str, bytes]:
+        data = self._encoded.get(codec)
+        if data is None:
+            data = self._encoded[codec] = encode(self.message, codec)
+        return data
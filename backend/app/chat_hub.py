@@ -0,0 +1,429 @@
+"""
+Chat WebSocket connections and cross-worker fan-out
+
+Every worker keeps the sockets it accepted, grouped per user so each of a
+user's devices gets its own connection. Events are delivered to local sockets
+directly and published over PostgreSQL LISTEN/NOTIFY so the workers holding
+the user's other devices deliver them too.
+
+NOTIFY payloads are limited to 8000 bytes. Larger chat messages are published
+as a reference to the stored row and loaded by the receiving worker.
+
+Typing and read position events are coalesced for CHAT_EPHEMERAL_COALESCE_MS,
+then delivered to local sockets from memory; everything flushed in one window
+goes to other workers together in a single NOTIFY statement.
+
+Sends never wait on the network: each connection has a bounded queue drained
+by its own task, and CHAT_SEND_OVERFLOW decides whether a full queue drops its
+oldest frame or disconnects the slow client.
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set, Tuple, Union
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+from starlette.concurrency import run_in_threadpool
+
+from app.chat_codec import Codec, Frame, decode, negotiate
+from app.config import OverflowPolicy, settings
+from app.database import SessionLocal
+from app.models import ChatMessage
+from app.chat_presence import PresenceStatus, combined_status, presence
+from app.pubsub import notifier
+
+CHAT_CHANNEL = "pawmetric_chat"
+CHAT_EPHEMERAL_CHANNEL = "pawmetric_chat_ephemeral"
+
+# Largest payload published inline, leaving room under the 8000 byte NOTIFY limit
+MAX_NOTIFY_PAYLOAD = 7900
+
+# Delivery latencies kept for percentiles
+LATENCY_SAMPLES = 1000
+
+
+def message_event(message: ChatMessage) -> dict:
+    return {
+        "type": "new_message",
+        "data": {
+            "id": str(message.id),
+            "vet_id": str(message.vet_id) if message.vet_id else None,
+            "message": message.message,
+            "is_from_user": message.is_from_user,
+            "created_at": message.created_at.isoformat()
+        }
+    }
+
+
+def _load_message_event(message_id: str, created_at: str) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        # The primary key includes created_at, so only its month's partition is read
+        message = db.get(ChatMessage, (uuid.UUID(message_id), datetime.fromisoformat(created_at)))
+        return message_event(message) if message else None
+    finally:
+        db.close()
+
+
+class DeliveryStats:
+    """Time from publishing an event to writing it to a socket, and queue health"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self._latencies: Deque[float] = deque(maxlen=samples)
+        self._send_times: Deque[float] = deque(maxlen=samples)
+        self._lock = threading.Lock()
+        self.local = 0
+        self.remote = 0
+        self.references = 0
+        self.failed = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.max_queue_depth = 0
+
+    def record(self, published_at: float, sent_in: float, remote: bool):
+        with self._lock:
+            self._latencies.append(time.time() - published_at)
+            self._send_times.append(sent_in)
+            if remote:
+                self.remote += 1
+            else:
+                self.local += 1
+
+    def queued(self, depth: int):
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            send_times = sorted(self._send_times)
+            counts = {
+                "local_deliveries": self.local,
+                "remote_deliveries": self.remote,
+                "references_published": self.references,
+                "failed_sends": self.failed,
+                "dropped_frames": self.dropped,
+                "evicted_connections": self.evicted,
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+        def percentiles(samples: List[float]) -> dict:
+            def percentile(fraction: float) -> Optional[float]:
+                if not samples:
+                    return None
+                return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 3)
+
+            return {
+                "samples": len(samples),
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": percentile(1.0),
+            }
+
+        return {**counts, "latency_ms": percentiles(latencies), "send_ms": percentiles(send_times)}
+
+
+class ClientConnection:
+    """
+    One device's socket with a bounded outbound queue drained by its own task,
+    so a slow client only ever delays itself
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        manager: "ConnectionManager",
+        codec: Codec = Codec.JSON,
+        subject: Optional[str] = None
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        # Verified access token subject; only these connections count towards presence
+        self.subject = subject
+        self.manager = manager
+        self.codec = codec
+        self.status = PresenceStatus.ONLINE
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CHAT_SEND_QUEUE_SIZE)
+        self._task = asyncio.create_task(self._drain())
+        # Token bucket for inbound ephemeral events
+        self._tokens = settings.CHAT_EPHEMERAL_BURST
+        self._refilled = time.monotonic()
+
+    def allow_ephemeral(self) -> bool:
+        """Whether another typing/presence/read event may be relayed now"""
+        now = time.monotonic()
+        self._tokens = min(
+            settings.CHAT_EPHEMERAL_BURST,
+            self._tokens + (now - self._refilled) * settings.CHAT_EPHEMERAL_RATE_PER_SECOND
+        )
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def send(self, message: Union[dict, Frame], published_at: Optional[float] = None, remote: bool = False) -> bool:
+        """Queue a frame without waiting on the network; False if the connection was dropped"""
+        frame = (message if isinstance(message, Frame) else Frame(message), published_at or time.time(), remote)
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            if settings.CHAT_SEND_OVERFLOW == OverflowPolicy.DISCONNECT:
+                self.manager.delivery.evicted += 1
+                self.close(status.WS_1013_TRY_AGAIN_LATER)
+                return False
+            self.queue.get_nowait()
+            self.queue.put_nowait(frame)
+            self.manager.delivery.dropped += 1
+
+        self.manager.delivery.queued(self.queue.qsize())
+        return True
+
+    async def _drain(self):
+        while True:
+            frame, published_at, remote = await self.queue.get()
+            data = frame.encoded(self.codec)
+            started = time.perf_counter()
+            try:
+                if isinstance(data, bytes):
+                    await self.websocket.send_bytes(data)
+                else:
+                    await self.websocket.send_text(data)
+            except Exception:
+                self.manager.delivery.failed += 1
+                self.manager.disconnect(self)
+                return
+            self.manager.delivery.record(published_at, time.perf_counter() - started, remote)
+
+    async def receive(self) -> dict:
+        """Next inbound frame, JSON text or MessagePack binary"""
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+        if message.get("bytes") is not None:
+            return decode(message["bytes"])
+        return decode(message["text"])
+
+    def close(self, code: int = status.WS_1000_NORMAL_CLOSURE):
+        self.manager.disconnect(self)
+        asyncio.ensure_future(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def stop(self):
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
+class ConnectionManager:
+    def __init__(self):
+        self.active_connections: Dict[str, Set[ClientConnection]] = {}
+        self.delivery = DeliveryStats()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Latest ephemeral event per (user, key) waiting for the next flush
+        self._coalescing: Dict[Tuple[str, str], Tuple[dict, Optional[ClientConnection]]] = {}
+        self.ephemeral_received = 0
+        self.ephemeral_sent = 0
+        self.ephemeral_published = 0
+
+    async def connect(self, websocket: WebSocket, user_id: str, subject: Optional[str] = None) -> ClientConnection:
+        codec = negotiate(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=codec.value if codec else None)
+        self._loop = asyncio.get_running_loop()
+        connection = ClientConnection(websocket, user_id, self, codec or Codec.JSON, subject)
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        self._update_presence(connection)
+        return connection
+
+    def disconnect(self, connection: ClientConnection):
+        connection.stop()
+        connections = self.active_connections.get(connection.user_id)
+        if connections is None or connection not in connections:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self.active_connections[connection.user_id]
+        self._update_presence(connection)
+
+    def _update_presence(self, connection: ClientConnection):
+        """Recompute presence for the token subject behind a connection, if it has one"""
+        subject = connection.subject
+        if subject is None:
+            return
+        presence.update(subject, combined_status(
+            other.status for other in self.active_connections.get(connection.user_id, ())
+            if other.subject == subject
+        ))
+
+    def set_status(self, connection: ClientConnection, status: PresenceStatus):
+        connection.status = status
+        self._update_presence(connection)
+
+    def connection_count(self) -> int:
+        return sum(len(connections) for connections in self.active_connections.values())
+
+    def queue_depth(self) -> int:
+        return sum(
+            connection.queue.qsize()
+            for connections in self.active_connections.values()
+            for connection in connections
+        )
+
+    def _send_local(
+        self,
+        message: dict,
+        user_id: str,
+        published_at: float,
+        remote: bool = False,
+        exclude: Optional[ClientConnection] = None
+    ):
+        connections = [
+            connection for connection in self.active_connections.get(user_id, ())
+            if connection is not exclude
+        ]
+        if not connections:
+            return
+
+        # Encoded at most once per codec for every device
+        frame = Frame(message)
+        for connection in connections:
+            connection.send(frame, published_at, remote)
+
+    async def send_message(
+        self,
+        message: dict,
+        user_id: str,
+        message_id: Optional[uuid.UUID] = None,
+        exclude: Optional[ClientConnection] = None
+    ):
+        """
+        Deliver an event to every device of a user on any worker; message_id
+        lets oversized chat messages travel to other workers by reference
+        """
+        published_at = time.time()
+        self._send_local(message, user_id, published_at, exclude=exclude)
+
+        envelope = {"user_id": user_id, "published_at": published_at, "event": message}
+        payload = f"{notifier.origin}:{json.dumps(envelope)}"
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD and message_id is not None:
+            del envelope["event"]
+            envelope["message_id"] = str(message_id)
+            envelope["created_at"] = message["data"]["created_at"]
+            payload = f"{notifier.origin}:{json.dumps(envelope)}"
+            self.delivery.references += 1
+
+        await run_in_threadpool(notifier.publish, CHAT_CHANNEL, payload)
+
+    def send_ephemeral(
+        self,
+        user_id: str,
+        key: str,
+        message: dict,
+        exclude: Optional[ClientConnection] = None
+    ):
+        """
+        Relay a live signal to the user's other devices without persisting it;
+        events with the same key within CHAT_EPHEMERAL_COALESCE_MS collapse
+        into the latest one
+        """
+        self.ephemeral_received += 1
+        if not self._coalescing:
+            asyncio.get_running_loop().call_later(
+                settings.CHAT_EPHEMERAL_COALESCE_MS / 1000, self._flush_ephemeral
+            )
+        self._coalescing[(user_id, key)] = (message, exclude)
+
+    def _flush_ephemeral(self):
+        """Deliver the window's events locally and publish them to other workers in one go"""
+        pending, self._coalescing = self._coalescing, {}
+        published_at = time.time()
+        events = []
+        for (user_id, _), (message, exclude) in pending.items():
+            self._send_local(message, user_id, published_at, exclude=exclude)
+            events.append(json.dumps({"user_id": user_id, "event": message}))
+        self.ephemeral_sent += len(pending)
+
+        payloads = ephemeral_payloads(events, published_at)
+        if payloads:
+            self.ephemeral_published += len(payloads)
+            asyncio.ensure_future(run_in_threadpool(notifier.publish_many, CHAT_EPHEMERAL_CHANNEL, payloads))
+
+    def broadcast(self, message: dict):
+        """Queue an event for every connection on this worker"""
+        published_at = time.time()
+        frame = Frame(message)
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                connection.send(frame, published_at)
+
+    async def _deliver_remote(self, envelope: dict):
+        event = envelope.get("event")
+        if event is None:
+            event = await run_in_threadpool(_load_message_event, envelope["message_id"], envelope["created_at"])
+            if event is None:
+                return
+        self._send_local(event, envelope["user_id"], envelope["published_at"], remote=True)
+
+    def on_notification(self, payload: str):
+        """Listener thread handler: hand events for local users to the event loop"""
+        origin, body = payload.split(":", 1)
+        if origin == notifier.origin or self._loop is None:
+            return
+
+        envelope = json.loads(body)
+        if envelope["user_id"] not in self.active_connections:
+            return
+
+        self._loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(self._deliver_remote(envelope))
+        )
+
+    def _deliver_ephemeral(self, events: List[dict], published_at: float):
+        for event in events:
+            self._send_local(event["event"], event["user_id"], published_at, remote=True)
+
+    def on_ephemeral_notification(self, payload: str):
+        """Listener thread handler for another worker's flushed ephemeral events"""
+        origin, body = payload.split(":", 1)
+        if origin == notifier.origin or self._loop is None:
+            return
+
+        batch = json.loads(body)
+        events = [event for event in batch["events"] if event["user_id"] in self.active_connections]
+        if events:
+            self._loop.call_soon_threadsafe(self._deliver_ephemeral, events, batch["published_at"])
+
+
+def ephemeral_payloads(events: List[str], published_at: float) -> List[str]:
+    """Pack encoded events into as few NOTIFY payloads as fit under MAX_NOTIFY_PAYLOAD"""
+    prefix = f'{notifier.origin}:{{"published_at": {published_at}, "events": ['
+    payloads, chunk, size = [], [], len(prefix) + 2
+    for event in events:
+        # json.dumps escapes non-ASCII, so characters are bytes
+        if size + len(event) + 2 > MAX_NOTIFY_PAYLOAD:
+            if chunk:
+                payloads.append(prefix + ", ".join(chunk) + "]}")
+                chunk, size = [], len(prefix) + 2
+            if size + len(event) > MAX_NOTIFY_PAYLOAD:
+                continue  # too large to publish; local devices still got it
+        chunk.append(event)
+        size += len(event) + 2
+    if chunk:
+        payloads.append(prefix + ", ".join(chunk) + "]}")
+    return payloads
+
+
+manager = ConnectionManager()
+
+notifier.subscribe(CHAT_CHANNEL, manager.on_notification)
+notifier.subscribe(CHAT_EPHEMERAL_CHANNEL, manager.on_ephemeral_notification)
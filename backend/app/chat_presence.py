@@ -0,0 +1,172 @@
+"""
+In-memory chat presence shared between workers
+
+Each worker knows the status of the users connected to it and announces
+changes over LISTEN/NOTIFY; it also re-announces all of its users every
+PRESENCE_HEARTBEAT_SECONDS so entries from a worker that died expire after
+a few missed heartbeats. Expired entries, and last-seen times older than
+PRESENCE_LAST_SEEN_HOURS, are pruned on each heartbeat. Nothing is written to
+the database.
+"""
+import asyncio
+import enum
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.pubsub import notifier
+
+PRESENCE_CHANNEL = "pawmetric_presence"
+
+# Users per heartbeat notification, keeping payloads well under 8000 bytes
+HEARTBEAT_CHUNK = 100
+
+# Heartbeats a worker may miss before its users are considered gone
+MISSED_HEARTBEATS = 3
+
+
+class PresenceStatus(str, enum.Enum):
+    ONLINE = "online"
+    AWAY = "away"
+    OFFLINE = "offline"
+
+
+def combined_status(statuses: Iterable[PresenceStatus]) -> PresenceStatus:
+    """A user is online if any device is, away if all are away"""
+    statuses = set(statuses)
+    if PresenceStatus.ONLINE in statuses:
+        return PresenceStatus.ONLINE
+    if PresenceStatus.AWAY in statuses:
+        return PresenceStatus.AWAY
+    return PresenceStatus.OFFLINE
+
+
+class PresenceTracker:
+    def __init__(self, heartbeat_seconds: float, last_seen_seconds: float):
+        self.heartbeat_seconds = heartbeat_seconds
+        self.last_seen_seconds = last_seen_seconds
+        self._local: Dict[str, PresenceStatus] = {}
+        # user -> worker origin -> (status, announced at)
+        self._remote: Dict[str, Dict[str, Tuple[PresenceStatus, float]]] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def update(self, user_id: str, status: PresenceStatus):
+        """Record this worker's status for a user and announce it if it changed"""
+        with self._lock:
+            previous = self._local.get(user_id, PresenceStatus.OFFLINE)
+            if status == previous:
+                return
+            if status == PresenceStatus.OFFLINE:
+                del self._local[user_id]
+            else:
+                self._local[user_id] = status
+            self._last_seen[user_id] = time.time()
+
+        self._announce({user_id: status.value})
+
+    def _announce(self, users: Dict[str, str]):
+        payload = f"{notifier.origin}:{json.dumps({'at': time.time(), 'users': users})}"
+        asyncio.ensure_future(run_in_threadpool(notifier.publish, PRESENCE_CHANNEL, payload))
+
+    def heartbeat(self):
+        with self._lock:
+            users = [(user_id, status.value) for user_id, status in self._local.items()]
+        for start in range(0, len(users), HEARTBEAT_CHUNK):
+            self._announce(dict(users[start:start + HEARTBEAT_CHUNK]))
+
+    def on_notification(self, payload: str):
+        """Listener thread handler for other workers' announcements"""
+        origin, body = payload.split(":", 1)
+        if origin == notifier.origin:
+            return
+
+        announcement = json.loads(body)
+        at = announcement["at"]
+        with self._lock:
+            for user_id, status in announcement["users"].items():
+                workers = self._remote.setdefault(user_id, {})
+                if status == PresenceStatus.OFFLINE:
+                    workers.pop(origin, None)
+                    if not workers:
+                        del self._remote[user_id]
+                else:
+                    workers[origin] = (PresenceStatus(status), at)
+                self._last_seen[user_id] = max(at, self._last_seen.get(user_id, 0.0))
+
+    def prune(self) -> int:
+        """Forget expired remote statuses and old last-seen times; returns users dropped"""
+        now = time.time()
+        expired_before = now - self.heartbeat_seconds * MISSED_HEARTBEATS
+        forget_before = now - self.last_seen_seconds
+        with self._lock:
+            for user_id in list(self._remote):
+                workers = self._remote[user_id]
+                for origin in [origin for origin, (_, at) in workers.items() if at < expired_before]:
+                    del workers[origin]
+                if not workers:
+                    del self._remote[user_id]
+
+            forgotten = [
+                user_id for user_id, at in self._last_seen.items()
+                if at < forget_before and user_id not in self._local and user_id not in self._remote
+            ]
+            for user_id in forgotten:
+                del self._last_seen[user_id]
+        return len(forgotten)
+
+    def lookup(self, user_ids: List[str]) -> Dict[str, dict]:
+        """Status across all workers and when each user was last seen online"""
+        expired_before = time.time() - self.heartbeat_seconds * MISSED_HEARTBEATS
+        presence = {}
+        with self._lock:
+            for user_id in user_ids:
+                statuses = [
+                    status for status, at in self._remote.get(user_id, {}).values()
+                    if at >= expired_before
+                ]
+                if user_id in self._local:
+                    statuses.append(self._local[user_id])
+                status = combined_status(statuses)
+
+                last_seen = self._last_seen.get(user_id)
+                presence[user_id] = {
+                    "status": status.value,
+                    "last_seen": (
+                        datetime.fromtimestamp(last_seen, tz=timezone.utc).isoformat()
+                        if last_seen and status == PresenceStatus.OFFLINE else None
+                    ),
+                }
+        return presence
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "local_users": len(self._local),
+                "remote_users": len(self._remote),
+                "last_seen_users": len(self._last_seen),
+            }
+
+
+async def run_presence_heartbeat(tracker: "PresenceTracker"):
+    """Re-announce this worker's users every PRESENCE_HEARTBEAT_SECONDS and prune stale entries"""
+    while True:
+        await asyncio.sleep(tracker.heartbeat_seconds)
+        try:
+            tracker.heartbeat()
+            tracker.prune()
+        except Exception as e:
+            print(f"❌ Presence heartbeat failed: {e}")
+
+
+presence = PresenceTracker(
+    heartbeat_seconds=settings.PRESENCE_HEARTBEAT_SECONDS,
+    last_seen_seconds=settings.PRESENCE_LAST_SEEN_HOURS * 3600
+)
+
+notifier.subscribe(PRESENCE_CHANNEL, presence.on_notification)
@@ -0,0 +1,160 @@
+"""
+Write-behind persistence for chat messages received over WebSockets
+
+Inbound messages are queued and written by one background task in batches of
+up to CHAT_WRITE_BATCH_SIZE rows, waiting at most CHAT_WRITE_MAX_DELAY_MS for
+a batch to fill. Each batch is a single multi-row INSERT ... RETURNING in its
+own short-lived session, and callers are resumed only after it commits. If the
+batch fails (for example one row references a missing user or vet), its rows
+are retried one at a time so only the bad messages are rejected.
+"""
+import asyncio
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ChatMessage
+
+
+def _insert_messages(rows: List[dict]) -> List[ChatMessage]:
+    db = SessionLocal()
+    try:
+        returned = db.execute(
+            insert(ChatMessage).values(rows).returning(ChatMessage.id, ChatMessage.created_at)
+        ).all()
+        db.commit()
+    finally:
+        db.close()
+
+    created_at = dict(returned)
+    return [ChatMessage(**{**row, "created_at": created_at[row["id"]]}) for row in rows]
+
+
+class ChatMessageWriter:
+    def __init__(self, batch_size: int, max_delay_ms: float):
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.rows = 0
+        self.retried = 0
+        self.failed = 0
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write whatever is queued, then stop"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def save(
+        self,
+        user_id: uuid.UUID,
+        vet_id: Optional[uuid.UUID],
+        message: str,
+        is_from_user: bool
+    ) -> ChatMessage:
+        """Queue a message and wait until its batch has been committed"""
+        self.start()
+        row = {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "vet_id": vet_id,
+            "message": message,
+            "is_from_user": is_from_user,
+            "created_at": datetime.utcnow(),
+        }
+        written = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, written))
+        return await written
+
+    async def _next_batch(self) -> Tuple[List[Tuple[dict, asyncio.Future]], bool]:
+        """Block for the first message, then gather more until full or the delay passes"""
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        deadline = asyncio.get_running_loop().time() + self.max_delay
+        while len(batch) < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            try:
+                item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if not batch:
+                continue
+
+            try:
+                messages = await run_in_threadpool(_insert_messages, [row for row, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    self._reject(batch[0], e)
+                    continue
+                print(f"⚠️  Chat message batch failed ({len(batch)} messages), retrying one at a time: {e}")
+                await self._write_each(batch)
+                continue
+
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, written), message in zip(batch, messages):
+                if not written.done():
+                    written.set_result(message)
+
+    async def _write_each(self, batch: List[Tuple[dict, asyncio.Future]]):
+        """Insert rows individually so one bad row does not fail its neighbours"""
+        for row, written in batch:
+            try:
+                [message] = await run_in_threadpool(_insert_messages, [row])
+            except Exception as e:
+                self._reject((row, written), e)
+                continue
+            self.batches += 1
+            self.rows += 1
+            self.retried += 1
+            if not written.done():
+                written.set_result(message)
+
+    def _reject(self, item: Tuple[dict, asyncio.Future], error: Exception):
+        row, written = item
+        self.failed += 1
+        print(f"❌ Chat message {row['id']} from user {row['user_id']} could not be saved: {error}")
+        if not written.done():
+            written.set_exception(error)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "retried": self.retried,
+            "failed": self.failed,
+            "average_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+chat_writer = ChatMessageWriter(
+    batch_size=settings.CHAT_WRITE_BATCH_SIZE,
+    max_delay_ms=settings.CHAT_WRITE_MAX_DELAY_MS
+)
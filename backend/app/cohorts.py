@@ -0,0 +1,213 @@
+"""
+Breed and age-band cohort benchmarks for pet health scores
+
+A periodic snapshot loads every pet's breed, age and overall score once and
+stores them as columnar NumPy arrays sorted by (cohort, score). Each cohort is
+a contiguous slice, so quantiles and histograms are computed for all cohorts in
+one batch and a pet's percentile is a binary search over its cohort's slice.
+"""
+import asyncio
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Pet, HealthScore
+
+# Upper bounds (years) of each age band; pets older than the last edge share one band
+AGE_BAND_EDGES = np.array([1, 3, 7, 10])
+AGE_BAND_LABELS = ["0-1", "1-3", "3-7", "7-10", "10+"]
+ALL_AGES = len(AGE_BAND_LABELS)
+ALL_BREEDS = "*"
+
+QUANTILES = np.array([0.10, 0.25, 0.50, 0.75, 0.90])
+HISTOGRAM_EDGES = np.arange(0, 101, 10)
+
+# Smaller cohorts fall back to a broader one
+MIN_COHORT_SIZE = 5
+
+
+def normalize_breed(breed: Optional[str]) -> str:
+    """Normalize a breed name for grouping"""
+    return " ".join(breed.lower().split()) if breed else "unknown"
+
+
+def age_band(age: Optional[int]) -> int:
+    """Index of the age band for an age in years"""
+    if age is None:
+        return ALL_AGES
+    return int(np.digitize(age, AGE_BAND_EDGES, right=False))
+
+
+@dataclass
+class CohortSnapshot:
+    breed_codes: Dict[str, int]
+    offsets: np.ndarray      # (n_cohorts + 1,) start of each cohort in scores
+    scores: np.ndarray       # (n_rows,) float32, sorted within each cohort
+    means: np.ndarray        # (n_cohorts,)
+    quantiles: np.ndarray    # (n_cohorts, len(QUANTILES))
+    histograms: np.ndarray   # (n_cohorts, len(HISTOGRAM_EDGES) - 1)
+    pet_count: int
+    taken_at: datetime
+
+    def cohort_id(self, breed: str, band: int) -> Optional[int]:
+        code = self.breed_codes.get(breed)
+        if code is None:
+            return None
+        return code * (ALL_AGES + 1) + band
+
+    def size(self, cohort: int) -> int:
+        return int(self.offsets[cohort + 1] - self.offsets[cohort])
+
+
+def build_snapshot(breeds, ages, scores) -> CohortSnapshot:
+    """Build a snapshot from parallel sequences of breed, age and score"""
+    breeds = np.array([normalize_breed(b) for b in breeds] + [ALL_BREEDS], dtype=object)
+    breed_names, breed_index = np.unique(breeds, return_inverse=True)
+    breed_index = breed_index[:-1]
+    all_breeds_code = int(np.searchsorted(breed_names, ALL_BREEDS))
+
+    ages = np.array([-1 if a is None else a for a in ages], dtype=np.int32)
+    bands = np.where(ages < 0, ALL_AGES, np.digitize(ages, AGE_BAND_EDGES)).astype(np.int64)
+    scores = np.asarray(scores, dtype=np.float32)
+
+    # Every pet belongs to breed/all ages and all breeds/all ages; pets with a
+    # known age also belong to breed/band and all breeds/band
+    stride = ALL_AGES + 1
+    known_age = bands != ALL_AGES
+    all_codes = np.full_like(breed_index, all_breeds_code)
+    cohort_ids = np.concatenate([
+        breed_index[known_age] * stride + bands[known_age],
+        breed_index * stride + ALL_AGES,
+        all_codes[known_age] * stride + bands[known_age],
+        all_codes * stride + ALL_AGES,
+    ])
+    cohort_scores = np.concatenate([scores[known_age], scores, scores[known_age], scores])
+
+    n_cohorts = len(breed_names) * stride
+    order = np.lexsort((cohort_scores, cohort_ids))
+    cohort_ids = cohort_ids[order]
+    cohort_scores = np.ascontiguousarray(cohort_scores[order])
+    offsets = np.searchsorted(cohort_ids, np.arange(n_cohorts + 1))
+    counts = np.diff(offsets)
+
+    # Linear-interpolated quantiles for every cohort at once
+    quantiles = np.full((n_cohorts, len(QUANTILES)), np.nan, dtype=np.float32)
+    populated = counts > 0
+    if cohort_scores.size:
+        positions = offsets[:-1, None] + QUANTILES[None, :] * (counts[:, None] - 1)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, offsets[1:, None] - 1)
+        lower = np.clip(lower, 0, cohort_scores.size - 1)
+        upper = np.clip(upper, 0, cohort_scores.size - 1)
+        fraction = (positions - lower).astype(np.float32)
+        interpolated = cohort_scores[lower] * (1 - fraction) + cohort_scores[upper] * fraction
+        quantiles[populated] = interpolated[populated]
+
+    sums = np.bincount(cohort_ids, weights=cohort_scores, minlength=n_cohorts)
+    means = np.divide(sums, counts, out=np.full(n_cohorts, np.nan), where=populated)
+
+    n_bins = len(HISTOGRAM_EDGES) - 1
+    bins = np.clip(np.digitize(cohort_scores, HISTOGRAM_EDGES) - 1, 0, n_bins - 1)
+    histograms = np.bincount(
+        cohort_ids * n_bins + bins, minlength=n_cohorts * n_bins
+    ).reshape(n_cohorts, n_bins)
+
+    return CohortSnapshot(
+        breed_codes={name: code for code, name in enumerate(breed_names)},
+        offsets=offsets,
+        scores=cohort_scores,
+        means=means,
+        quantiles=quantiles,
+        histograms=histograms,
+        pet_count=len(scores),
+        taken_at=datetime.utcnow()
+    )
+
+
+class CohortEngine:
+    def __init__(self):
+        self.snapshot: Optional[CohortSnapshot] = None
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self, db):
+        """Rebuild the snapshot from the database in a single column query"""
+        with self._refresh_lock:
+            rows = db.execute(
+                select(Pet.breed, Pet.age, HealthScore.overall_score)
+                .join(HealthScore, HealthScore.pet_id == Pet.id)
+                .where(HealthScore.overall_score.isnot(None))
+            ).all()
+
+            breeds, ages, scores = zip(*rows) if rows else ((), (), ())
+            self.snapshot = build_snapshot(breeds, ages, scores)
+
+    def compare(self, breed: Optional[str], age: Optional[int], score: float) -> Optional[dict]:
+        """Compare a score against the narrowest cohort with enough pets"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+
+        breed = normalize_breed(breed)
+        band = age_band(age)
+        candidates = [(breed, band), (breed, ALL_AGES), (ALL_BREEDS, band), (ALL_BREEDS, ALL_AGES)]
+
+        for cohort_breed, cohort_band in candidates:
+            cohort = snapshot.cohort_id(cohort_breed, cohort_band)
+            if cohort is not None and snapshot.size(cohort) >= MIN_COHORT_SIZE:
+                break
+        else:
+            return None
+
+        start, end = snapshot.offsets[cohort], snapshot.offsets[cohort + 1]
+        cohort_scores = snapshot.scores[start:end]
+        below = np.searchsorted(cohort_scores, score, side="left")
+        at_or_below = np.searchsorted(cohort_scores, score, side="right")
+        percentile = (below + at_or_below) / 2 / cohort_scores.size * 100
+
+        return {
+            "cohort": {
+                "breed": None if cohort_breed == ALL_BREEDS else cohort_breed,
+                "age_band": None if cohort_band == ALL_AGES else AGE_BAND_LABELS[cohort_band],
+                "size": int(cohort_scores.size)
+            },
+            "score": score,
+            "percentile": round(float(percentile), 1),
+            "mean": round(float(snapshot.means[cohort]), 1),
+            "quantiles": {
+                f"p{int(q * 100)}": round(float(value), 1)
+                for q, value in zip(QUANTILES, snapshot.quantiles[cohort])
+            },
+            "distribution": [
+                {"min": int(low), "max": int(high), "count": int(count)}
+                for low, high, count in zip(HISTOGRAM_EDGES[:-1], HISTOGRAM_EDGES[1:], snapshot.histograms[cohort])
+            ],
+            "snapshot_at": snapshot.taken_at.isoformat()
+        }
+
+
+cohort_engine = CohortEngine()
+
+
+def _refresh_from_db():
+    db = SessionLocal()
+    try:
+        cohort_engine.refresh(db)
+    finally:
+        db.close()
+
+
+async def run_cohort_refresher():
+    """Rebuild the cohort snapshot every COHORT_REFRESH_SECONDS"""
+    while True:
+        try:
+            await asyncio.to_thread(_refresh_from_db)
+        except Exception as e:
+            print(f"❌ Cohort snapshot refresh failed: {e}")
+
+        await asyncio.sleep(settings.COHORT_REFRESH_SECONDS)
@@ -1,8 +1,14 @@
 from pydantic_settings import BaseSettings
 from typing import List
+import enum
 import os
 
 
+class OverflowPolicy(str, enum.Enum):
+    DROP = "drop"  # discard the oldest queued frame
+    DISCONNECT = "disconnect"  # close the slow connection
+
+
 class Settings(BaseSettings):
     # Supabase
     SUPABASE_URL: str = ""
@@ -18,11 +24,16 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Per-worker metrics endpoints answer only requests sending this value as
+    # X-Metrics-Token; they are disabled while it is empty
+    METRICS_TOKEN: str = ""
+
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = True
     RELOAD: bool = True
+    WS_PER_MESSAGE_DEFLATE: bool = True  # Compress WebSocket frames for clients that offer it
 
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
@@ -37,6 +48,50 @@ class Settings(BaseSettings):
     # AI Model
     AI_MODEL_ENDPOINT: str = ""
 
+    # Cross-worker notifications (PostgreSQL LISTEN/NOTIFY)
+    PUBSUB_ENABLED: bool = True
+    PUBSUB_DATABASE_URL: str = ""  # Direct connection; LISTEN does not work through pgbouncer transaction pooling
+
+    # Analytics cache
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 10000
+    ANALYTICS_CACHE_TTL_SECONDS: int = 300
+
+    # Veterinarian directory response cache
+    VET_CACHE_MAX_ENTRIES: int = 1000
+    # How often each worker checks its in-memory directory against the database
+    VET_DIRECTORY_CHECK_SECONDS: int = 300
+
+    # Timezone for clinics whose hours have no timezone of their own
+    DEFAULT_VET_TIMEZONE: str = "America/Los_Angeles"
+
+    # Reject chat WebSockets that do not pass an access token as ?token=;
+    # connections without one never receive stored history
+    CHAT_WS_REQUIRE_TOKEN: bool = True
+
+    # Chat messages received over WebSockets are written in batches
+    CHAT_WRITE_BATCH_SIZE: int = 100
+    CHAT_WRITE_MAX_DELAY_MS: float = 5.0
+
+    # Outbound frames queued per WebSocket; a full queue drops its oldest frame or disconnects
+    CHAT_SEND_QUEUE_SIZE: int = 256
+    CHAT_SEND_OVERFLOW: OverflowPolicy = OverflowPolicy.DROP
+
+    # Typing, presence and read position events: relayed in memory, never stored
+    CHAT_EPHEMERAL_COALESCE_MS: float = 100.0
+    CHAT_EPHEMERAL_RATE_PER_SECOND: float = 5.0
+    CHAT_EPHEMERAL_BURST: int = 10
+    PRESENCE_HEARTBEAT_SECONDS: float = 30.0
+    # How long an offline user's last-seen time is remembered
+    PRESENCE_LAST_SEEN_HOURS: float = 24.0
+
+    # Monthly partitions created ahead of time for partitioned tables
+    PARTITION_MONTHS_AHEAD: int = 3
+    # Default age at which manage_partitions.py archive exports and drops chat history
+    CHAT_RETENTION_MONTHS: int = 24
+
+    # Breed/age cohort benchmarks
+    COHORT_REFRESH_SECONDS: int = 3600
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -25,4 +25,8 @@ def get_db():
 
 def init_db():
     """Initialize database tables"""
+    from app.migrations import create_extensions, run_migrations
+
+    create_extensions(engine)
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
@@ -0,0 +1,190 @@
+"""
+Streaming exports of a pet's history as CSV or Parquet
+
+Rows are read through a server-side cursor in batches of EXPORT_BATCH_SIZE
+and each batch is encoded and yielded before the next one is fetched, so
+memory stays flat regardless of how much history a pet has.
+"""
+import csv
+import enum
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models import Activity, HealthScan, HealthScore
+
+EXPORT_BATCH_SIZE = 10000
+
+
+class ExportDataset(str, enum.Enum):
+    ACTIVITIES = "activities"
+    HEALTH_SCANS = "health_scans"
+    HEALTH_SCORES = "health_scores"
+
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+# Exported columns and sort order for each dataset
+DATASET_COLUMNS = {
+    ExportDataset.ACTIVITIES: (
+        [Activity.id, Activity.type, Activity.title, Activity.description, Activity.data,
+         Activity.image_url, Activity.timestamp, Activity.created_at],
+        Activity.pet_id,
+        Activity.timestamp,
+    ),
+    ExportDataset.HEALTH_SCANS: (
+        [HealthScan.id, HealthScan.scan_type, HealthScan.status, HealthScan.score, HealthScan.findings,
+         HealthScan.notes, HealthScan.image_url, HealthScan.scanned_at],
+        HealthScan.pet_id,
+        HealthScan.scanned_at,
+    ),
+    ExportDataset.HEALTH_SCORES: (
+        [HealthScore.id, HealthScore.overall_score, HealthScore.eye_score, HealthScore.ear_score,
+         HealthScore.nose_score, HealthScore.dental_score, HealthScore.skin_coat_score,
+         HealthScore.neck_throat_score, HealthScore.body_score, HealthScore.legs_joints_score,
+         HealthScore.paws_nails_score, HealthScore.last_updated],
+        HealthScore.pet_id,
+        HealthScore.last_updated,
+    ),
+}
+
+
+def _export_value(value):
+    """Flatten a column value into a CSV/Parquet friendly scalar"""
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def iter_batches(pet_id: uuid.UUID, dataset: ExportDataset) -> Iterator[list]:
+    """Yield lists of rows for a pet's dataset using a server-side cursor
+
+    Opens its own session: the response is streamed after the request's
+    session dependency has already been closed.
+    """
+    columns, pet_column, order_column = DATASET_COLUMNS[dataset]
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(*columns).where(pet_column == pet_id).order_by(order_column),
+            execution_options={"stream_results": True, "yield_per": EXPORT_BATCH_SIZE}
+        )
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def column_names(dataset: ExportDataset) -> list:
+    return [column.key for column in DATASET_COLUMNS[dataset][0]]
+
+
+def stream_csv(pet_id: uuid.UUID, dataset: ExportDataset) -> Iterator[bytes]:
+    """Encode a pet's dataset as CSV, one chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column_names(dataset))
+
+    for batch in iter_batches(pet_id, dataset):
+        writer.writerows(
+            [_export_value(value) for value in row] for row in batch
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting bytes until they are drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(dataset: ExportDataset):
+    import pyarrow as pa
+
+    arrow_types = {
+        "Integer": pa.int64(),
+        "Float": pa.float64(),
+        "DateTime": pa.timestamp("us"),
+        "Boolean": pa.bool_(),
+    }
+    return pa.schema([
+        (column.key, arrow_types.get(type(column.type).__name__, pa.string()))
+        for column in DATASET_COLUMNS[dataset][0]
+    ])
+
+
+def stream_parquet(pet_id: uuid.UUID, dataset: ExportDataset) -> Iterator[bytes]:
+    """Encode a pet's dataset as Parquet, one row group per batch"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(dataset)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in iter_batches(pet_id, dataset):
+            columns = [
+                [_export_value(value) for value in values]
+                for values in zip(*batch)
+            ]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+
+    # Footer (and the schema-only file when there are no rows)
+    yield sink.drain()
+
+
+def stream_export(pet_id: uuid.UUID, dataset: ExportDataset, export_format: ExportFormat) -> Iterator[bytes]:
+    if export_format == ExportFormat.PARQUET:
+        return stream_parquet(pet_id, dataset)
+    return stream_csv(pet_id, dataset)
+
+
+def export_filename(pet_id: uuid.UUID, dataset: ExportDataset, export_format: ExportFormat) -> str:
+    timestamp = datetime.utcnow().strftime("%Y%m%d")
+    return f"pet-{pet_id}-{dataset.value}-{timestamp}.{export_format.value}"
@@ -0,0 +1,99 @@
+"""
+Geographic helpers for distance calculations
+"""
+from math import radians, degrees, cos, sin, asin, sqrt
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    """
+    Calculate the great circle distance between two points
+    on the earth (specified in decimal degrees)
+    Returns distance in kilometers
+    """
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * asin(min(1.0, sqrt(a)))
+    km = EARTH_RADIUS_KM * c
+    return km
+
+
+def bounding_box(latitude: float, longitude: float, radius: float) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """
+    Latitude range and longitude ranges of the box enclosing a search circle
+
+    The longitude range is split in two when it crosses the antimeridian and
+    covers every longitude near the poles or for very large radii.
+    """
+    angular_radius = radius / EARTH_RADIUS_KM
+    lat_delta = degrees(angular_radius)
+    min_lat = latitude - lat_delta
+    max_lat = latitude + lat_delta
+
+    if min_lat <= -90 or max_lat >= 90 or angular_radius >= radians(90):
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    lon_delta = degrees(asin(min(1.0, sin(angular_radius) / cos(radians(latitude)))))
+    min_lon = longitude - lon_delta
+    max_lon = longitude + lon_delta
+
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def haversine_many(lon: float, lat: float, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+    """
+    Vectorized great circle distance in kilometers from one point to arrays
+    of points, matching haversine() element-wise
+    """
+    lat_rad = radians(lat)
+    lats_rad = np.radians(lats)
+    dlat = lats_rad - lat_rad
+    dlon = np.radians(lons) - radians(lon)
+
+    a = np.sin(dlat * 0.5) ** 2 + cos(lat_rad) * np.cos(lats_rad) * np.sin(dlon * 0.5) ** 2
+    return (2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def path_length_km(lons: np.ndarray, lats: np.ndarray) -> float:
+    """Total great circle length in kilometers of a path through consecutive points"""
+    if len(lats) < 2:
+        return 0.0
+
+    lats_rad = np.radians(lats)
+    dlat = np.diff(lats_rad)
+    dlon = np.diff(np.radians(lons))
+
+    a = np.sin(dlat * 0.5) ** 2 + np.cos(lats_rad[:-1]) * np.cos(lats_rad[1:]) * np.sin(dlon * 0.5) ** 2
+    return float((2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(np.minimum(a, 1.0))).sum())
+
+
+def route_length_km(route) -> Optional[float]:
+    """
+    Length in kilometers of a recorded route given as [[lat, lon], ...] or
+    [{"latitude": ..., "longitude": ...}, ...]; None if the route is malformed
+    """
+    if not isinstance(route, list):
+        return None
+
+    try:
+        points = np.array([
+            (point["latitude"], point["longitude"]) if isinstance(point, dict) else point
+            for point in route
+        ], dtype=np.float64)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if points.ndim != 2 or points.shape[1] != 2 or not np.isfinite(points).all():
+        return None
+    return path_length_km(points[:, 1], points[:, 0])
@@ -0,0 +1,209 @@
+"""
+Opening hours normalization
+
+Free-form hours JSON such as {"mon-fri": "8:00-18:00", "sat": "9:00-14:00",
+"sun": "closed"} or {"all": "24/7"} is parsed at write time into a flat,
+sorted list of minute-of-week boundaries [open, close, open, close, ...]
+with Monday 00:00 as minute 0. A clinic is open at minute m when an odd
+number of boundaries are <= m, which is one binary search.
+"""
+import re
+from bisect import bisect_right
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.config import settings
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+_DAY_NAMES = {
+    **{day: index for index, day in enumerate(DAYS)},
+    **{name: index for index, name in enumerate(
+        ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+    )},
+    "tues": 1, "wed": 2, "thur": 3, "thurs": 3,
+}
+_ALL_DAYS_KEYS = {"all", "daily", "everyday", "every day", "mon-sun"}
+_WEEKDAYS_KEYS = {"weekdays"}
+_WEEKEND_KEYS = {"weekend", "weekends"}
+
+_ALWAYS_OPEN = {"24/7", "24h", "24 hours", "open 24 hours"}
+_CLOSED = {"closed", "close", "none", ""}
+
+_TIME = r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?"
+_RANGE = re.compile(rf"^{_TIME}\s*(?:-|–|to)\s*{_TIME}$")
+
+
+def _parse_days(key: str) -> Optional[List[int]]:
+    """Day indexes for keys like "mon", "mon-fri", "sat,sun" or "all" """
+    key = " ".join(key.lower().split())
+    if key in _ALL_DAYS_KEYS:
+        return list(range(7))
+    if key in _WEEKDAYS_KEYS:
+        return list(range(5))
+    if key in _WEEKEND_KEYS:
+        return [5, 6]
+
+    days = []
+    for part in key.replace("&", ",").split(","):
+        part = part.strip()
+        if "-" in part:
+            start, _, end = (name.strip() for name in part.partition("-"))
+            if start not in _DAY_NAMES or end not in _DAY_NAMES:
+                return None
+            first, last = _DAY_NAMES[start], _DAY_NAMES[end]
+            days.extend((first + offset) % 7 for offset in range((last - first) % 7 + 1))
+        elif part in _DAY_NAMES:
+            days.append(_DAY_NAMES[part])
+        else:
+            return None
+    return days
+
+
+def _minute_of_day(hour: str, minute: Optional[str], meridiem: Optional[str]) -> Optional[int]:
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    if minute >= 60 or hour > 24 or (hour == 24 and minute):
+        return None
+    return hour * 60 + minute
+
+
+def _parse_ranges(value) -> Optional[List[Tuple[int, int]]]:
+    """Open ranges within a day as (start, end) minutes; end may pass midnight"""
+    if isinstance(value, list):
+        ranges = []
+        for item in value:
+            parsed = _parse_ranges(item)
+            if parsed is None:
+                return None
+            ranges.extend(parsed)
+        return ranges
+
+    if not isinstance(value, str):
+        return None
+
+    text = " ".join(value.lower().split())
+    if text in _CLOSED:
+        return []
+    if text in _ALWAYS_OPEN:
+        return [(0, MINUTES_PER_DAY)]
+
+    ranges = []
+    for part in re.split(r"\s*[,;]\s*", text):
+        match = _RANGE.match(part)
+        if not match:
+            return None
+        start = _minute_of_day(*match.group(1, 2, 3))
+        end = _minute_of_day(*match.group(4, 5, 6))
+        if start is None or end is None or start == end:
+            return None
+        # "9-5" without am/pm means 9am to 5pm
+        if end < start <= 12 * 60 and not match.group(3) and not match.group(6):
+            end += 12 * 60
+        # Closing before the opening time means the range runs past midnight
+        if end < start:
+            end += MINUTES_PER_DAY
+        ranges.append((start, end))
+    return ranges
+
+
+def _merge(intervals: List[Tuple[int, int]]) -> List[int]:
+    """Flatten intervals into sorted, non-overlapping boundaries"""
+    boundaries: List[int] = []
+    for start, end in sorted(intervals):
+        if boundaries and start <= boundaries[-1]:
+            boundaries[-1] = max(boundaries[-1], end)
+        else:
+            boundaries.extend((start, end))
+    return boundaries
+
+
+def parse_hours(hours: Optional[Dict]) -> Optional[List[int]]:
+    """
+    Minute-of-week boundaries for an hours mapping, or None when the hours
+    are missing or cannot be understood (such clinics never match open filters)
+    """
+    if not isinstance(hours, dict) or not hours:
+        return None
+
+    # Broader keys first so single days can override a range ("mon-fri" then "wed")
+    entries = []
+    for key, value in hours.items():
+        days = _parse_days(str(key))
+        ranges = _parse_ranges(value)
+        if days is None or ranges is None:
+            return None
+        entries.append((days, ranges))
+    entries.sort(key=lambda entry: -len(entry[0]))
+
+    week: Dict[int, List[Tuple[int, int]]] = {}
+    for days, ranges in entries:
+        for day in days:
+            week[day] = ranges
+
+    intervals = []
+    for day, ranges in week.items():
+        offset = day * MINUTES_PER_DAY
+        for start, end in ranges:
+            start, end = offset + start, offset + end
+            # Sunday ranges running past midnight continue on Monday
+            if end > MINUTES_PER_WEEK:
+                intervals.append((0, end - MINUTES_PER_WEEK))
+                end = MINUTES_PER_WEEK
+            intervals.append((start, end))
+
+    return _merge(intervals)
+
+
+def is_open(boundaries: List[int], minute: int) -> bool:
+    """Whether a minute of the week falls inside the opening intervals"""
+    return bisect_right(boundaries, minute) % 2 == 1
+
+
+@lru_cache(maxsize=None)
+def zone(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+def valid_timezone(name: str) -> bool:
+    try:
+        zone(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def minute_of_week(moment: datetime, timezone: str) -> int:
+    """
+    Local minute of the week at a clinic; naive datetimes are taken as the
+    clinic's own wall-clock time
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(zone(timezone))
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def open_checker(moment: datetime) -> Callable[[Optional[List[int]], Optional[str]], bool]:
+    """
+    Predicate telling whether a clinic's boundaries include a moment, converting
+    the moment once per timezone; clinics without a timezone use DEFAULT_VET_TIMEZONE
+    """
+    minutes: Dict[str, int] = {}
+
+    def check(boundaries: Optional[List[int]], timezone: Optional[str]) -> bool:
+        if boundaries is None:
+            return False
+        timezone = timezone or settings.DEFAULT_VET_TIMEZONE
+        minute = minutes.get(timezone)
+        if minute is None:
+            minute = minutes[timezone] = minute_of_week(moment, timezone)
+        return is_open(boundaries, minute)
+
+    return check
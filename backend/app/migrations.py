@@ -0,0 +1,137 @@
+"""
+Idempotent schema changes applied at startup
+
+init_db() only creates missing tables, so indexes and data fixes for tables
+that already exist are applied here. Every step must be safe to rerun.
+"""
+from sqlalchemy import select, text, update
+
+from app.hours import parse_hours
+from app.models import Veterinarian, CHAT_SEARCH_VECTOR_SQL, VET_IMPORT_KEY_SQL, VET_SEARCH_VECTOR_SQL
+from app.partitions import maintain_partitions
+from app.specialties import normalize_specialties
+
+# Extensions needed by indexes declared on the models, created before create_all
+EXTENSIONS = ["pg_trgm", "btree_gin"]
+
+SCHEMA_STATEMENTS = [
+    # Specialty containment (@>) and overlap (&&) filters
+    "CREATE INDEX IF NOT EXISTS ix_veterinarians_specialty ON veterinarians USING gin (specialty)",
+    # Normalized opening hours
+    "ALTER TABLE veterinarians ADD COLUMN IF NOT EXISTS hours_intervals integer[]",
+    "ALTER TABLE veterinarians ADD COLUMN IF NOT EXISTS timezone varchar",
+    # Text search over names, city and description
+    "ALTER TABLE veterinarians ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({VET_SEARCH_VECTOR_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_veterinarians_search_vector ON veterinarians USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_veterinarians_clinic_name_trgm ON veterinarians USING gin (clinic_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_veterinarians_name_trgm ON veterinarians USING gin (name gin_trgm_ops)",
+    # Bulk import upsert key; its unique index is created by create_vet_import_key_index
+    "ALTER TABLE veterinarians ADD COLUMN IF NOT EXISTS import_key varchar "
+    f"GENERATED ALWAYS AS ({VET_IMPORT_KEY_SQL}) STORED",
+    # Edits to scans and activities change the dashboard ETag; existing rows count as written now
+    "ALTER TABLE health_scans ADD COLUMN IF NOT EXISTS updated_at timestamp DEFAULT (now() AT TIME ZONE 'utc')",
+    "ALTER TABLE activities ADD COLUMN IF NOT EXISTS updated_at timestamp DEFAULT (now() AT TIME ZONE 'utc')",
+    # Incremental chat sync and unread counts
+    "ALTER TABLE chat_messages ADD COLUMN IF NOT EXISTS read_at timestamp",
+    "CREATE INDEX IF NOT EXISTS ix_chat_messages_user_vet_created ON chat_messages (user_id, vet_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_chat_messages_user_created ON chat_messages (user_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_chat_messages_unread ON chat_messages (user_id, vet_id) "
+    "WHERE read_at IS NULL AND is_from_user = false",
+    # Chat history search
+    "ALTER TABLE chat_messages ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({CHAT_SEARCH_VECTOR_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_chat_messages_user_search ON chat_messages USING gin (user_id, search_vector)",
+]
+
+
+def normalize_stored_specialties(connection) -> int:
+    """Rewrite specialties saved before the vocabulary was normalized"""
+    rows = connection.execute(
+        select(Veterinarian.id, Veterinarian.specialty).where(Veterinarian.specialty.isnot(None))
+    ).all()
+
+    changed = [
+        {"vet_id": vet_id, "specialty": normalized}
+        for vet_id, specialty in rows
+        if (normalized := normalize_specialties(specialty)) != specialty
+    ]
+    for row in changed:
+        connection.execute(
+            update(Veterinarian).where(Veterinarian.id == row["vet_id"]).values(specialty=row["specialty"])
+        )
+    return len(changed)
+
+
+def backfill_hours_intervals(connection) -> int:
+    """Parse hours saved before they were normalized at write time"""
+    rows = connection.execute(
+        select(Veterinarian.id, Veterinarian.hours).where(
+            Veterinarian.hours.isnot(None),
+            Veterinarian.hours_intervals.is_(None)
+        )
+    ).all()
+
+    parsed = 0
+    for vet_id, hours in rows:
+        intervals = parse_hours(hours)
+        if intervals is not None:
+            connection.execute(
+                update(Veterinarian).where(Veterinarian.id == vet_id).values(hours_intervals=intervals)
+            )
+            parsed += 1
+    return parsed
+
+
+def vet_import_key_index_exists(connection) -> bool:
+    """Whether the unique index bulk import upserts rely on is in place"""
+    return connection.execute(
+        text("SELECT 1 FROM pg_indexes WHERE indexname = 'ux_veterinarians_import_key'")
+    ).first() is not None
+
+
+def create_vet_import_key_index(connection) -> int:
+    """
+    Make the bulk import key unique; returns how many keys are shared by
+    several veterinarians, which must be merged before the index can exist
+    """
+    if vet_import_key_index_exists(connection):
+        return 0
+
+    shared = connection.execute(text(
+        "SELECT count(*) FROM (SELECT import_key FROM veterinarians GROUP BY import_key HAVING count(*) > 1) AS shared"
+    )).scalar()
+    if not shared:
+        connection.execute(text("CREATE UNIQUE INDEX ux_veterinarians_import_key ON veterinarians (import_key)"))
+    return shared
+
+
+def create_extensions(engine):
+    with engine.begin() as connection:
+        for extension in EXTENSIONS:
+            connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+
+
+def run_migrations(engine):
+    with engine.begin() as connection:
+        for statement in SCHEMA_STATEMENTS:
+            connection.execute(text(statement))
+
+        normalized = normalize_stored_specialties(connection)
+        if normalized:
+            print(f"✅ Normalized specialties for {normalized} veterinarians")
+
+        parsed = backfill_hours_intervals(connection)
+        if parsed:
+            print(f"✅ Parsed opening hours for {parsed} veterinarians")
+
+        shared = create_vet_import_key_index(connection)
+        if shared:
+            print(f"⚠️  {shared} clinic name and address pairs belong to several veterinarians; "
+                  "merge them before running bulk imports")
+
+        created, unconverted = maintain_partitions(connection)
+        if created:
+            print(f"✅ Created {created} table partitions")
+        for table in unconverted:
+            print(f"⚠️  {table} is not partitioned yet; run python manage_partitions.py convert {table}")
@@ -1,11 +1,12 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Enum, JSON, Text
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy import Column, Computed, String, Integer, Float, Boolean, Date, DateTime, ForeignKey, Enum, JSON, Text, Index, text
+from sqlalchemy.orm import deferred, relationship, validates
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, TSVECTOR
 from datetime import datetime
 import uuid
 import enum
 
 from app.database import Base
+from app.hours import parse_hours
 
 
 class ScanType(str, enum.Enum):
@@ -96,6 +97,7 @@ class Pet(Base):
     activities = relationship("Activity", back_populates="pet", cascade="all, delete-orphan")
     documents = relationship("Document", back_populates="pet", cascade="all, delete-orphan")
     health_score = relationship("HealthScore", back_populates="pet", uselist=False, cascade="all, delete-orphan")
+    activity_baselines = relationship("ActivityBaseline", back_populates="pet", cascade="all, delete-orphan")
 
 
 class HealthScore(Base):
@@ -131,6 +133,7 @@ class HealthScan(Base):
     findings = Column(JSON, nullable=True)
     notes = Column(Text, nullable=True)
     scanned_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     pet = relationship("Pet", back_populates="health_scans")
@@ -148,13 +151,59 @@ class Activity(Base):
     image_url = Column(String, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     pet = relationship("Pet", back_populates="activities")
 
 
+class ActivityBaseline(Base):
+    """Rolling daily-frequency statistics per pet and activity type"""
+    __tablename__ = "activity_baselines"
+
+    pet_id = Column(UUID(as_uuid=True), ForeignKey("pets.id", ondelete="CASCADE"), primary_key=True)
+    type = Column(Enum(ActivityType), primary_key=True)
+    current_day = Column(Date, nullable=False)
+    current_count = Column(Integer, default=0, nullable=False)
+    mean = Column(Float, default=0.0, nullable=False)
+    variance = Column(Float, default=0.0, nullable=False)
+    days_observed = Column(Integer, default=0, nullable=False)
+    last_activity_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    pet = relationship("Pet", back_populates="activity_baselines")
+
+
+# Weighted document for veterinarian text search: names rank above city,
+# city above description
+VET_SEARCH_CONFIG = "english"
+VET_SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{VET_SEARCH_CONFIG}', coalesce(clinic_name, '')), 'A') || "
+    f"setweight(to_tsvector('{VET_SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{VET_SEARCH_CONFIG}', coalesce(city, '')), 'B') || "
+    f"setweight(to_tsvector('{VET_SEARCH_CONFIG}', coalesce(description, '')), 'C')"
+)
+
+
+# Case- and whitespace-insensitive clinic name and address, the key bulk
+# imports upsert on; vet_import.dedupe_key is the Python equivalent
+VET_IMPORT_KEY_SQL = (
+    r"lower(regexp_replace(btrim(clinic_name), '\s+', ' ', 'g')) || chr(10) || "
+    r"lower(regexp_replace(btrim(address), '\s+', ' ', 'g'))"
+)
+
+
 class Veterinarian(Base):
     __tablename__ = "veterinarians"
+    __table_args__ = (
+        Index("ux_veterinarians_import_key", "import_key", unique=True),
+        Index("ix_veterinarians_specialty", "specialty", postgresql_using="gin"),
+        Index("ix_veterinarians_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_veterinarians_clinic_name_trgm", "clinic_name",
+              postgresql_using="gin", postgresql_ops={"clinic_name": "gin_trgm_ops"}),
+        Index("ix_veterinarians_name_trgm", "name",
+              postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
@@ -170,6 +219,8 @@ class Veterinarian(Base):
     email = Column(String, nullable=True)
     website = Column(String, nullable=True)
     hours = Column(JSON, nullable=True)
+    hours_intervals = Column(ARRAY(Integer), nullable=True)  # Minute-of-week open/close boundaries parsed from hours
+    timezone = Column(String, nullable=True)
     rating = Column(Float, nullable=True)
     review_count = Column(Integer, default=0)
     image_url = Column(String, nullable=True)
@@ -177,13 +228,40 @@ class Veterinarian(Base):
     accepts_emergencies = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    search_vector = deferred(Column(TSVECTOR, Computed(VET_SEARCH_VECTOR_SQL, persisted=True)))
+    import_key = deferred(Column(String, Computed(VET_IMPORT_KEY_SQL, persisted=True)))
 
     # Relationships
     chat_messages = relationship("ChatMessage", back_populates="veterinarian")
 
+    @validates("hours")
+    def _normalize_hours(self, key, hours):
+        # Keep the parsed intervals in step with every write of hours
+        self.hours_intervals = parse_hours(hours)
+        return hours
+
+
+# Document for searching a user's chat history
+CHAT_SEARCH_CONFIG = "english"
+CHAT_SEARCH_VECTOR_SQL = f"to_tsvector('{CHAT_SEARCH_CONFIG}', message)"
+
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Cursor reads and the latest message per conversation
+        Index("ix_chat_messages_user_vet_created", "user_id", "vet_id", "created_at", "id"),
+        Index("ix_chat_messages_user_created", "user_id", "created_at", "id"),
+        # Unread counts only look at vet replies not yet read
+        Index(
+            "ix_chat_messages_unread", "user_id", "vet_id",
+            postgresql_where=text("read_at IS NULL AND is_from_user = false")
+        ),
+        # Search within one user's messages (user_id needs btree_gin)
+        Index("ix_chat_messages_user_search", "user_id", "search_vector", postgresql_using="gin"),
+        # Monthly partitions, see app/partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -191,7 +269,10 @@ class ChatMessage(Base):
     message = Column(Text, nullable=False)
     is_from_user = Column(Boolean, default=True)
     attachment_url = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Part of the primary key because it is the partition key
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow, index=True)
+    read_at = Column(DateTime, nullable=True)
+    search_vector = deferred(Column(TSVECTOR, Computed(CHAT_SEARCH_VECTOR_SQL, persisted=True)))
 
     # Relationships
     user = relationship("User", back_populates="chat_messages")
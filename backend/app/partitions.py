@@ -0,0 +1,307 @@
+"""
+Monthly range partitioning for append-mostly tables
+
+A partitioned table has one partition per calendar month named
+<table>_YYYY_MM plus a <table>_default partition catching anything outside
+them. Partitions are created PARTITION_MONTHS_AHEAD months in advance at
+startup and daily afterwards for every table in PARTITIONED_TABLES and every
+other table found range partitioned in the database (e.g. one converted with
+manage_partitions.py). Rows that landed in the default partition for a month
+are moved into that month's partition when it is created. Old months can be
+detached, exported to gzipped CSV and dropped with manage_partitions.py.
+
+Any table can be converted in place as long as nothing references it by
+foreign key; its primary key becomes (id, <partition column>), so the model
+should declare the same composite key and postgresql_partition_by.
+"""
+import asyncio
+import gzip
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class PartitionedTable:
+    name: str
+    column: str
+
+
+# Tables kept partitioned by month
+PARTITIONED_TABLES = [
+    PartitionedTable("chat_messages", "created_at"),
+]
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(connection, table: str) -> bool:
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND c.relnamespace = 'public'::regnamespace)"
+    ), {"table": table}).scalar()
+
+
+def range_partitioned_tables(connection) -> List[PartitionedTable]:
+    """Tables in the database range partitioned on a single column"""
+    rows = connection.execute(text(
+        "SELECT c.relname, a.attname FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0] "
+        "WHERE c.relnamespace = 'public'::regnamespace AND p.partstrat = 'r' AND p.partnatts = 1 "
+        "ORDER BY c.relname"
+    )).all()
+    return [PartitionedTable(name, column) for name, column in rows]
+
+
+def monthly_partitions(connection, table: str) -> List[date]:
+    """Months that currently have an attached partition, oldest first"""
+    names = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :table AND parent.relnamespace = 'public'::regnamespace"
+    ), {"table": table}).scalars()
+
+    pattern = re.compile(rf"^{re.escape(table)}_(\d{{4}})_(\d{{2}})$")
+    months = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def insertable_columns(connection, table: str) -> str:
+    """Quoted column list without generated columns, which are recomputed rather than copied"""
+    return ", ".join(f'"{name}"' for name in connection.execute(text(
+        "SELECT attname FROM pg_attribute WHERE attrelid = CAST(:table AS regclass) "
+        "AND attnum > 0 AND NOT attisdropped AND attgenerated = '' ORDER BY attnum"
+    ), {"table": table}).scalars())
+
+
+def create_partition(connection, table: str, column: str, month: date) -> str:
+    """
+    Create a month's partition. Rows for that month already in the default
+    partition would make the attach fail, so they are moved out first and
+    inserted again through the parent once the partition exists
+    """
+    name = partition_name(table, month)
+    default = f"{table}_default"
+    bounds = {"start": month, "end": add_months(month, 1)}
+    in_month = f'"{column}" >= :start AND "{column}" < :end'
+
+    has_default = connection.execute(text("SELECT to_regclass(:default) IS NOT NULL"), {"default": default}).scalar()
+    stranded = has_default and connection.execute(text(
+        f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {in_month})'
+    ), bounds).scalar()
+
+    columns = None
+    if stranded:
+        columns = insertable_columns(connection, table)
+        connection.execute(text(
+            f'CREATE TEMPORARY TABLE "_stranded_{name}" AS SELECT {columns} FROM "{default}" WITH NO DATA'
+        ))
+        connection.execute(text(
+            f'WITH moved AS (DELETE FROM "{default}" WHERE {in_month} RETURNING {columns}) '
+            f'INSERT INTO "_stranded_{name}" SELECT * FROM moved'
+        ), bounds)
+
+    connection.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+
+    if stranded:
+        moved = connection.execute(text(
+            f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "_stranded_{name}"'
+        )).rowcount
+        connection.execute(text(f'DROP TABLE "_stranded_{name}"'))
+        print(f"✅ Moved {moved} rows from {default} into {name}")
+    return name
+
+
+def create_default_partition(connection, table: str):
+    connection.execute(text(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'))
+
+
+def ensure_partitions(
+    connection,
+    table: str,
+    column: str,
+    months_ahead: int,
+    start: Optional[date] = None
+) -> int:
+    """Create missing partitions from start (default: this month) through months_ahead months on"""
+    existing = set(monthly_partitions(connection, table))
+    month = start or month_start(datetime.utcnow())
+    last = add_months(month_start(datetime.utcnow()), months_ahead)
+
+    create_default_partition(connection, table)
+    created = 0
+    while month <= last:
+        if month not in existing:
+            create_partition(connection, table, column, month)
+            created += 1
+        month = add_months(month, 1)
+    return created
+
+
+def maintain_partitions(connection) -> Tuple[int, List[str]]:
+    """
+    Create upcoming partitions for every partitioned table, listed or found
+    in the database; returns how many were created and which listed tables
+    still need converting
+    """
+    found = range_partitioned_tables(connection)
+    found_names = {partitioned.name for partitioned in found}
+    unconverted = [
+        partitioned.name for partitioned in PARTITIONED_TABLES if partitioned.name not in found_names
+    ]
+
+    created = 0
+    for partitioned in found:
+        created += ensure_partitions(
+            connection, partitioned.name, partitioned.column, settings.PARTITION_MONTHS_AHEAD
+        )
+    return created, unconverted
+
+
+def _maintain(engine) -> int:
+    with engine.begin() as connection:
+        return maintain_partitions(connection)[0]
+
+
+def convert_to_partitioned(connection, table: str, column: str, months_ahead: int, keep_original: bool = False) -> int:
+    """
+    Replace a plain table with a monthly partitioned copy of it, keeping its
+    columns, defaults, indexes and outgoing foreign keys. Runs in the caller's
+    transaction; returns the number of rows copied
+    """
+    if is_partitioned(connection, table):
+        raise ValueError(f"{table} is already partitioned")
+
+    referenced_by = connection.execute(text(
+        "SELECT conname FROM pg_constraint WHERE contype = 'f' AND confrelid = CAST(:table AS regclass)"
+    ), {"table": table}).scalars().all()
+    if referenced_by:
+        raise ValueError(f"{table} is referenced by foreign keys {', '.join(referenced_by)}")
+
+    original = f"{table}_unpartitioned"
+    indexes = connection.execute(text(
+        "SELECT i.relname, pg_get_indexdef(i.oid), x.indisprimary FROM pg_index x "
+        "JOIN pg_class i ON i.oid = x.indexrelid WHERE x.indrelid = CAST(:table AS regclass)"
+    ), {"table": table}).all()
+    foreign_keys = connection.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE contype = 'f' AND conrelid = CAST(:table AS regclass)"
+    ), {"table": table}).all()
+
+    # Move the original and its index names out of the way
+    connection.execute(text(f'ALTER TABLE "{table}" RENAME TO "{original}"'))
+    for index_name, _, _ in indexes:
+        connection.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_unpartitioned"'))
+    connection.execute(text(
+        f'UPDATE "{original}" SET "{column}" = now() AT TIME ZONE \'utc\' WHERE "{column}" IS NULL'
+    ))
+
+    connection.execute(text(
+        f'CREATE TABLE "{table}" (LIKE "{original}" INCLUDING DEFAULTS INCLUDING GENERATED '
+        f'INCLUDING IDENTITY INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE ("{column}")'
+    ))
+    connection.execute(text(f'ALTER TABLE "{table}" ALTER COLUMN "{column}" SET NOT NULL'))
+    connection.execute(text(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id, "{column}")'))
+    for name, definition in foreign_keys:
+        connection.execute(text(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}'))
+
+    # Partitions for every month with data, so the default partition stays empty
+    oldest = connection.execute(text(f'SELECT min("{column}") FROM "{original}"')).scalar()
+    ensure_partitions(connection, table, column, months_ahead, start=month_start(oldest) if oldest else None)
+
+    columns = insertable_columns(connection, original)
+    copied = connection.execute(text(
+        f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{original}"'
+    )).rowcount
+
+    # Secondary indexes are built after the copy, once per partition
+    for index_name, definition, primary in indexes:
+        if primary:
+            continue
+        if " UNIQUE " in definition and column not in definition:
+            print(f"⚠️  Skipping unique index {index_name}: it does not include {column}")
+            continue
+        connection.execute(text(definition))
+    if not keep_original:
+        connection.execute(text(f'DROP TABLE "{original}"'))
+    return copied
+
+
+def archive_partitions(
+    engine,
+    table: str,
+    older_than_months: int,
+    output_dir: str,
+    drop: bool = True,
+    dry_run: bool = False
+) -> List[str]:
+    """
+    Detach monthly partitions that ended more than older_than_months ago,
+    export each to <output_dir>/<partition>.csv.gz and drop it
+    """
+    cutoff = add_months(month_start(datetime.utcnow()), -older_than_months)
+    with engine.connect() as connection:
+        months = [month for month in monthly_partitions(connection, table) if add_months(month, 1) <= cutoff]
+
+    archived = []
+    for month in months:
+        name = partition_name(table, month)
+        if dry_run:
+            archived.append(name)
+            continue
+
+        with engine.begin() as connection:
+            connection.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{name}.csv.gz")
+        raw = engine.raw_connection()
+        try:
+            with gzip.open(path, "wt", newline="") as output, raw.cursor() as cursor:
+                cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', output)
+        finally:
+            raw.close()
+
+        if drop:
+            with engine.begin() as connection:
+                connection.execute(text(f'DROP TABLE "{name}"'))
+        archived.append(path)
+    return archived
+
+
+async def run_partition_maintainer(engine):
+    """Create upcoming partitions once a day"""
+    while True:
+        await asyncio.sleep(24 * 60 * 60)
+        try:
+            created = await asyncio.to_thread(_maintain, engine)
+            if created:
+                print(f"✅ Created {created} table partitions")
+        except Exception as e:
+            print(f"❌ Partition maintenance failed: {e}")
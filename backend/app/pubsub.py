@@ -0,0 +1,153 @@
+"""
+Cross-worker notifications over PostgreSQL LISTEN/NOTIFY
+
+Each uvicorn worker runs one listener thread holding a dedicated connection.
+Handlers are called on that thread, so they must be quick and thread-safe.
+Notifications sent while the listener is disconnected are lost, so connect
+callbacks run each time it (re)connects to let subscribers resynchronise.
+"""
+import select
+import threading
+import uuid
+from typing import Callable, Dict, List
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.database import engine
+
+
+class PgNotifier:
+    def __init__(self, database_url: str):
+        url = make_url(database_url)
+        self._dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._handlers: Dict[str, List[Callable[[str], None]]] = {}
+        self._connect_callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._thread: threading.Thread = None
+        self._stop = threading.Event()
+        self._connection = None
+        # Identifies this worker so handlers can skip their own notifications
+        self.origin = uuid.uuid4().hex
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]):
+        """Register a handler for notifications on a channel"""
+        with self._lock:
+            self._handlers.setdefault(channel, []).append(handler)
+            connection = self._connection
+
+        # Listen immediately if the listener is already connected
+        if connection is not None:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{channel}"')
+            except psycopg2.Error as e:
+                print(f"⚠️  Could not LISTEN on {channel}: {e}")
+
+    def on_connect(self, callback: Callable[[], None]):
+        """Register a callback run on the listener thread after every (re)connect"""
+        with self._lock:
+            self._connect_callbacks.append(callback)
+
+    def publish(self, channel: str, payload: str):
+        """Send a notification to every worker listening on the channel"""
+        if not settings.PUBSUB_ENABLED:
+            return
+
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": channel, "payload": payload}
+                )
+        except Exception as e:
+            print(f"⚠️  Could not publish to {channel}: {e}")
+
+    def publish_many(self, channel: str, payloads: List[str]):
+        """Send several notifications on a channel in one statement"""
+        if not settings.PUBSUB_ENABLED or not payloads:
+            return
+
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+                    {"channel": channel, "payloads": payloads}
+                )
+        except Exception as e:
+            print(f"⚠️  Could not publish to {channel}: {e}")
+
+    def start(self):
+        """Start the listener thread"""
+        if not settings.PUBSUB_ENABLED or self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pg-notifier", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the listener thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _dispatch(self, channel: str, payload: str):
+        with self._lock:
+            handlers = list(self._handlers.get(channel, []))
+
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception as e:
+                print(f"❌ Notification handler error on {channel}: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(self._dsn)
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+
+                with self._lock:
+                    channels = list(self._handlers)
+                    self._connection = connection
+
+                with connection.cursor() as cursor:
+                    for channel in channels:
+                        cursor.execute(f'LISTEN "{channel}"')
+
+                with self._lock:
+                    callbacks = list(self._connect_callbacks)
+                for callback in callbacks:
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"❌ Notification listener connect callback error: {e}")
+
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        self._dispatch(notification.channel, notification.payload)
+
+            except psycopg2.Error as e:
+                print(f"⚠️  Notification listener disconnected: {e}")
+                # Back off before reconnecting
+                self._stop.wait(5)
+
+            finally:
+                with self._lock:
+                    self._connection = None
+                if connection is not None:
+                    connection.close()
+
+
+notifier = PgNotifier(settings.PUBSUB_DATABASE_URL or settings.DATABASE_URL)
@@ -8,14 +8,29 @@ from datetime import datetime
 
 from app.database import get_db
 from app.models import User, Pet, Activity, ActivityType
-from app.schemas import ActivityCreate, ActivityResponse
+from app.schemas import ActivityCreate, ActivityResponse, ActivityData, ActivityListData, SuccessResponse, MessageResponse
 from app.auth import get_current_user
+from app.cache import invalidate_pet
+from app.anomalies import record_activity, forget_activity
 from app.config import settings
+from app.geo import route_length_km
+
 
 router = APIRouter(prefix="/activities", tags=["Activities"])
 
 
-@router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
+def with_route_stats(activity_type: ActivityType, data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Add the distance covered by a walk's recorded route to its data"""
+    if activity_type != ActivityType.WALK or not data or "route" not in data:
+        return data
+
+    distance = route_length_km(data["route"])
+    if distance is None:
+        return data
+    return {**data, "distance_km": round(distance, 3)}
+
+
+@router.post("", response_model=SuccessResponse[ActivityData], status_code=status.HTTP_201_CREATED)
 async def create_activity(
     activity_data: ActivityCreate,
     current_user: User = Depends(get_current_user),
@@ -42,21 +57,23 @@ async def create_activity(
         type=activity_data.type,
         title=activity_data.title,
         description=activity_data.description,
-        data=activity_data.data,
+        data=with_route_stats(activity_data.type, activity_data.data),
         timestamp=activity_data.timestamp or datetime.utcnow()
     )
 
     db.add(activity)
+    record_activity(db, activity.pet_id, activity.type, activity.timestamp)
     db.commit()
     db.refresh(activity)
+    invalidate_pet(activity.pet_id)
 
     return {
         "success": True,
-        "data": {"activity": activity}
+        "data": {"activity": ActivityResponse.model_validate(activity)}
     }
 
 
-@router.post("/with-image", response_model=dict, status_code=status.HTTP_201_CREATED)
+@router.post("/with-image", response_model=SuccessResponse[ActivityData], status_code=status.HTTP_201_CREATED)
 async def create_activity_with_image(
     pet_id: uuid.UUID = Form(...),
     type: ActivityType = Form(...),
@@ -105,22 +122,24 @@ async def create_activity_with_image(
         type=type,
         title=title,
         description=description,
-        data=parsed_data,
+        data=with_route_stats(type, parsed_data),
         image_url=f"/uploads/activities/{filename}",
         timestamp=parsed_timestamp
     )
 
     db.add(activity)
+    record_activity(db, activity.pet_id, activity.type, activity.timestamp)
     db.commit()
     db.refresh(activity)
+    invalidate_pet(activity.pet_id)
 
     return {
         "success": True,
-        "data": {"activity": activity}
+        "data": {"activity": ActivityResponse.model_validate(activity)}
     }
 
 
-@router.get("/pet/{pet_id}", response_model=dict)
+@router.get("/pet/{pet_id}", response_model=SuccessResponse[ActivityListData])
 async def get_activities(
     pet_id: uuid.UUID,
     type: Optional[ActivityType] = None,
@@ -161,11 +180,11 @@ async def get_activities(
 
     return {
         "success": True,
-        "data": {"activities": activities}
+        "data": {"activities": [ActivityResponse.model_validate(activity) for activity in activities]}
     }
 
 
-@router.get("/{activity_id}", response_model=dict)
+@router.get("/{activity_id}", response_model=SuccessResponse[ActivityData])
 async def get_activity(
     activity_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
@@ -190,11 +209,11 @@ async def get_activity(
 
     return {
         "success": True,
-        "data": {"activity": activity}
+        "data": {"activity": ActivityResponse.model_validate(activity)}
     }
 
 
-@router.delete("/{activity_id}", response_model=dict)
+@router.delete("/{activity_id}", response_model=MessageResponse)
 async def delete_activity(
     activity_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
@@ -218,7 +237,9 @@ async def delete_activity(
         )
 
     db.delete(activity)
+    forget_activity(db, activity.pet_id, activity.type, activity.timestamp)
     db.commit()
+    invalidate_pet(pet.id)
 
     return {
         "success": True,
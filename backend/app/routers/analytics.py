@@ -1,18 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
 from typing import List, Optional
 import uuid
 from datetime import datetime, timedelta
 
 from app.database import get_db
-from app.models import User, Pet, HealthScan, Activity, HealthScore, ScanType, ActivityType
-from app.auth import get_current_user
+from app.models import User, Pet, HealthScan, Activity, HealthScore, ActivityBaseline, ScanType, ActivityType
+from app.schemas import (
+    PetResponse, HealthScoreResponse, HealthScanResponse, ActivityResponse, SuccessResponse,
+    UserDashboardData, CacheStatsData, HealthTrendData, HealthTrendsData, ActivitySummaryData,
+    ScanStatisticsData, PetStatistics, PetDashboardData, CohortComparisonData, ActivityAlertData
+)
+from app.auth import get_current_user, require_metrics_token
+from app.etag import make_etag, etag_matches, not_modified
+from app.cache import analytics_cache, cached_response
+from app.cohorts import cohort_engine
+from app.anomalies import detect_anomalies
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
-@router.get("/dashboard", response_model=dict)
+@router.get("/dashboard", response_model=SuccessResponse[UserDashboardData])
 async def get_user_dashboard(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -63,14 +72,33 @@ async def get_user_dashboard(
     }
 
 
-@router.get("/pet/{pet_id}/health-trends", response_model=dict)
+@router.get(
+    "/cache/stats",
+    response_model=SuccessResponse[CacheStatsData],
+    dependencies=[Depends(require_metrics_token)]
+)
+async def get_cache_stats():
+    """Get analytics cache statistics for this worker (operators only)"""
+    return {
+        "success": True,
+        "data": analytics_cache.stats()
+    }
+
+
+@router.get("/pet/{pet_id}/health-trends", response_model=SuccessResponse[HealthTrendsData])
 async def get_health_trends(
     pet_id: uuid.UUID,
+    request: Request,
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get health score trends for a pet"""
+    cache_key = analytics_cache.key(pet_id, "health-trends", days=days)
+    cached = analytics_cache.get(cache_key)
+    if cached:
+        return cached_response(cached, request, current_user)
+
     # Verify pet ownership
     pet = db.query(Pet).filter(Pet.id == pet_id).first()
     if not pet:
@@ -97,32 +125,31 @@ async def get_health_trends(
         HealthScan.score.isnot(None)
     ).order_by(HealthScan.scanned_at.asc()).all()
 
-    # Group by date and calculate average score per day
-    trend_data = []
-    for scan in scans:
-        trend_data.append({
-            "date": scan.scanned_at.isoformat(),
-            "score": scan.score,
-            "scan_type": scan.scan_type.value
-        })
+    trend_data = [
+        HealthTrendData(date=scan.scanned_at, score=scan.score, scan_type=scan.scan_type)
+        for scan in scans
+    ]
 
-    return {
+    return analytics_cache.store(cache_key, pet.user_id, {
         "success": True,
-        "data": {
-            "trend": trend_data,
-            "period_days": days
-        }
-    }
+        "data": HealthTrendsData(trend=trend_data, period_days=days)
+    })
 
 
-@router.get("/pet/{pet_id}/activity-summary", response_model=dict)
+@router.get("/pet/{pet_id}/activity-summary", response_model=SuccessResponse[ActivitySummaryData])
 async def get_activity_summary(
     pet_id: uuid.UUID,
+    request: Request,
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get activity summary for a pet"""
+    cache_key = analytics_cache.key(pet_id, "activity-summary", days=days)
+    cached = analytics_cache.get(cache_key)
+    if cached:
+        return cached_response(cached, request, current_user)
+
     # Verify pet ownership
     pet = db.query(Pet).filter(Pet.id == pet_id).first()
     if not pet:
@@ -159,24 +186,30 @@ async def get_activity_summary(
         Activity.pet_id == pet_id
     ).order_by(Activity.timestamp.desc()).limit(10).all()
 
-    return {
+    return analytics_cache.store(cache_key, pet.user_id, {
         "success": True,
-        "data": {
-            "activity_counts": activity_counts,
-            "total_activities": len(activities),
-            "recent_activities": recent_activities,
-            "period_days": days
-        }
-    }
+        "data": ActivitySummaryData(
+            activity_counts=activity_counts,
+            total_activities=len(activities),
+            recent_activities=[ActivityResponse.model_validate(activity) for activity in recent_activities],
+            period_days=days
+        )
+    })
 
 
-@router.get("/pet/{pet_id}/scan-statistics", response_model=dict)
+@router.get("/pet/{pet_id}/scan-statistics", response_model=SuccessResponse[ScanStatisticsData])
 async def get_scan_statistics(
     pet_id: uuid.UUID,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get scan statistics for a pet"""
+    cache_key = analytics_cache.key(pet_id, "scan-statistics")
+    cached = analytics_cache.get(cache_key)
+    if cached:
+        return cached_response(cached, request, current_user)
+
     # Verify pet ownership
     pet = db.query(Pet).filter(Pet.id == pet_id).first()
     if not pet:
@@ -213,40 +246,78 @@ async def get_scan_statistics(
     # Get current health score
     health_score = db.query(HealthScore).filter(HealthScore.pet_id == pet_id).first()
 
-    return {
+    return analytics_cache.store(cache_key, pet.user_id, {
         "success": True,
-        "data": {
-            "total_scans": len(scans),
-            "scans_by_type": scans_by_type,
-            "avg_scores_by_type": avg_scores_by_type,
-            "current_health_score": health_score
-        }
-    }
+        "data": ScanStatisticsData(
+            total_scans=len(scans),
+            scans_by_type=scans_by_type,
+            avg_scores_by_type=avg_scores_by_type,
+            current_health_score=HealthScoreResponse.model_validate(health_score) if health_score else None
+        )
+    })
 
 
-@router.get("/pet/{pet_id}/dashboard", response_model=dict)
+@router.get("/pet/{pet_id}/dashboard", response_model=SuccessResponse[PetDashboardData])
 async def get_dashboard_data(
     pet_id: uuid.UUID,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get comprehensive dashboard data for a pet"""
-    # Verify pet ownership
-    pet = db.query(Pet).filter(Pet.id == pet_id).first()
-    if not pet:
+    """Get comprehensive dashboard data for a pet
+
+    Supports conditional requests: the ETag is derived only from the pet's rows
+    (latest writes and counts), so every worker agrees on it and a client polling
+    with If-None-Match gets a 304 after a single query, or without touching the
+    database once the dashboard is cached.
+    """
+    cache_key = analytics_cache.key(pet_id, "dashboard")
+    cached = analytics_cache.get(cache_key)
+    if cached:
+        return cached_response(cached, request, current_user)
+
+    # Ownership, counts and latest write times in one round trip
+    total_scans = select(func.count(HealthScan.id)).where(
+        HealthScan.pet_id == Pet.id
+    ).scalar_subquery().label("total_scans")
+    last_scan_at = select(func.max(HealthScan.updated_at)).where(
+        HealthScan.pet_id == Pet.id
+    ).scalar_subquery().label("last_scan_at")
+    total_activities = select(func.count(Activity.id)).where(
+        Activity.pet_id == Pet.id
+    ).scalar_subquery().label("total_activities")
+    last_activity_at = select(func.max(Activity.updated_at)).where(
+        Activity.pet_id == Pet.id
+    ).scalar_subquery().label("last_activity_at")
+
+    version = db.query(
+        Pet.user_id,
+        Pet.updated_at,
+        HealthScore.last_updated,
+        total_scans,
+        last_scan_at,
+        total_activities,
+        last_activity_at
+    ).outerjoin(HealthScore, HealthScore.pet_id == Pet.id).filter(Pet.id == pet_id).first()
+
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pet not found"
         )
 
-    if pet.user_id != current_user.id:
+    if version.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have access to this pet"
         )
 
-    # Get health score
-    health_score = db.query(HealthScore).filter(HealthScore.pet_id == pet_id).first()
+    etag = make_etag("pet-dashboard", pet_id, *version[1:])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Pet and health score in a single joined query
+    pet = db.query(Pet).options(joinedload(Pet.health_score)).filter(Pet.id == pet_id).first()
 
     # Get recent scans (last 5)
     recent_scans = db.query(HealthScan).filter(
@@ -258,20 +329,87 @@ async def get_dashboard_data(
         Activity.pet_id == pet_id
     ).order_by(Activity.timestamp.desc()).limit(10).all()
 
-    # Get total counts
-    total_scans = db.query(func.count(HealthScan.id)).filter(HealthScan.pet_id == pet_id).scalar()
-    total_activities = db.query(func.count(Activity.id)).filter(Activity.pet_id == pet_id).scalar()
+    return analytics_cache.store(cache_key, version.user_id, {
+        "success": True,
+        "data": PetDashboardData(
+            pet=PetResponse.model_validate(pet),
+            health_score=HealthScoreResponse.model_validate(pet.health_score) if pet.health_score else None,
+            recent_scans=[HealthScanResponse.model_validate(scan) for scan in recent_scans],
+            recent_activities=[ActivityResponse.model_validate(activity) for activity in recent_activities],
+            statistics=PetStatistics(
+                total_scans=version.total_scans or 0,
+                total_activities=version.total_activities or 0
+            )
+        )
+    }, etag=etag)
+
+
+@router.get("/pet/{pet_id}/cohort", response_model=SuccessResponse[CohortComparisonData])
+async def get_cohort_comparison(
+    pet_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Compare a pet's health score with pets of the same breed and age band"""
+    # Verify pet ownership
+    pet = db.query(Pet).options(joinedload(Pet.health_score)).filter(Pet.id == pet_id).first()
+    if not pet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pet not found"
+        )
+
+    if pet.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have access to this pet"
+        )
+
+    if not pet.health_score or pet.health_score.overall_score is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Health score not found"
+        )
+
+    comparison = cohort_engine.compare(pet.breed, pet.age, pet.health_score.overall_score)
+    if comparison is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Cohort statistics are not available yet"
+        )
+
+    return {
+        "success": True,
+        "data": comparison
+    }
+
+
+@router.get("/pet/{pet_id}/alerts", response_model=SuccessResponse[ActivityAlertData])
+async def get_activity_alerts(
+    pet_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get alerts for activity frequency that deviates from the pet's routine"""
+    # Verify pet ownership
+    pet = db.query(Pet).filter(Pet.id == pet_id).first()
+    if not pet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pet not found"
+        )
+
+    if pet.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have access to this pet"
+        )
+
+    baselines = db.query(ActivityBaseline).filter(ActivityBaseline.pet_id == pet_id).all()
 
     return {
         "success": True,
         "data": {
-            "pet": pet,
-            "health_score": health_score,
-            "recent_scans": recent_scans,
-            "recent_activities": recent_activities,
-            "statistics": {
-                "total_scans": total_scans,
-                "total_activities": total_activities
-            }
+            "alerts": detect_anomalies(baselines, datetime.utcnow())
         }
     }
@@ -4,14 +4,17 @@ from datetime import datetime, timedelta
 
 from app.database import get_db
 from app.models import User, RefreshToken
-from app.schemas import UserCreate, UserLogin, UserResponse, TokenResponse, RefreshTokenRequest
+from app.schemas import (
+    UserCreate, UserLogin, UserResponse, RefreshTokenRequest,
+    AuthData, AccessTokenData, SuccessResponse, MessageResponse
+)
 from app.auth import hash_password, verify_password, create_access_token, create_refresh_token, verify_token
 from app.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/register", response_model=dict, status_code=status.HTTP_201_CREATED)
+@router.post("/register", response_model=SuccessResponse[AuthData], status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     # Check if user already exists
@@ -51,12 +54,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     return {
         "success": True,
         "data": {
-            "user": {
-                "id": str(new_user.id),
-                "email": new_user.email,
-                "name": new_user.name,
-                "created_at": new_user.created_at
-            },
+            "user": UserResponse.model_validate(new_user),
             "access_token": access_token,
             "refresh_token": refresh_token,
             "token_type": "bearer"
@@ -64,7 +62,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/login", response_model=dict)
+@router.post("/login", response_model=SuccessResponse[AuthData])
 async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """Login user"""
     # Find user
@@ -100,12 +98,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     return {
         "success": True,
         "data": {
-            "user": {
-                "id": str(user.id),
-                "email": user.email,
-                "name": user.name,
-                "created_at": user.created_at
-            },
+            "user": UserResponse.model_validate(user),
             "access_token": access_token,
             "refresh_token": refresh_token,
             "token_type": "bearer"
@@ -113,7 +106,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/refresh", response_model=dict)
+@router.post("/refresh", response_model=SuccessResponse[AccessTokenData])
 async def refresh_token(token_data: RefreshTokenRequest, db: Session = Depends(get_db)):
     """Refresh access token"""
     # Verify refresh token
@@ -150,7 +143,7 @@ async def refresh_token(token_data: RefreshTokenRequest, db: Session = Depends(g
     }
 
 
-@router.post("/logout", response_model=dict)
+@router.post("/logout", response_model=MessageResponse)
 async def logout(token_data: RefreshTokenRequest, db: Session = Depends(get_db)):
     """Logout user"""
     # Delete refresh token
@@ -1,44 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import func, tuple_, update
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
 import uuid
 import json
 from datetime import datetime
 
-from app.database import get_db
-from app.models import User, ChatMessage, Veterinarian
-from app.schemas import ChatMessageCreate, ChatMessageResponse
-from app.auth import get_current_user
+from app.database import get_db, SessionLocal
+from app.models import CHAT_SEARCH_CONFIG, User, ChatMessage, Veterinarian
+from app.schemas import (
+    ChatMessageCreate, ChatMessageResponse, ChatMessageData, ChatMessagePage, ConversationListData,
+    MarkReadData, ChatSearchPage, PresenceData, SuccessResponse
+)
+from app.auth import get_current_user, require_metrics_token, verify_token
+from app.config import settings
+from app.chat_hub import ClientConnection, manager, message_event
+from app.chat_writer import chat_writer
+from app.chat_presence import PresenceStatus, presence
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+# Messages returned per incremental sync page
+SYNC_MAX_LIMIT = 200
 
-# Store active WebSocket connections
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[str, WebSocket] = {}
+PRESENCE_MAX_USERS = 100
 
-    async def connect(self, websocket: WebSocket, user_id: str):
-        await websocket.accept()
-        self.active_connections[user_id] = websocket
+# Chat history search
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_QUERY_LENGTH = 200
+SEARCH_SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=8, MaxFragments=2, FragmentDelimiter=\" … \""
+# HTML special characters escaped in message text before highlighting, & first
+HTML_ESCAPES = [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")]
 
-    def disconnect(self, user_id: str):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
+# WebSocket frame types relayed without touching the database
+EPHEMERAL_TYPES = {"typing", "read_position", "presence"}
 
-    async def send_message(self, message: dict, user_id: str):
-        if user_id in self.active_connections:
-            await self.active_connections[user_id].send_json(message)
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections.values():
-            await connection.send_json(message)
+def message_cursor(message: ChatMessage) -> str:
+    """Opaque position of a message in (created_at, id) order"""
+    return f"{message.created_at.isoformat()}_{message.id}"
 
 
-manager = ConnectionManager()
+def html_escaped(column):
+    """SQL expression for a text column with HTML special characters escaped"""
+    for character, entity in HTML_ESCAPES:
+        column = func.replace(column, character, entity)
+    return column
 
 
-@router.post("/messages", response_model=dict, status_code=status.HTTP_201_CREATED)
+def parse_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        created_at, _, message_id = cursor.rpartition("_")
+        return datetime.fromisoformat(created_at), uuid.UUID(message_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def messages_since(
+    db: Session,
+    user_id: uuid.UUID,
+    since: Tuple[datetime, uuid.UUID],
+    vet_id: Optional[uuid.UUID],
+    limit: int
+) -> Tuple[List[ChatMessage], bool]:
+    """Messages after a cursor, oldest first, and whether more follow"""
+    query = db.query(ChatMessage).filter(
+        ChatMessage.user_id == user_id,
+        tuple_(ChatMessage.created_at, ChatMessage.id) > since,
+        # Plain bound the planner can prune partitions with
+        ChatMessage.created_at >= since[0]
+    )
+    if vet_id:
+        query = query.filter(ChatMessage.vet_id == vet_id)
+
+    messages = query.order_by(ChatMessage.created_at, ChatMessage.id).limit(limit + 1).all()
+    return messages[:limit], len(messages) > limit
+
+
+def sync_data(messages: List[ChatMessage], has_more: bool, since: Optional[str]) -> ChatMessagePage:
+    return ChatMessagePage(
+        messages=[ChatMessageResponse.model_validate(message) for message in messages],
+        cursor=message_cursor(messages[-1]) if messages else since,
+        has_more=has_more
+    )
+
+
+@router.post("/messages", response_model=SuccessResponse[ChatMessageData], status_code=status.HTTP_201_CREATED)
 async def create_message(
     message_data: ChatMessageCreate,
     current_user: User = Depends(get_current_user),
@@ -66,55 +118,265 @@ async def create_message(
     db.commit()
     db.refresh(message)
 
-    # Send to WebSocket if user is connected
-    await manager.send_message(
-        {
-            "type": "new_message",
-            "data": {
-                "id": str(message.id),
-                "message": message.message,
-                "is_from_user": message.is_from_user,
-                "created_at": message.created_at.isoformat()
-            }
-        },
-        str(current_user.id)
-    )
+    # Deliver to every connected device of the user, on any worker
+    await manager.send_message(message_event(message), str(current_user.id), message.id)
 
     return {
         "success": True,
-        "data": {"message": message}
+        "data": {"message": ChatMessageResponse.model_validate(message)}
     }
 
 
-@router.get("/messages", response_model=dict)
+@router.get("/messages", response_model=SuccessResponse[ChatMessagePage])
 async def get_messages(
     vet_id: Optional[uuid.UUID] = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=SYNC_MAX_LIMIT),
+    since: Optional[str] = Query(None, description="Cursor from a previous response; only newer messages are returned"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get chat messages for the current user"""
+    """
+    Get chat messages for the current user: the latest messages, newest first,
+    or with since, only the messages after that cursor, oldest first
+    """
+    if since:
+        messages, has_more = messages_since(db, current_user.id, parse_cursor(since), vet_id, limit)
+        return {
+            "success": True,
+            "data": sync_data(messages, has_more, since)
+        }
+
     query = db.query(ChatMessage).filter(ChatMessage.user_id == current_user.id)
 
     if vet_id:
         query = query.filter(ChatMessage.vet_id == vet_id)
 
-    messages = query.order_by(ChatMessage.created_at.desc()).limit(limit).all()
+    messages = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit).all()
+
+    return {
+        "success": True,
+        "data": {
+            "messages": [ChatMessageResponse.model_validate(message) for message in messages],
+            "cursor": message_cursor(messages[0]) if messages else None,
+            "has_more": False,
+        }
+    }
+
+
+@router.get("/conversations", response_model=SuccessResponse[ConversationListData])
+async def get_conversations(
+    since: Optional[str] = Query(None, description="Cursor from a previous response; only conversations with newer messages are returned"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the last message and unread count of each conversation, most recent
+    first, or with since, only of conversations that moved on since that cursor
+    """
+    latest = db.query(ChatMessage).filter(ChatMessage.user_id == current_user.id)
+    if since:
+        cursor = parse_cursor(since)
+        # The plain created_at bound lets Postgres skip older monthly partitions
+        latest = latest.filter(
+            tuple_(ChatMessage.created_at, ChatMessage.id) > cursor,
+            ChatMessage.created_at >= cursor[0]
+        )
+    latest = latest.distinct(ChatMessage.vet_id).order_by(
+        ChatMessage.vet_id, ChatMessage.created_at.desc(), ChatMessage.id.desc()
+    ).all()
+
+    unread = dict(
+        db.query(ChatMessage.vet_id, func.count()).filter(
+            ChatMessage.user_id == current_user.id,
+            ChatMessage.read_at.is_(None),
+            ChatMessage.is_from_user.is_(False)
+        ).group_by(ChatMessage.vet_id).all()
+    )
+
+    latest.sort(key=lambda message: (message.created_at, str(message.id)), reverse=True)
+    conversations = [
+        {
+            "vet_id": message.vet_id,
+            "last_message": ChatMessageResponse.model_validate(message),
+            "unread_count": unread.get(message.vet_id, 0),
+        }
+        for message in latest
+    ]
+
+    return {
+        "success": True,
+        "data": {
+            "conversations": conversations,
+            "unread_count": sum(unread.values()),
+        }
+    }
+
+
+@router.post("/conversations/read", response_model=SuccessResponse[MarkReadData])
+async def mark_conversation_read(
+    vet_id: Optional[uuid.UUID] = Query(None, description="Conversation to mark; omit for messages without a vet"),
+    until: Optional[str] = Query(None, description="Cursor of the last message read; defaults to everything"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mark vet replies in a conversation as read"""
+    conditions = [
+        ChatMessage.user_id == current_user.id,
+        ChatMessage.vet_id == vet_id if vet_id else ChatMessage.vet_id.is_(None),
+        ChatMessage.read_at.is_(None),
+        ChatMessage.is_from_user.is_(False),
+    ]
+    if until:
+        cursor = parse_cursor(until)
+        conditions.append(tuple_(ChatMessage.created_at, ChatMessage.id) <= cursor)
+        conditions.append(ChatMessage.created_at <= cursor[0])
+
+    result = db.execute(
+        update(ChatMessage).where(*conditions).values(read_at=datetime.utcnow()).execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    # Clear the unread badge on the user's other devices
+    await manager.send_message(
+        {"type": "read", "data": {"vet_id": str(vet_id) if vet_id else None, "until": until}},
+        str(current_user.id)
+    )
+
+    return {
+        "success": True,
+        "data": {"marked_read": result.rowcount}
+    }
+
+
+@router.get("/search", response_model=SuccessResponse[ChatSearchPage])
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=SEARCH_MAX_QUERY_LENGTH),
+    vet_id: Optional[uuid.UUID] = None,
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+    before: Optional[str] = Query(None, description="Cursor from a previous page of results"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search the current user's messages, newest first, with the matching words
+    wrapped in <mark> in each HTML-escaped snippet; pass the cursor back as
+    before for the next page
+    """
+    ts_query = func.websearch_to_tsquery(CHAT_SEARCH_CONFIG, q)
+    # Highlighting the escaped text leaves <mark> as the only markup in a snippet.
+    # Postgres evaluates ts_headline after the sort and limit, so only for the returned page
+    snippet = func.ts_headline(
+        CHAT_SEARCH_CONFIG, html_escaped(ChatMessage.message), ts_query, SEARCH_SNIPPET_OPTIONS
+    )
+    query = db.query(ChatMessage, snippet).filter(
+        ChatMessage.user_id == current_user.id,
+        ChatMessage.search_vector.bool_op("@@")(ts_query)
+    )
+    if vet_id:
+        query = query.filter(ChatMessage.vet_id == vet_id)
+    if before:
+        cursor = parse_cursor(before)
+        query = query.filter(
+            tuple_(ChatMessage.created_at, ChatMessage.id) < cursor,
+            ChatMessage.created_at <= cursor[0]
+        )
+
+    rows = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "success": True,
+        "data": {
+            "results": [
+                {"message": ChatMessageResponse.model_validate(message), "snippet": text}
+                for message, text in rows
+            ],
+            "cursor": message_cursor(rows[-1][0]) if rows else before,
+            "has_more": has_more,
+        }
+    }
+
+
+@router.get("/presence", response_model=SuccessResponse[PresenceData])
+async def get_presence(
+    user_id: List[uuid.UUID] = Query(..., description="Users to look up (repeat for several)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get whether the current user and the vets they have chatted with are
+    online, away or offline, from memory
+    """
+    if len(user_id) > PRESENCE_MAX_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {PRESENCE_MAX_USERS} users per request"
+        )
+
+    requested = set(user_id) - {current_user.id}
+    if requested:
+        partners = {
+            vet_id for (vet_id,) in db.query(ChatMessage.vet_id).filter(
+                ChatMessage.user_id == current_user.id,
+                ChatMessage.vet_id.in_(requested)
+            ).distinct()
+        }
+        if requested - partners:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Presence is only available for your conversation partners"
+            )
 
     return {
         "success": True,
-        "data": {"messages": messages}
+        "data": {"presence": presence.lookup([str(value) for value in user_id])}
     }
 
 
-@router.get("/messages/{message_id}", response_model=dict)
+@router.get(
+    "/stats",
+    response_model=SuccessResponse[Dict[str, Any]],
+    dependencies=[Depends(require_metrics_token)]
+)
+async def get_chat_stats():
+    """Get WebSocket connection and delivery latency statistics for this worker (operators only)"""
+    return {
+        "success": True,
+        "data": {
+            "users": len(manager.active_connections),
+            "connections": manager.connection_count(),
+            "queue_depth": manager.queue_depth(),
+            **manager.delivery.stats(),
+            "writer": chat_writer.stats(),
+            "ephemeral": {
+                "received": manager.ephemeral_received,
+                "sent": manager.ephemeral_sent,
+                "published": manager.ephemeral_published,
+                **presence.stats()
+            }
+        }
+    }
+
+
+@router.get("/messages/{message_id}", response_model=SuccessResponse[ChatMessageData])
 async def get_message(
     message_id: uuid.UUID,
+    cursor: Optional[str] = Query(None, description="The message's cursor; lets the lookup read a single partition"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific message"""
-    message = db.query(ChatMessage).filter(ChatMessage.id == message_id).first()
+    query = db.query(ChatMessage).filter(ChatMessage.id == message_id)
+    if cursor:
+        created_at, cursor_id = parse_cursor(cursor)
+        if cursor_id != message_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor does not belong to this message"
+            )
+        query = query.filter(ChatMessage.created_at == created_at)
+    message = query.first()
 
     if not message:
         raise HTTPException(
@@ -130,53 +392,147 @@ async def get_message(
 
     return {
         "success": True,
-        "data": {"message": message}
+        "data": {"message": ChatMessageResponse.model_validate(message)}
     }
 
 
+async def save_and_acknowledge(connection: ClientConnection, user_id: str, data: dict):
+    """Persist an inbound message with the next batch, then acknowledge and fan out"""
+    try:
+        message = await chat_writer.save(
+            user_id=uuid.UUID(user_id),
+            vet_id=uuid.UUID(data.get("vet_id")) if data.get("vet_id") else None,
+            message=data.get("message", ""),
+            is_from_user=data.get("is_from_user", True)
+        )
+    except Exception as e:
+        print(f"❌ Could not save chat message: {e}")
+        connection.send({
+            "type": "error",
+            "data": {"client_id": data.get("client_id"), "detail": "Message could not be saved"}
+        })
+        return
+
+    # Acknowledged only once the batch holding the message has committed
+    connection.send({
+        "type": "message_sent",
+        "data": {
+            "id": str(message.id),
+            "client_id": data.get("client_id"),
+            "message": message.message,
+            "created_at": message.created_at.isoformat()
+        }
+    })
+
+    # Show the message on the user's other devices
+    await manager.send_message(message_event(message), user_id, message.id, exclude=connection)
+
+
+def _load_missed_messages(user_id: str, since: str) -> ChatMessagePage:
+    db = SessionLocal()
+    try:
+        messages, has_more = messages_since(db, uuid.UUID(user_id), parse_cursor(since), None, SYNC_MAX_LIMIT)
+        return sync_data(messages, has_more, since)
+    finally:
+        db.close()
+
+
+async def send_missed_messages(connection: ClientConnection, user_id: str, since: str):
+    """Send one page of messages after the cursor; has_more means fetch the rest over HTTP"""
+    data = await run_in_threadpool(_load_missed_messages, user_id, since)
+    connection.send({"type": "sync", "data": data.model_dump(mode="json")})
+
+
+def websocket_subject(user_id: str, token: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Whether to accept the connection, and the verified token subject. A token,
+    when given, must be an access token for user_id; connections without one
+    are only accepted when CHAT_WS_REQUIRE_TOKEN is turned off
+    """
+    if token is None:
+        return not settings.CHAT_WS_REQUIRE_TOKEN, None
+    try:
+        subject = verify_token(token, "access").get("sub")
+    except HTTPException:
+        return False, None
+    return subject == user_id, subject
+
+
+def relay_ephemeral(connection: ClientConnection, user_id: str, data: dict):
+    """Relay typing, read position and presence frames to the user's other devices"""
+    event_type = data["type"]
+    vet_id = data.get("vet_id")
+
+    if event_type == "presence":
+        try:
+            status = PresenceStatus(data.get("status"))
+        except ValueError:
+            return
+        if status != PresenceStatus.OFFLINE:
+            manager.set_status(connection, status)
+        return
+
+    if event_type == "typing":
+        event = {"type": "typing", "data": {"vet_id": vet_id, "typing": bool(data.get("typing", True))}}
+    else:
+        event = {"type": "read_position", "data": {"vet_id": vet_id, "cursor": data.get("cursor")}}
+    manager.send_ephemeral(user_id, f"{event_type}:{vet_id}", event, exclude=connection)
+
+
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
     user_id: str,
-    db: Session = Depends(get_db)
+    since: Optional[str] = None,
+    token: Optional[str] = None
 ):
-    """WebSocket endpoint for real-time chat"""
-    await manager.connect(websocket, user_id)
+    """
+    WebSocket endpoint for real-time chat; reconnecting clients pass the last
+    cursor they saw as since and first receive only what they missed
+    """
+    accepted, subject = websocket_subject(user_id, token)
+    if not accepted:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    # Only a verified token proves the connection belongs to user_id
+    authenticated = subject is not None
+
+    # Presence is keyed on the token subject, so anonymous connections never set it
+    connection = await manager.connect(websocket, user_id, subject)
+
+    # Saves still waiting for their batch; held so they are not garbage collected
+    pending = set()
 
     try:
+        if since and not authenticated:
+            connection.send({"type": "error", "data": {"detail": "since requires an access token"}})
+        elif since:
+            try:
+                await send_missed_messages(connection, user_id, since)
+            except HTTPException as e:
+                connection.send({"type": "error", "data": {"detail": e.detail}})
+
         while True:
             # Receive message from client
-            data = await websocket.receive_json()
+            data = await connection.receive()
 
             # Handle different message types
             if data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                connection.send({"type": "pong"})
 
             elif data.get("type") == "message":
-                # Save message to database
-                message = ChatMessage(
-                    user_id=uuid.UUID(user_id),
-                    vet_id=uuid.UUID(data.get("vet_id")) if data.get("vet_id") else None,
-                    message=data.get("message", ""),
-                    is_from_user=data.get("is_from_user", True)
-                )
-
-                db.add(message)
-                db.commit()
-                db.refresh(message)
-
-                # Send confirmation back
-                await websocket.send_json({
-                    "type": "message_sent",
-                    "data": {
-                        "id": str(message.id),
-                        "message": message.message,
-                        "created_at": message.created_at.isoformat()
-                    }
-                })
+                # Keep reading frames while the message waits for its batch
+                task = asyncio.create_task(save_and_acknowledge(connection, user_id, data))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            elif data.get("type") in EPHEMERAL_TYPES:
+                # Live signals are relayed in memory and never stored
+                if connection.allow_ephemeral():
+                    relay_ephemeral(connection, user_id, data)
 
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        manager.disconnect(connection)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(user_id)
+        manager.disconnect(connection)
@@ -8,14 +8,17 @@ from datetime import datetime
 
 from app.database import get_db
 from app.models import User, Pet, HealthScan, HealthScore, ScanType, ScanStatus
-from app.schemas import HealthScanResponse, HealthScoreResponse
+from app.schemas import (
+    HealthScanResponse, HealthScoreResponse, HealthScanData, HealthScanListData, HealthScoreData, SuccessResponse
+)
 from app.auth import get_current_user
+from app.cache import invalidate_pet
 from app.config import settings
 
 router = APIRouter(prefix="/health-scans", tags=["Health Scans"])
 
 
-@router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=SuccessResponse[HealthScanData], status_code=status.HTTP_201_CREATED)
 async def create_health_scan(
     pet_id: uuid.UUID = Form(...),
     scan_type: ScanType = Form(...),
@@ -106,13 +109,15 @@ async def create_health_scan(
 
         db.commit()
 
+    invalidate_pet(pet_id)
+
     return {
         "success": True,
         "data": {"health_scan": HealthScanResponse.model_validate(health_scan)}
     }
 
 
-@router.get("/pet/{pet_id}", response_model=dict)
+@router.get("/pet/{pet_id}", response_model=SuccessResponse[HealthScanListData])
 async def get_health_scans(
     pet_id: uuid.UUID,
     scan_type: Optional[ScanType] = None,
@@ -150,7 +155,7 @@ async def get_health_scans(
     }
 
 
-@router.get("/pet/{pet_id}/score", response_model=dict)
+@router.get("/pet/{pet_id}/score", response_model=SuccessResponse[HealthScoreData])
 async def get_health_score(
     pet_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
@@ -179,6 +184,7 @@ async def get_health_score(
         db.add(health_score)
         db.commit()
         db.refresh(health_score)
+        invalidate_pet(pet_id)
 
     return {
         "success": True,
@@ -186,7 +192,7 @@ async def get_health_score(
     }
 
 
-@router.get("/{scan_id}", response_model=dict)
+@router.get("/{scan_id}", response_model=SuccessResponse[HealthScanData])
 async def get_health_scan(
     scan_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
@@ -6,14 +7,16 @@ import os
 
 from app.database import get_db
 from app.models import User, Pet, HealthScore
-from app.schemas import PetCreate, PetUpdate, PetResponse
+from app.schemas import PetCreate, PetUpdate, PetResponse, PetData, PetListData, SuccessResponse, MessageResponse
 from app.auth import get_current_user
+from app.cache import invalidate_pet
+from app.exports import ExportDataset, ExportFormat, MEDIA_TYPES, stream_export, export_filename
 from app.config import settings
 
 router = APIRouter(prefix="/pets", tags=["Pets"])
 
 
-@router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=SuccessResponse[PetData], status_code=status.HTTP_201_CREATED)
 async def create_pet(
     pet_data: PetCreate,
     current_user: User = Depends(get_current_user),
@@ -47,7 +50,7 @@ async def create_pet(
     }
 
 
-@router.get("", response_model=dict)
+@router.get("", response_model=SuccessResponse[PetListData])
 async def get_pets(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -64,7 +67,7 @@ async def get_pets(
     }
 
 
-@router.get("/{pet_id}", response_model=dict)
+@router.get("/{pet_id}", response_model=SuccessResponse[PetData])
 async def get_pet(
     pet_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
@@ -91,7 +94,7 @@ async def get_pet(
     }
 
 
-@router.put("/{pet_id}", response_model=dict)
+@router.put("/{pet_id}", response_model=SuccessResponse[PetData])
 async def update_pet(
     pet_id: uuid.UUID,
     pet_data: PetUpdate,
@@ -120,6 +123,7 @@ async def update_pet(
 
     db.commit()
     db.refresh(pet)
+    invalidate_pet(pet.id)
 
     return {
         "success": True,
@@ -127,7 +131,7 @@ async def update_pet(
     }
 
 
-@router.delete("/{pet_id}", response_model=dict)
+@router.delete("/{pet_id}", response_model=MessageResponse)
 async def delete_pet(
     pet_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
@@ -150,6 +154,7 @@ async def delete_pet(
 
     db.delete(pet)
     db.commit()
+    invalidate_pet(pet_id)
 
     return {
         "success": True,
@@ -157,7 +162,7 @@ async def delete_pet(
     }
 
 
-@router.post("/{pet_id}/photo", response_model=dict)
+@router.post("/{pet_id}/photo", response_model=SuccessResponse[PetData])
 async def upload_pet_photo(
     pet_id: uuid.UUID,
     photo: UploadFile = File(...),
@@ -192,8 +197,41 @@ async def upload_pet_photo(
     pet.photo_url = f"/uploads/pets/{filename}"
     db.commit()
     db.refresh(pet)
+    invalidate_pet(pet.id)
 
     return {
         "success": True,
         "data": {"pet": PetResponse.model_validate(pet)}
     }
+
+
+@router.get("/{pet_id}/export/{dataset}")
+async def export_pet_history(
+    pet_id: uuid.UUID,
+    dataset: ExportDataset,
+    format: ExportFormat = Query(ExportFormat.CSV, description="Export file format"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream a pet's full activity, scan or health score history as CSV or Parquet"""
+    pet = db.query(Pet).filter(Pet.id == pet_id).first()
+
+    if not pet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pet not found"
+        )
+
+    if pet.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have access to this pet"
+        )
+
+    filename = export_filename(pet_id, dataset, format)
+
+    return StreamingResponse(
+        stream_export(pet_id, dataset, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
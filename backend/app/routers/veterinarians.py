@@ -1,34 +1,272 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import Row, func, or_
+from sqlalchemy.exc import IntegrityError
+from typing import Callable, List, Optional, Tuple
+from functools import partial
+from datetime import datetime, timezone
 import uuid
-from math import radians, cos, sin, asin, sqrt
-
-from app.database import get_db
-from app.models import User, Veterinarian
-from app.schemas import VeterinarianCreate, VeterinarianResponse
+import io
+import json
+from math import radians, cos
+
+from app.database import get_db, SessionLocal
+from app.models import User, Veterinarian, VET_SEARCH_CONFIG
+from app.schemas import (
+    VeterinarianCreate, VeterinarianResponse, VeterinarianData, VeterinarianListData,
+    VeterinarianClusterData, VeterinarianImportData, SuccessResponse, MessageResponse
+)
 from app.auth import get_current_user
+from app.geo import EARTH_RADIUS_KM, bounding_box
+from app.etag import make_etag, etag_matches, not_modified
+from app.specialties import SpecialtyMatch, normalize_specialties
+from app.hours import open_checker
+from app.vet_directory import (
+    vet_directory, vet_response_cache, encode_vet, vet_digest, with_distance,
+    load_vet_directory, publish_vet_change, publish_vet_reload
+)
+from app.vet_clusters import MAX_CLUSTER_ZOOM, MAX_VIEWPORT_CELLS, vet_clusters, viewport_size
+from app.vet_import import ImportFormat, ImportUnavailable, detect_format, import_veterinarians
 
 router = APIRouter(prefix="/veterinarians", tags=["Veterinarians"])
 
+DEFAULT_LIST_LIMIT = 50
+MAX_LIST_LIMIT = 100
+
+# Rows fetched at a time when the open filter has to be applied in Python
+OPEN_FILTER_BATCH_SIZE = 500
+
+# Distance at which a text match's relevance is halved when coordinates are given
+SEARCH_DISTANCE_DECAY_KM = 10.0
+
 
-def haversine(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+def bounding_box_filter(latitude: float, longitude: float, radius: float):
     """
-    Calculate the great circle distance between two points
-    on the earth (specified in decimal degrees)
-    Returns distance in kilometers
+    SQL filter for the latitude/longitude box enclosing a search circle,
+    so the indexed columns prune rows before exact distances are computed
+    """
+    min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius)
+
+    conditions = [Veterinarian.latitude.between(min_lat, max_lat)]
+    if lon_ranges != [(-180.0, 180.0)]:
+        conditions.append(or_(*(
+            Veterinarian.longitude.between(min_lon, max_lon) for min_lon, max_lon in lon_ranges
+        )))
+
+    return conditions
+
+
+def distance_expression(latitude: float, longitude: float):
+    """SQL haversine distance in kilometers from a point to each veterinarian"""
+    dlat = func.radians(Veterinarian.latitude - latitude)
+    dlon = func.radians(Veterinarian.longitude - longitude)
+    a = (
+        func.power(func.sin(dlat / 2.0), 2)
+        + cos(radians(latitude)) * func.cos(func.radians(Veterinarian.latitude)) * func.power(func.sin(dlon / 2.0), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
+
+
+# Directory responses carry no user data, so shared caches may keep them
+DIRECTORY_CACHE_CONTROL = "public, no-cache"
+
+
+def veterinarian_body(fragment: bytes) -> bytes:
+    """Wrap an encoded veterinarian in the standard response envelope"""
+    return b'{"success":true,"data":{"veterinarian":%s}}' % fragment
+
+
+def veterinarians_body(fragments: List[bytes]) -> bytes:
+    """Assemble a list response from encoded veterinarians without re-encoding them"""
+    return b'{"success":true,"data":{"veterinarians":[%s]}}' % b",".join(fragments)
+
+
+def directory_response(body: bytes, etag: Optional[str] = None, status_code: int = status.HTTP_200_OK) -> Response:
+    headers = {"ETag": etag, "Cache-Control": DIRECTORY_CACHE_CONTROL} if etag else None
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def cached_directory_response(request: Request, endpoint: str, params: dict, build: Callable[[], bytes]) -> Response:
+    """Serve a directory read from the response cache, answering If-None-Match with 304"""
+    key = vet_response_cache.key(endpoint, **params)
+    etag = make_etag(endpoint, key[2], vet_directory.digest)
+    if etag_matches(request, etag):
+        return not_modified(etag, DIRECTORY_CACHE_CONTROL)
+
+    body = vet_response_cache.get(key)
+    if body is None:
+        body = build()
+        vet_response_cache.store(key, body)
+
+    return directory_response(body, etag)
+
+
+def list_veterinarians(
+    db: Session,
+    latitude: Optional[float],
+    longitude: Optional[float],
+    radius: float,
+    specialty: Optional[Tuple[str, ...]],
+    specialty_match: SpecialtyMatch,
+    accepts_emergencies: Optional[bool],
+    open_at: Optional[datetime],
+    q: Optional[str],
+    limit: int
+) -> bytes:
+    match_all = specialty_match == SpecialtyMatch.ALL
+
+    # Listings are answered from the in-memory directory once loaded; text
+    # search needs the full-text and trigram indexes
+    if vet_directory.loaded and not q:
+        if latitude is not None and longitude is not None:
+            results = vet_directory.search(
+                latitude, longitude, radius, limit, specialty, match_all, accepts_emergencies, open_at
+            )
+            return veterinarians_body([
+                with_distance(record.fragment, distance_km) for record, distance_km in results
+            ])
+
+        records = vet_directory.filter(limit, specialty, match_all, accepts_emergencies, open_at)
+        return veterinarians_body([record.fragment for record in records])
+
+    query = db.query(Veterinarian)
+
+    # Filter by specialty (both operators use the GIN index)
+    if specialty:
+        if match_all:
+            query = query.filter(Veterinarian.specialty.contains(list(specialty)))
+        else:
+            query = query.filter(Veterinarian.specialty.overlap(list(specialty)))
+
+    # Filter by emergency services
+    if accepts_emergencies is not None:
+        query = query.filter(Veterinarian.accepts_emergencies == accepts_emergencies)
+
+    if open_at is not None:
+        query = query.filter(Veterinarian.hours_intervals.isnot(None))
+
+    relevance = None
+    if q:
+        match, relevance = text_search(q)
+        query = query.filter(match)
+
+    # Search by distance if coordinates provided
+    if latitude is not None and longitude is not None:
+        distance = distance_expression(latitude, longitude)
+        query = query.add_columns(distance.label("distance")).filter(
+            *bounding_box_filter(latitude, longitude, radius),
+            distance <= radius
+        )
+        if relevance is not None:
+            # Relevance decays with distance so a close, good match beats a distant exact one
+            query = query.order_by((relevance / (1 + distance / SEARCH_DISTANCE_DECAY_KM)).desc(), Veterinarian.id)
+        else:
+            query = query.order_by(distance, Veterinarian.id)
+        results = first_open(query, open_at, limit) if open_at else query.limit(limit).all()
+
+        return veterinarians_body([
+            with_distance(encode_vet(vet), distance_km) for vet, distance_km in results
+        ])
+
+    if relevance is not None:
+        query = query.order_by(relevance.desc(), Veterinarian.id)
+
+    vets = first_open(query, open_at, limit) if open_at else query.limit(limit).all()
+
+    return veterinarians_body([encode_vet(vet) for vet in vets])
+
+
+def text_search(q: str):
+    """Match condition and relevance score for a free-text query
+
+    Whole words are matched against the weighted search_vector; names are
+    also matched by trigram word similarity so typos and prefixes still hit.
     """
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    ts_query = func.websearch_to_tsquery(VET_SEARCH_CONFIG, q)
+    match = or_(
+        Veterinarian.search_vector.bool_op("@@")(ts_query),
+        Veterinarian.clinic_name.bool_op("%>")(q),
+        Veterinarian.name.bool_op("%>")(q),
+    )
+    relevance = func.ts_rank_cd(Veterinarian.search_vector, ts_query) + func.greatest(
+        func.word_similarity(q, Veterinarian.clinic_name),
+        func.word_similarity(q, Veterinarian.name),
+    )
+    return match, relevance
+
+
+def first_open(query, open_at: datetime, limit: int) -> list:
+    """First rows of a query whose clinic is open at the given time"""
+    is_open_at = open_checker(open_at)
+    rows = []
+    for row in query.yield_per(OPEN_FILTER_BATCH_SIZE):
+        vet = row[0] if isinstance(row, Row) else row
+        if is_open_at(vet.hours_intervals, vet.timezone):
+            rows.append(row)
+            if len(rows) == limit:
+                break
+    return rows
+
+
+def open_filter_time(open_now: bool, open_at: Optional[datetime]) -> Optional[datetime]:
+    """Moment for the open filter; "now" is truncated to the minute so responses stay cacheable"""
+    if open_at is not None:
+        return open_at
+    if open_now:
+        return datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    return None
+
+
+def normalized_specialty_filter(specialty: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    """Canonical, sorted specialties from the query so equivalent filters share a cache entry"""
+    if not specialty:
+        return None
+    return tuple(sorted(normalize_specialties(specialty)))
+
+
+def list_params(latitude, longitude, radius, specialty, specialty_match, accepts_emergencies, open_at, q, limit) -> dict:
+    """Cache key parameters for a listing; radius only matters with coordinates"""
+    if latitude is None or longitude is None:
+        latitude = longitude = radius = None
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "radius": radius,
+        "specialty": normalized_specialty_filter(specialty),
+        "specialty_match": specialty_match,
+        "accepts_emergencies": accepts_emergencies,
+        "open_at": open_at,
+        "q": " ".join(q.split()) if q else None,
+        "limit": limit,
+    }
 
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    km = 6371 * c
-    return km
+
+def warm_veterinarian_cache():
+    """Pre-build the default directory listing so the first requests are cache hits"""
+    db = SessionLocal()
+    try:
+        for limit in (DEFAULT_LIST_LIMIT, MAX_LIST_LIMIT):
+            params = list_params(None, None, None, None, SpecialtyMatch.ANY, None, None, None, limit)
+            key = vet_response_cache.key("list", **params)
+            vet_response_cache.store(key, list_veterinarians(db, **params))
+    finally:
+        db.close()
+
+
+def commit_unique_clinic(db: Session):
+    """Commit a created or edited vet; another vet with the same clinic name and address is a conflict"""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A veterinarian with this clinic name and address already exists"
+        )
 
 
-@router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=SuccessResponse[VeterinarianData], status_code=status.HTTP_201_CREATED)
 async def create_veterinarian(
     vet_data: VeterinarianCreate,
     db: Session = Depends(get_db)
@@ -37,176 +275,194 @@ async def create_veterinarian(
     new_vet = Veterinarian(**vet_data.model_dump())
 
     db.add(new_vet)
-    db.commit()
+    commit_unique_clinic(db)
     db.refresh(new_vet)
 
-    vet_dict = {
-        "id": str(new_vet.id),
-        "name": new_vet.name,
-        "clinic_name": new_vet.clinic_name,
-        "specialty": new_vet.specialty,
-        "address": new_vet.address,
-        "city": new_vet.city,
-        "state": new_vet.state,
-        "zip_code": new_vet.zip_code,
-        "latitude": new_vet.latitude,
-        "longitude": new_vet.longitude,
-        "phone": new_vet.phone,
-        "email": new_vet.email,
-        "website": new_vet.website,
-        "hours": new_vet.hours,
-        "rating": new_vet.rating,
-        "review_count": new_vet.review_count,
-        "image_url": new_vet.image_url,
-        "description": new_vet.description,
-        "accepts_emergencies": new_vet.accepts_emergencies,
-        "created_at": new_vet.created_at.isoformat() if new_vet.created_at else None,
-    }
+    record = vet_directory.upsert(new_vet)
+    publish_vet_change(new_vet.id)
+
+    return directory_response(veterinarian_body(record.fragment), status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/import", response_model=SuccessResponse[VeterinarianImportData])
+async def import_veterinarian_directory(
+    file: UploadFile = File(...),
+    format: Optional[ImportFormat] = Query(None, description="csv or json (JSON Lines or an array); detected from the file name by default"),
+    dry_run: bool = Query(False, description="Validate and report without saving"),
+    db: Session = Depends(get_db)
+):
+    """Bulk import veterinarians, updating clinics that already exist (admin only in production)"""
+    import_format = format or detect_format(file.filename, file.content_type)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+
+    try:
+        report = await run_in_threadpool(import_veterinarians, db, stream, import_format, dry_run)
+    except ImportUnavailable as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not read import file: {e}"
+        )
+    finally:
+        stream.detach()
+
+    if not dry_run and (report.inserted or report.updated):
+        await run_in_threadpool(load_vet_directory)
+        publish_vet_reload()
 
     return {
         "success": True,
-        "data": {"veterinarian": vet_dict}
+        "data": {"import": report.to_dict()}
     }
 
 
-@router.get("", response_model=dict)
+@router.get("", response_model=SuccessResponse[VeterinarianListData])
 async def get_veterinarians(
+    request: Request,
     latitude: Optional[float] = Query(None, description="User's latitude"),
     longitude: Optional[float] = Query(None, description="User's longitude"),
-    radius: float = Query(50, description="Search radius in kilometers"),
-    specialty: Optional[str] = Query(None, description="Filter by specialty"),
+    radius: float = Query(50, gt=0, description="Search radius in kilometers"),
+    specialty: Optional[List[str]] = Query(None, description="Filter by specialty (repeat for several)"),
+    specialty_match: SpecialtyMatch = Query(SpecialtyMatch.ANY, description="Match any or all of the specialties"),
     accepts_emergencies: Optional[bool] = Query(None, description="Filter by emergency services"),
-    limit: int = Query(50, le=100),
+    open_now: bool = Query(False, description="Only clinics open right now"),
+    open_at: Optional[datetime] = Query(None, description="Only clinics open at this time (without an offset: clinic local time)"),
+    q: Optional[str] = Query(None, max_length=200, description="Search clinic name, vet name, city and description"),
+    limit: int = Query(DEFAULT_LIST_LIMIT, le=MAX_LIST_LIMIT),
     db: Session = Depends(get_db)
 ):
     """Get veterinarians with optional filters"""
-    query = db.query(Veterinarian)
+    params = list_params(
+        latitude, longitude, radius, specialty, specialty_match, accepts_emergencies,
+        open_filter_time(open_now, open_at), q, limit
+    )
+    build = partial(list_veterinarians, db, **params)
+
+    if not vet_directory.loaded:
+        return directory_response(build())
+
+    return cached_directory_response(request, "list", params, build)
+
+
+@router.get("/nearest", response_model=SuccessResponse[VeterinarianListData])
+async def get_nearest_veterinarians(
+    request: Request,
+    latitude: float = Query(..., ge=-90, le=90, description="User's latitude"),
+    longitude: float = Query(..., ge=-180, le=180, description="User's longitude"),
+    k: int = Query(10, ge=1, le=100, description="Number of veterinarians to return"),
+    max_distance: Optional[float] = Query(None, gt=0, description="Maximum distance in kilometers"),
+    specialty: Optional[List[str]] = Query(None, description="Filter by specialty (repeat for several)"),
+    specialty_match: SpecialtyMatch = Query(SpecialtyMatch.ANY, description="Match any or all of the specialties"),
+    accepts_emergencies: Optional[bool] = Query(None, description="Filter by emergency services"),
+    open_now: bool = Query(False, description="Only clinics open right now"),
+    open_at: Optional[datetime] = Query(None, description="Only clinics open at this time (without an offset: clinic local time)"),
+):
+    """Get the k nearest veterinarians from the in-memory directory"""
+    if not vet_directory.loaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Veterinarian directory is not loaded yet"
+        )
 
-    # Filter by specialty
-    if specialty:
-        query = query.filter(Veterinarian.specialty.contains([specialty]))
+    specialties = normalized_specialty_filter(specialty)
+    match_all = specialty_match == SpecialtyMatch.ALL
+    open_time = open_filter_time(open_now, open_at)
 
-    # Filter by emergency services
-    if accepts_emergencies is not None:
-        query = query.filter(Veterinarian.accepts_emergencies == accepts_emergencies)
+    def build() -> bytes:
+        results = vet_directory.nearest(
+            latitude, longitude, k, max_distance, specialties, match_all, accepts_emergencies, open_time
+        )
+        return veterinarians_body([
+            with_distance(record.fragment, distance_km) for record, distance_km in results
+        ])
+
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "k": k,
+        "max_distance": max_distance,
+        "specialty": specialties,
+        "specialty_match": specialty_match,
+        "accepts_emergencies": accepts_emergencies,
+        "open_at": open_time,
+    }
+    return cached_directory_response(request, "nearest", params, build)
 
-    vets = query.limit(limit).all()
 
-    # Calculate distance if coordinates provided
-    if latitude is not None and longitude is not None:
-        vet_list = []
-        for vet in vets:
-            distance = haversine(longitude, latitude, vet.longitude, vet.latitude)
-            if distance <= radius:
-                vet_dict = {
-                    "id": str(vet.id),
-                    "name": vet.name,
-                    "clinic_name": vet.clinic_name,
-                    "specialty": vet.specialty,
-                    "address": vet.address,
-                    "city": vet.city,
-                    "state": vet.state,
-                    "zip_code": vet.zip_code,
-                    "latitude": vet.latitude,
-                    "longitude": vet.longitude,
-                    "phone": vet.phone,
-                    "email": vet.email,
-                    "website": vet.website,
-                    "hours": vet.hours,
-                    "rating": vet.rating,
-                    "review_count": vet.review_count,
-                    "image_url": vet.image_url,
-                    "description": vet.description,
-                    "accepts_emergencies": vet.accepts_emergencies,
-                    "created_at": vet.created_at.isoformat() if vet.created_at else None,
-                    "distance": round(distance, 2)
-                }
-                vet_list.append(vet_dict)
-
-        # Sort by distance
-        vet_list.sort(key=lambda x: x["distance"])
-        return {
-            "success": True,
-            "data": {"veterinarians": vet_list}
-        }
-
-    # Convert vets to dictionaries
-    vet_list = []
-    for vet in vets:
-        vet_dict = {
-            "id": str(vet.id),
-            "name": vet.name,
-            "clinic_name": vet.clinic_name,
-            "specialty": vet.specialty,
-            "address": vet.address,
-            "city": vet.city,
-            "state": vet.state,
-            "zip_code": vet.zip_code,
-            "latitude": vet.latitude,
-            "longitude": vet.longitude,
-            "phone": vet.phone,
-            "email": vet.email,
-            "website": vet.website,
-            "hours": vet.hours,
-            "rating": vet.rating,
-            "review_count": vet.review_count,
-            "image_url": vet.image_url,
-            "description": vet.description,
-            "accepts_emergencies": vet.accepts_emergencies,
-            "created_at": vet.created_at.isoformat() if vet.created_at else None,
-        }
-        vet_list.append(vet_dict)
+@router.get("/clusters", response_model=SuccessResponse[VeterinarianClusterData])
+async def get_veterinarian_clusters(
+    request: Request,
+    south: float = Query(..., ge=-90, le=90, description="Viewport southern latitude"),
+    west: float = Query(..., ge=-180, le=180, description="Viewport western longitude"),
+    north: float = Query(..., ge=-90, le=90, description="Viewport northern latitude"),
+    east: float = Query(..., ge=-180, le=180, description="Viewport eastern longitude (less than west across the antimeridian)"),
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level"),
+):
+    """Get pre-aggregated map marker clusters for a viewport"""
+    if south > north:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="south must not be greater than north"
+        )
 
-    return {
-        "success": True,
-        "data": {"veterinarians": vet_list}
-    }
+    # Zoom levels past the finest cluster level all see individual clinics
+    zoom = min(zoom, MAX_CLUSTER_ZOOM)
+    if viewport_size(south, west, north, east, zoom) > MAX_VIEWPORT_CELLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Viewport is too large for this zoom level"
+        )
+    if not vet_directory.loaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Veterinarian directory is not loaded yet"
+        )
+
+    def build() -> bytes:
+        clusters = vet_clusters.clusters(south, west, north, east, zoom)
+        return b'{"success":true,"data":{"zoom":%d,"clusters":%s}}' % (
+            zoom, json.dumps(clusters, separators=(",", ":")).encode()
+        )
+
+    params = {"south": south, "west": west, "north": north, "east": east, "zoom": zoom}
+    return cached_directory_response(request, "clusters", params, build)
 
 
-@router.get("/{vet_id}", response_model=dict)
+@router.get("/{vet_id}", response_model=SuccessResponse[VeterinarianData])
 async def get_veterinarian(
     vet_id: uuid.UUID,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Get a specific veterinarian"""
-    vet = db.query(Veterinarian).filter(Veterinarian.id == vet_id).first()
-
-    if not vet:
+    if vet_directory.loaded:
+        record = vet_directory.get(vet_id)
+        encoded = (record.fragment, record.digest) if record else None
+    else:
+        vet = db.query(Veterinarian).filter(Veterinarian.id == vet_id).first()
+        encoded = (encode_vet(vet), vet_digest(vet)) if vet else None
+
+    if not encoded:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Veterinarian not found"
         )
 
-    vet_dict = {
-        "id": str(vet.id),
-        "name": vet.name,
-        "clinic_name": vet.clinic_name,
-        "specialty": vet.specialty,
-        "address": vet.address,
-        "city": vet.city,
-        "state": vet.state,
-        "zip_code": vet.zip_code,
-        "latitude": vet.latitude,
-        "longitude": vet.longitude,
-        "phone": vet.phone,
-        "email": vet.email,
-        "website": vet.website,
-        "hours": vet.hours,
-        "rating": vet.rating,
-        "review_count": vet.review_count,
-        "image_url": vet.image_url,
-        "description": vet.description,
-        "accepts_emergencies": vet.accepts_emergencies,
-        "created_at": vet.created_at.isoformat() if vet.created_at else None,
-    }
+    fragment, digest = encoded
+    etag = make_etag("veterinarian", vet_id, digest)
+    if etag_matches(request, etag):
+        return not_modified(etag, DIRECTORY_CACHE_CONTROL)
 
-    return {
-        "success": True,
-        "data": {"veterinarian": vet_dict}
-    }
+    return directory_response(veterinarian_body(fragment), etag)
 
 
-@router.put("/{vet_id}", response_model=dict)
+@router.put("/{vet_id}", response_model=SuccessResponse[VeterinarianData])
 async def update_veterinarian(
     vet_id: uuid.UUID,
     vet_data: VeterinarianCreate,
@@ -226,39 +482,16 @@ async def update_veterinarian(
     for field, value in update_data.items():
         setattr(vet, field, value)
 
-    db.commit()
+    commit_unique_clinic(db)
     db.refresh(vet)
 
-    vet_dict = {
-        "id": str(vet.id),
-        "name": vet.name,
-        "clinic_name": vet.clinic_name,
-        "specialty": vet.specialty,
-        "address": vet.address,
-        "city": vet.city,
-        "state": vet.state,
-        "zip_code": vet.zip_code,
-        "latitude": vet.latitude,
-        "longitude": vet.longitude,
-        "phone": vet.phone,
-        "email": vet.email,
-        "website": vet.website,
-        "hours": vet.hours,
-        "rating": vet.rating,
-        "review_count": vet.review_count,
-        "image_url": vet.image_url,
-        "description": vet.description,
-        "accepts_emergencies": vet.accepts_emergencies,
-        "created_at": vet.created_at.isoformat() if vet.created_at else None,
-    }
+    record = vet_directory.upsert(vet)
+    publish_vet_change(vet.id)
 
-    return {
-        "success": True,
-        "data": {"veterinarian": vet_dict}
-    }
+    return directory_response(veterinarian_body(record.fragment))
 
 
-@router.delete("/{vet_id}", response_model=dict)
+@router.delete("/{vet_id}", response_model=MessageResponse)
 async def delete_veterinarian(
     vet_id: uuid.UUID,
     db: Session = Depends(get_db)
@@ -275,6 +508,9 @@ async def delete_veterinarian(
     db.delete(vet)
     db.commit()
 
+    vet_directory.remove(vet_id)
+    publish_vet_change(vet_id)
+
     return {
         "success": True,
         "message": "Veterinarian deleted successfully"
@@ -1,9 +1,12 @@
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
+from typing import Generic, Optional, List, Dict, Any, TypeVar
+from datetime import date, datetime
 from uuid import UUID
 
 from app.models import ScanType, ScanStatus, ActivityType, DocumentType
+from app.chat_presence import PresenceStatus
+from app.specialties import normalize_specialties
+from app.hours import valid_timezone
 
 
 # User Schemas
@@ -38,6 +41,18 @@ class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
 
+class AuthData(BaseModel):
+    user: UserResponse
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+
+class AccessTokenData(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+
+
 # Pet Schemas
 class PetBase(BaseModel):
     name: str
@@ -92,6 +107,14 @@ class PetResponse(PetBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PetData(BaseModel):
+    pet: PetResponse
+
+
+class PetListData(BaseModel):
+    pets: List[PetResponse]
+
+
 # Health Scan Schemas
 class HealthScanCreate(BaseModel):
     pet_id: UUID
@@ -113,6 +136,18 @@ class HealthScanResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class HealthScanData(BaseModel):
+    health_scan: HealthScanResponse
+
+
+class HealthScanListData(BaseModel):
+    scans: List[HealthScanResponse]
+
+
+class HealthScoreData(BaseModel):
+    health_score: HealthScoreResponse
+
+
 # Activity Schemas
 class ActivityCreate(BaseModel):
     pet_id: UUID
@@ -137,6 +172,14 @@ class ActivityResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ActivityData(BaseModel):
+    activity: ActivityResponse
+
+
+class ActivityListData(BaseModel):
+    activities: List[ActivityResponse]
+
+
 # Veterinarian Schemas
 class VeterinarianBase(BaseModel):
     name: str
@@ -152,12 +195,25 @@ class VeterinarianBase(BaseModel):
     email: Optional[EmailStr] = None
     website: Optional[str] = None
     hours: Optional[Dict[str, Any]] = None
+    timezone: Optional[str] = None
     rating: Optional[float] = None
     review_count: int = 0
     image_url: Optional[str] = None
     description: Optional[str] = None
     accepts_emergencies: bool = False
 
+    @field_validator("specialty")
+    @classmethod
+    def normalize_specialty(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        return normalize_specialties(value)
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and not valid_timezone(value):
+            raise ValueError(f"Unknown timezone: {value}")
+        return value
+
 
 class VeterinarianCreate(VeterinarianBase):
     pass
@@ -171,6 +227,55 @@ class VeterinarianResponse(VeterinarianBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class VeterinarianSearchResult(VeterinarianResponse):
+    # Kilometers, only when searching from coordinates
+    distance: Optional[float] = None
+
+
+class VeterinarianData(BaseModel):
+    veterinarian: VeterinarianResponse
+
+
+class VeterinarianListData(BaseModel):
+    veterinarians: List[VeterinarianSearchResult]
+
+
+class ClusterBounds(BaseModel):
+    south: float
+    west: float
+    north: float
+    east: float
+
+
+class VeterinarianCluster(BaseModel):
+    count: int
+    latitude: float
+    longitude: float
+    bounds: ClusterBounds
+    # Only for single-clinic clusters
+    vet_id: Optional[UUID] = None
+
+
+class VeterinarianClusterData(BaseModel):
+    zoom: int
+    clusters: List[VeterinarianCluster]
+
+
+class ImportReportResponse(BaseModel):
+    received: int
+    inserted: int
+    updated: int
+    duplicates: int
+    invalid: int
+    errors: List[Dict[str, Any]]
+    seconds: float
+    rows_per_second: float
+
+
+class VeterinarianImportData(BaseModel):
+    import_report: ImportReportResponse = Field(alias="import")
+
+
 # Chat Message Schemas
 class ChatMessageCreate(BaseModel):
     vet_id: Optional[UUID] = None
@@ -186,10 +291,57 @@ class ChatMessageResponse(BaseModel):
     is_from_user: bool
     attachment_url: Optional[str] = None
     created_at: datetime
+    read_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class ChatMessageData(BaseModel):
+    message: ChatMessageResponse
+
+
+class ChatMessagePage(BaseModel):
+    messages: List[ChatMessageResponse]
+    # Pass back as since to continue from here
+    cursor: Optional[str] = None
+    has_more: bool
+
+
+class ConversationResponse(BaseModel):
+    vet_id: Optional[UUID] = None
+    last_message: ChatMessageResponse
+    unread_count: int
+
+
+class ConversationListData(BaseModel):
+    conversations: List[ConversationResponse]
+    unread_count: int
+
+
+class MarkReadData(BaseModel):
+    marked_read: int
+
+
+class ChatSearchResult(BaseModel):
+    message: ChatMessageResponse
+    snippet: str
+
+
+class ChatSearchPage(BaseModel):
+    results: List[ChatSearchResult]
+    cursor: Optional[str] = None
+    has_more: bool
+
+
+class PresenceResponse(BaseModel):
+    status: PresenceStatus
+    last_seen: Optional[datetime] = None
+
+
+class PresenceData(BaseModel):
+    presence: Dict[str, PresenceResponse]
+
+
 # Document Schemas
 class DocumentCreate(BaseModel):
     pet_id: UUID
@@ -213,9 +365,99 @@ class DocumentResponse(BaseModel):
 
 
 # Analytics Schemas
+class UserDashboardData(BaseModel):
+    total_pets: int
+    total_scans: int
+    total_activities: int
+    average_health_score: float
+
+
+class CacheStatsData(BaseModel):
+    entries: int
+    max_entries: int
+    bytes: int
+    cached_pets: int
+    tombstones: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    invalidations: int
+
+
 class HealthTrendData(BaseModel):
     date: datetime
     score: int
+    scan_type: Optional[ScanType] = None
+
+
+class HealthTrendsData(BaseModel):
+    trend: List[HealthTrendData]
+    period_days: int
+
+
+class ActivitySummaryData(BaseModel):
+    activity_counts: Dict[str, int]
+    total_activities: int
+    recent_activities: List[ActivityResponse]
+    period_days: int
+
+
+class ScanStatisticsData(BaseModel):
+    total_scans: int
+    scans_by_type: Dict[str, int]
+    avg_scores_by_type: Dict[str, Optional[float]]
+    current_health_score: Optional[HealthScoreResponse] = None
+
+
+class PetStatistics(BaseModel):
+    total_scans: int
+    total_activities: int
+
+
+class PetDashboardData(BaseModel):
+    pet: PetResponse
+    health_score: Optional[HealthScoreResponse] = None
+    recent_scans: List[HealthScanResponse]
+    recent_activities: List[ActivityResponse]
+    statistics: PetStatistics
+
+
+class CohortInfo(BaseModel):
+    breed: Optional[str] = None
+    age_band: Optional[str] = None
+    size: int
+
+
+class ScoreBucket(BaseModel):
+    min: int
+    max: int
+    count: int
+
+
+class CohortComparisonData(BaseModel):
+    cohort: CohortInfo
+    score: float
+    percentile: float
+    mean: float
+    quantiles: Dict[str, float]
+    distribution: List[ScoreBucket]
+    snapshot_at: datetime
+
+
+class ActivityAlert(BaseModel):
+    type: ActivityType
+    day: date
+    count: int
+    usual_per_day: float
+    last_activity_at: Optional[datetime] = None
+    kind: str
+    message: str
+    z_score: float
+
+
+class ActivityAlertData(BaseModel):
+    alerts: List[ActivityAlert]
 
 
 class HealthAnalyticsResponse(BaseModel):
@@ -227,8 +469,29 @@ class HealthAnalyticsResponse(BaseModel):
     recent_activities: List[ActivityResponse]
 
 
-# Response wrapper
-class SuccessResponse(BaseModel):
+# Response wrappers
+DataT = TypeVar("DataT")
+
+
+class SuccessResponse(BaseModel, Generic[DataT]):
+    """The {"success": true, "data": ...} envelope every endpoint returns"""
+    success: bool = True
+    data: DataT
+
+
+class MessageResponse(BaseModel):
     success: bool = True
-    data: Optional[Any] = None
-    message: Optional[str] = None
+    message: str
+
+
+class ServiceInfoResponse(BaseModel):
+    message: str
+    version: str
+    docs: str
+    health: str
+
+
+class HealthCheckResponse(BaseModel):
+    status: str
+    service: str
+    version: str
@@ -0,0 +1,86 @@
+"""
+Normalized veterinarian specialty vocabulary
+
+Specialties are stored in their canonical spelling so the GIN index on
+veterinarians.specialty and the in-memory inverted index match exactly.
+Known aliases map to a canonical name; anything else is whitespace-collapsed
+and title-cased.
+"""
+import enum
+from typing import Iterable, List, Optional
+
+CANONICAL_SPECIALTIES = [
+    "General Practice",
+    "Emergency Care",
+    "Critical Care",
+    "Surgery",
+    "Internal Medicine",
+    "Cardiology",
+    "Dentistry",
+    "Dermatology",
+    "Oncology",
+    "Neurology",
+    "Ophthalmology",
+    "Orthopedics",
+    "Behavior",
+    "Exotics",
+]
+
+_ALIASES = {
+    "gp": "General Practice",
+    "general": "General Practice",
+    "general medicine": "General Practice",
+    "primary care": "General Practice",
+    "emergency": "Emergency Care",
+    "emergency medicine": "Emergency Care",
+    "er": "Emergency Care",
+    "urgent care": "Emergency Care",
+    "icu": "Critical Care",
+    "critical care medicine": "Critical Care",
+    "surgical": "Surgery",
+    "soft tissue surgery": "Surgery",
+    "internal": "Internal Medicine",
+    "cardio": "Cardiology",
+    "dental": "Dentistry",
+    "dental care": "Dentistry",
+    "derm": "Dermatology",
+    "cancer": "Oncology",
+    "neuro": "Neurology",
+    "eye care": "Ophthalmology",
+    "orthopedic surgery": "Orthopedics",
+    "orthopaedics": "Orthopedics",
+    "behavioral medicine": "Behavior",
+    "behaviour": "Behavior",
+    "exotic animals": "Exotics",
+    "exotic pets": "Exotics",
+}
+
+_CANONICAL = {name.lower(): name for name in CANONICAL_SPECIALTIES}
+
+
+class SpecialtyMatch(str, enum.Enum):
+    ANY = "any"
+    ALL = "all"
+
+
+def normalize_specialty(name: str) -> str:
+    """Canonical spelling of a specialty name"""
+    key = " ".join(name.lower().replace("-", " ").replace("_", " ").split())
+    if key in _CANONICAL:
+        return _CANONICAL[key]
+    if key in _ALIASES:
+        return _ALIASES[key]
+    return " ".join(word.capitalize() for word in key.split())
+
+
+def normalize_specialties(names: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """Canonical, de-duplicated specialties in their original order"""
+    if names is None:
+        return None
+
+    normalized = []
+    for name in names:
+        specialty = normalize_specialty(name)
+        if specialty and specialty not in normalized:
+            normalized.append(specialty)
+    return normalized
@@ -0,0 +1,178 @@
+"""
+Map marker clusters for the veterinarian directory
+
+Vets are bucketed into Web Mercator grid cells, CELL_SUBDIVISION_BITS finer
+than map tiles (64px cells on 256px tiles). The finest level is built from
+the vet coordinates and every coarser zoom level is aggregated from the
+level below, like a quadtree built bottom-up. A viewport query at a zoom
+level is then one vectorized range mask over that level's cells. Each cell
+yields at most one cluster, so capping the cells a viewport spans
+(MAX_VIEWPORT_CELLS) caps the size of a response.
+
+The hierarchy is rebuilt on the next query after the directory changes.
+"""
+import threading
+import uuid
+from dataclasses import dataclass
+from math import floor, pi
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.vet_directory import VetDirectory, vet_directory
+
+MAX_CLUSTER_ZOOM = 18
+CELL_SUBDIVISION_BITS = 2
+
+# Web Mercator latitude limit
+MAX_LATITUDE = 85.05112878
+
+# Cells a viewport may span at its zoom level, about a 4096px square map
+MAX_VIEWPORT_CELLS = 64 * 64
+
+
+@dataclass
+class ClusterLevel:
+    x: np.ndarray
+    y: np.ndarray
+    count: np.ndarray
+    sum_lat: np.ndarray
+    sum_lon: np.ndarray
+    min_lat: np.ndarray
+    max_lat: np.ndarray
+    min_lon: np.ndarray
+    max_lon: np.ndarray
+    representative: np.ndarray  # index into the id list of one vet in the cell
+
+
+def mercator_x(longitude):
+    return (np.asarray(longitude) + 180.0) / 360.0
+
+
+def mercator_y(latitude):
+    lat = np.radians(np.clip(latitude, -MAX_LATITUDE, MAX_LATITUDE))
+    return (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / pi) / 2.0
+
+
+def cells_per_axis(zoom: int) -> int:
+    return 1 << (zoom + CELL_SUBDIVISION_BITS)
+
+
+def viewport_cells(south: float, west: float, north: float, east: float, zoom: int) -> Tuple[int, int, int, int]:
+    """Inclusive cell range (min_x, max_x, min_y, max_y) of a viewport; min_x > max_x across the antimeridian"""
+    size = cells_per_axis(min(zoom, MAX_CLUSTER_ZOOM))
+
+    def cell(value: float) -> int:
+        return min(max(floor(value * size), 0), size - 1)
+
+    return (
+        cell(float(mercator_x(west))), cell(float(mercator_x(east))),
+        cell(float(mercator_y(north))), cell(float(mercator_y(south))),
+    )
+
+
+def viewport_size(south: float, west: float, north: float, east: float, zoom: int) -> int:
+    """Number of cells a viewport spans at a zoom level"""
+    size = cells_per_axis(min(zoom, MAX_CLUSTER_ZOOM))
+    min_x, max_x, min_y, max_y = viewport_cells(south, west, north, east, zoom)
+    width = max_x - min_x + 1 if west <= east else min(size - min_x + max_x + 1, size)
+    return width * (max_y - min_y + 1)
+
+
+def _aggregate(level: ClusterLevel) -> ClusterLevel:
+    """Merge entries that share an (x, y) cell"""
+    keys = (level.x << 32) | level.y
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1]))) if keys.size else keys
+
+    def reduce(ufunc, values):
+        return ufunc.reduceat(values[order], starts) if keys.size else values
+
+    return ClusterLevel(
+        x=level.x[order][starts],
+        y=level.y[order][starts],
+        count=reduce(np.add, level.count),
+        sum_lat=reduce(np.add, level.sum_lat),
+        sum_lon=reduce(np.add, level.sum_lon),
+        min_lat=reduce(np.minimum, level.min_lat),
+        max_lat=reduce(np.maximum, level.max_lat),
+        min_lon=reduce(np.minimum, level.min_lon),
+        max_lon=reduce(np.maximum, level.max_lon),
+        representative=level.representative[order][starts],
+    )
+
+
+def build_levels(latitudes: np.ndarray, longitudes: np.ndarray) -> Dict[int, ClusterLevel]:
+    """Cluster cells for every zoom level from 0 to MAX_CLUSTER_ZOOM"""
+    size = cells_per_axis(MAX_CLUSTER_ZOOM)
+    x = np.minimum((mercator_x(longitudes) * size).astype(np.int64), size - 1)
+    y = np.minimum((mercator_y(latitudes) * size).astype(np.int64), size - 1)
+
+    level = _aggregate(ClusterLevel(
+        x=x, y=y,
+        count=np.ones(latitudes.size, dtype=np.int64),
+        sum_lat=latitudes, sum_lon=longitudes,
+        min_lat=latitudes, max_lat=latitudes,
+        min_lon=longitudes, max_lon=longitudes,
+        representative=np.arange(latitudes.size),
+    ))
+
+    levels = {MAX_CLUSTER_ZOOM: level}
+    for zoom in range(MAX_CLUSTER_ZOOM - 1, -1, -1):
+        level = _aggregate(ClusterLevel(**{**level.__dict__, "x": level.x >> 1, "y": level.y >> 1}))
+        levels[zoom] = level
+    return levels
+
+
+class VetClusterIndex:
+    def __init__(self, directory: VetDirectory):
+        self.directory = directory
+        self._levels: Dict[int, ClusterLevel] = {}
+        self._ids: List[uuid.UUID] = []
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        with self._lock:
+            if self._version != self.directory.version:
+                version, ids, latitudes, longitudes = self.directory.coordinates()
+                self._levels = build_levels(latitudes, longitudes)
+                self._ids = ids
+                self._version = version
+            return self._levels, self._ids
+
+    def clusters(self, south: float, west: float, north: float, east: float, zoom: int) -> List[dict]:
+        """Clusters with a cell inside the viewport; west > east crosses the antimeridian"""
+        levels, ids = self._current()
+        zoom = min(zoom, MAX_CLUSTER_ZOOM)
+        level = levels[zoom]
+        min_x, max_x, min_y, max_y = viewport_cells(south, west, north, east, zoom)
+
+        in_view = (level.y >= min_y) & (level.y <= max_y)
+        if west <= east:
+            in_view &= (level.x >= min_x) & (level.x <= max_x)
+        else:
+            in_view &= (level.x >= min_x) | (level.x <= max_x)
+
+        clusters = []
+        for index in np.flatnonzero(in_view).tolist():
+            count = int(level.count[index])
+            cluster = {
+                "count": count,
+                "latitude": round(float(level.sum_lat[index]) / count, 6),
+                "longitude": round(float(level.sum_lon[index]) / count, 6),
+                "bounds": {
+                    "south": float(level.min_lat[index]),
+                    "west": float(level.min_lon[index]),
+                    "north": float(level.max_lat[index]),
+                    "east": float(level.max_lon[index]),
+                },
+            }
+            if count == 1:
+                cluster["vet_id"] = str(ids[level.representative[index]])
+            clusters.append(cluster)
+        return clusters
+
+
+vet_clusters = VetClusterIndex(vet_directory)
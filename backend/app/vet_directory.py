@@ -0,0 +1,507 @@
+"""
+In-memory veterinarian directory with a spatial grid index
+
+The directory is loaded at startup and kept current by the create, update
+and delete endpoints; other workers are told to reload a changed vet over
+LISTEN/NOTIFY. Changes published while a worker's listener is disconnected
+are missed, so the directory is reloaded whenever the listener (re)connects,
+and every VET_DIRECTORY_CHECK_SECONDS its digest is compared with the
+database as a backstop. Location queries are answered entirely from memory,
+and each vet's JSON encoding is cached so responses are assembled from bytes.
+
+Every change bumps the directory version, which keys the listing response
+cache. ETags come from an order-independent digest of every vet's id and
+updated_at, so all workers agree on them once their directories converge.
+
+Coordinates live in contiguous NumPy arrays indexed by slot, so the distances
+to every candidate in the overlapping grid cells are computed in one batch.
+Specialty and emergency filters are answered from an inverted index of slot
+bitsets (Python ints), combined with & and | before any distance is computed.
+Open-at filters binary-search each remaining clinic's parsed weekly hours.
+"""
+import asyncio
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import reduce
+from math import floor, pi
+from operator import and_, or_, xor
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+
+from app.config import settings
+from app.database import SessionLocal
+from app.geo import EARTH_RADIUS_KM, bounding_box, haversine_many
+from app.hours import open_checker
+from app.models import Veterinarian
+from app.schemas import VeterinarianResponse
+from app.pubsub import notifier
+
+VET_DIRECTORY_CHANNEL = "pawmetric_vet_directory"
+
+# Change notification payload asking for a full reload
+RELOAD_ALL = "*"
+
+# Grid cell size in degrees (about 28km of latitude)
+CELL_DEGREES = 0.25
+
+# Starting radius for nearest-neighbour searches, doubled until enough vets are found
+NEAREST_START_RADIUS_KM = 10.0
+
+_vet_adapter = TypeAdapter(VeterinarianResponse)
+
+
+def encode_vet(vet: Veterinarian) -> bytes:
+    """Encode a veterinarian as a JSON object with the compiled response serializer"""
+    try:
+        return _vet_adapter.dump_json(_vet_adapter.validate_python(vet, from_attributes=True))
+    except ValidationError as e:
+        # Rows saved before a field was validated (e.g. a malformed email) are
+        # served as stored rather than failing the whole directory load
+        print(f"⚠️  Veterinarian {vet.id} does not match VeterinarianResponse, encoding it as stored: "
+              f"{e.error_count()} invalid field(s)")
+        values = {name: getattr(vet, name) for name in VeterinarianResponse.model_fields}
+        return _vet_adapter.dump_json(VeterinarianResponse.model_construct(**values), warnings=False)
+
+
+def vet_digest(vet: Veterinarian) -> int:
+    """64-bit fingerprint of a veterinarian's version"""
+    updated_at = vet.updated_at.isoformat() if vet.updated_at else ""
+    digest = hashlib.blake2b(f"{vet.id}:{updated_at}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def with_distance(fragment: bytes, distance_km: float) -> bytes:
+    """Append a rounded distance field to an encoded veterinarian object"""
+    return b"%s,\"distance\":%r}" % (fragment[:-1], round(distance_km, 2))
+
+
+def bits_to_mask(bits: int, size: int) -> np.ndarray:
+    """Boolean array of the first size bits of a slot bitset"""
+    raw = np.frombuffer(bits.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, count=size, bitorder="little").view(bool)
+
+
+@dataclass
+class VetRecord:
+    id: uuid.UUID
+    slot: int
+    latitude: float
+    longitude: float
+    specialties: frozenset
+    accepts_emergencies: bool
+    hours_intervals: Optional[List[int]]
+    timezone: Optional[str]
+    fragment: bytes  # encoded JSON object, rebuilt whenever the vet changes
+    digest: int
+
+    @property
+    def cell(self) -> Tuple[int, int]:
+        return floor(self.latitude / CELL_DEGREES), floor(self.longitude / CELL_DEGREES)
+
+
+class VetDirectory:
+    def __init__(self):
+        self._records: Dict[uuid.UUID, VetRecord] = {}
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.version = 0
+        self.digest = 0
+        self._reset(0)
+
+    def _reset_index(self):
+        # Inverted index: bit n is set when slot n holds a matching vet
+        self._specialty_bits: Dict[str, int] = {}
+        self._emergency_bits = 0
+        self._hours_bits = 0
+        self._occupied_bits = 0
+
+    def _reset(self, capacity: int):
+        # Slot-indexed storage; freed slots are reused before the arrays grow
+        self._slot_records: List[Optional[VetRecord]] = [None] * capacity
+        self._latitudes = np.zeros(capacity, dtype=np.float64)
+        self._longitudes = np.zeros(capacity, dtype=np.float64)
+        self._free_slots: List[int] = list(range(capacity - 1, -1, -1))
+        self._reset_index()
+
+    def __len__(self):
+        return len(self._records)
+
+    def load(self, db):
+        """Replace the directory contents with every veterinarian in the database"""
+        vets = db.query(Veterinarian).all()
+        with self._lock:
+            self._records.clear()
+            self._cells.clear()
+            self._reset(len(vets))
+            self.digest = 0
+            for vet in vets:
+                self._insert(vet)
+            self.version += 1
+            self.loaded = True
+
+    def upsert(self, vet: Veterinarian) -> VetRecord:
+        with self._lock:
+            self._discard(vet.id)
+            record = self._insert(vet)
+            self.version += 1
+            return record
+
+    def remove(self, vet_id: uuid.UUID):
+        with self._lock:
+            self._discard(vet_id)
+            self.version += 1
+
+    def get(self, vet_id: uuid.UUID) -> Optional[VetRecord]:
+        return self._records.get(vet_id)
+
+    def coordinates(self) -> Tuple[int, List[uuid.UUID], np.ndarray, np.ndarray]:
+        """Version, ids, latitudes and longitudes of every vet, for derived indexes"""
+        with self._lock:
+            slots = np.flatnonzero(bits_to_mask(self._occupied_bits, len(self._slot_records)))
+            ids = [self._slot_records[slot].id for slot in slots.tolist()]
+            return self.version, ids, self._latitudes[slots], self._longitudes[slots]
+
+    def _allocate_slot(self) -> int:
+        if not self._free_slots:
+            size = len(self._slot_records)
+            capacity = max(size * 2, 64)
+            self._latitudes = np.resize(self._latitudes, capacity)
+            self._longitudes = np.resize(self._longitudes, capacity)
+            self._slot_records.extend([None] * (capacity - size))
+            self._free_slots = list(range(capacity - 1, size - 1, -1))
+        return self._free_slots.pop()
+
+    def _insert(self, vet: Veterinarian) -> VetRecord:
+        record = VetRecord(
+            id=vet.id,
+            slot=self._allocate_slot(),
+            latitude=vet.latitude,
+            longitude=vet.longitude,
+            specialties=frozenset(vet.specialty or ()),
+            accepts_emergencies=bool(vet.accepts_emergencies),
+            hours_intervals=vet.hours_intervals,
+            timezone=vet.timezone,
+            fragment=encode_vet(vet),
+            digest=vet_digest(vet)
+        )
+        self.digest ^= record.digest
+        self._records[record.id] = record
+        self._slot_records[record.slot] = record
+        self._latitudes[record.slot] = record.latitude
+        self._longitudes[record.slot] = record.longitude
+        self._cells.setdefault(record.cell, set()).add(record.slot)
+
+        bit = 1 << record.slot
+        self._occupied_bits |= bit
+        if record.accepts_emergencies:
+            self._emergency_bits |= bit
+        if record.hours_intervals is not None:
+            self._hours_bits |= bit
+        for specialty in record.specialties:
+            self._specialty_bits[specialty] = self._specialty_bits.get(specialty, 0) | bit
+        return record
+
+    def _discard(self, vet_id: uuid.UUID):
+        record = self._records.pop(vet_id, None)
+        if record is None:
+            return
+
+        self._slot_records[record.slot] = None
+        self._free_slots.append(record.slot)
+        self.digest ^= record.digest
+
+        bit = 1 << record.slot
+        self._occupied_bits &= ~bit
+        self._emergency_bits &= ~bit
+        self._hours_bits &= ~bit
+        for specialty in record.specialties:
+            remaining = self._specialty_bits[specialty] & ~bit
+            if remaining:
+                self._specialty_bits[specialty] = remaining
+            else:
+                del self._specialty_bits[specialty]
+
+        cell = self._cells.get(record.cell)
+        if cell is not None:
+            cell.discard(record.slot)
+            if not cell:
+                del self._cells[record.cell]
+
+    def _candidates(self, latitude: float, longitude: float, radius: float) -> np.ndarray:
+        """Slots in grid cells overlapping the search circle's bounding box"""
+        min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius)
+        min_i, max_i = floor(min_lat / CELL_DEGREES), floor(max_lat / CELL_DEGREES)
+        cell_ranges = [
+            (floor(min_lon / CELL_DEGREES), floor(max_lon / CELL_DEGREES))
+            for min_lon, max_lon in lon_ranges
+        ]
+
+        box_cells = (max_i - min_i + 1) * sum(max_j - min_j + 1 for min_j, max_j in cell_ranges)
+
+        # Scan populated cells instead when the box spans more cells than exist
+        if box_cells > len(self._cells):
+            cells = [
+                slots for (i, j), slots in self._cells.items()
+                if min_i <= i <= max_i and any(min_j <= j <= max_j for min_j, max_j in cell_ranges)
+            ]
+        else:
+            cells = [
+                self._cells[(i, j)]
+                for i in range(min_i, max_i + 1)
+                for min_j, max_j in cell_ranges
+                for j in range(min_j, max_j + 1)
+                if (i, j) in self._cells
+            ]
+
+        if not cells:
+            return np.empty(0, dtype=np.intp)
+        return np.fromiter(
+            (slot for slots in cells for slot in slots),
+            dtype=np.intp,
+            count=sum(len(slots) for slots in cells)
+        )
+
+    def _filter_bits(
+        self,
+        specialties: Optional[List[str]],
+        match_all: bool,
+        accepts_emergencies: Optional[bool],
+        open_at: Optional[datetime] = None
+    ) -> Optional[int]:
+        """Bitset of slots passing the specialty and emergency filters, None when unfiltered
+
+        With open_at, only clinics with known hours are kept; the hours
+        themselves are checked per clinic afterwards.
+        """
+        bits = None
+        if specialties:
+            bits = reduce(and_ if match_all else or_, (self._specialty_bits.get(s, 0) for s in specialties))
+
+        if accepts_emergencies is not None:
+            emergency_bits = self._emergency_bits
+            if not accepts_emergencies:
+                emergency_bits = self._occupied_bits & ~emergency_bits
+            bits = emergency_bits if bits is None else bits & emergency_bits
+
+        if open_at is not None:
+            bits = self._hours_bits if bits is None else bits & self._hours_bits
+
+        return bits
+
+    def filter(
+        self,
+        limit: int,
+        specialties: Optional[List[str]] = None,
+        match_all: bool = False,
+        accepts_emergencies: Optional[bool] = None,
+        open_at: Optional[datetime] = None
+    ) -> List[VetRecord]:
+        """Veterinarians passing the filters, in slot order"""
+        is_open_at = open_checker(open_at) if open_at is not None else None
+
+        with self._lock:
+            bits = self._filter_bits(specialties, match_all, accepts_emergencies, open_at)
+            if bits is None:
+                bits = self._occupied_bits
+
+            records = []
+            while bits and len(records) < limit:
+                lowest = bits & -bits
+                record = self._slot_records[lowest.bit_length() - 1]
+                if is_open_at is None or is_open_at(record.hours_intervals, record.timezone):
+                    records.append(record)
+                bits ^= lowest
+
+        return records
+
+    def search(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        limit: int,
+        specialties: Optional[List[str]] = None,
+        match_all: bool = False,
+        accepts_emergencies: Optional[bool] = None,
+        open_at: Optional[datetime] = None
+    ) -> List[Tuple[VetRecord, float]]:
+        """Nearest veterinarians within a radius, closest first"""
+        with self._lock:
+            bits = self._filter_bits(specialties, match_all, accepts_emergencies, open_at)
+            if bits == 0:
+                return []
+
+            slots = self._candidates(latitude, longitude, radius)
+            if bits is not None:
+                slots = slots[bits_to_mask(bits, len(self._slot_records))[slots]]
+
+            distances = haversine_many(longitude, latitude, self._longitudes[slots], self._latitudes[slots])
+            within = distances <= radius
+            records = [self._slot_records[slot] for slot in slots[within].tolist()]
+
+        results = list(zip(records, distances[within].tolist()))
+        if open_at is not None:
+            is_open_at = open_checker(open_at)
+            results = [
+                result for result in results
+                if is_open_at(result[0].hours_intervals, result[0].timezone)
+            ]
+
+        results.sort(key=lambda result: (result[1], result[0].id))
+        return results[:limit]
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        max_distance: Optional[float] = None,
+        specialties: Optional[List[str]] = None,
+        match_all: bool = False,
+        accepts_emergencies: Optional[bool] = None,
+        open_at: Optional[datetime] = None
+    ) -> List[Tuple[VetRecord, float]]:
+        """The k nearest veterinarians, widening the search radius until k are found"""
+        limit_radius = max_distance or EARTH_RADIUS_KM * pi
+        radius = min(NEAREST_START_RADIUS_KM, limit_radius)
+
+        while True:
+            results = self.search(
+                latitude, longitude, radius, k, specialties, match_all, accepts_emergencies, open_at
+            )
+            if len(results) >= k or radius >= limit_radius:
+                return results
+            radius = min(radius * 2, limit_radius)
+
+
+class VetResponseCache:
+    """LRU of encoded directory responses, dropped whenever the directory changes"""
+
+    def __init__(self, directory: VetDirectory, max_entries: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._version = directory.version
+        self._lock = threading.Lock()
+
+    def key(self, endpoint: str, **params) -> tuple:
+        """Build a cache key; capture it before building the response so racing writes are not cached"""
+        return (self.directory.version, endpoint, tuple(sorted(params.items())))
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def store(self, key: tuple, body: bytes):
+        version = key[0]
+        with self._lock:
+            if version != self.directory.version:
+                return
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+            self._entries[key] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+vet_directory = VetDirectory()
+vet_response_cache = VetResponseCache(vet_directory, settings.VET_CACHE_MAX_ENTRIES)
+
+
+# Serialises reloads, so the one that finishes last also read the database last
+_load_lock = threading.Lock()
+
+
+def load_vet_directory():
+    """Load the directory from the database"""
+    with _load_lock:
+        db = SessionLocal()
+        try:
+            vet_directory.load(db)
+        finally:
+            db.close()
+
+
+def check_vet_directory() -> bool:
+    """Reload the directory if its digest no longer matches the database; True if it did"""
+    if vet_directory.loaded:
+        db = SessionLocal()
+        try:
+            rows = db.query(Veterinarian.id, Veterinarian.updated_at).all()
+        finally:
+            db.close()
+        if reduce(xor, map(vet_digest, rows), 0) == vet_directory.digest:
+            return False
+        print("⚠️  Veterinarian directory was out of date, reloading")
+
+    load_vet_directory()
+    return True
+
+
+async def run_vet_directory_check():
+    """Compare the directory with the database every VET_DIRECTORY_CHECK_SECONDS"""
+    while True:
+        await asyncio.sleep(settings.VET_DIRECTORY_CHECK_SECONDS)
+        try:
+            await asyncio.to_thread(check_vet_directory)
+        except Exception as e:
+            print(f"❌ Veterinarian directory check failed: {e}")
+
+
+def publish_vet_change(vet_id: uuid.UUID):
+    """Tell other workers to reload a veterinarian"""
+    notifier.publish(VET_DIRECTORY_CHANNEL, f"{notifier.origin}:{vet_id}")
+
+
+def publish_vet_reload():
+    """Tell other workers to reload the whole directory, e.g. after a bulk import"""
+    notifier.publish(VET_DIRECTORY_CHANNEL, f"{notifier.origin}:{RELOAD_ALL}")
+
+
+def _on_vet_changed(payload: str):
+    origin, vet_id = payload.split(":", 1)
+    if origin == notifier.origin or not vet_directory.loaded:
+        return
+
+    if vet_id == RELOAD_ALL:
+        load_vet_directory()
+        return
+
+    vet_id = uuid.UUID(vet_id)
+    db = SessionLocal()
+    try:
+        vet = db.query(Veterinarian).filter(Veterinarian.id == vet_id).first()
+        if vet:
+            vet_directory.upsert(vet)
+        else:
+            vet_directory.remove(vet_id)
+    finally:
+        db.close()
+
+
+def _on_listener_connected():
+    # Anything published before LISTEN took effect was missed
+    load_vet_directory()
+
+
+notifier.subscribe(VET_DIRECTORY_CHANNEL, _on_vet_changed)
+notifier.on_connect(_on_listener_connected)
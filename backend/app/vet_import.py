@@ -0,0 +1,219 @@
+"""
+Bulk veterinarian directory import
+
+Records are streamed from CSV or JSON Lines (a top-level JSON array is also
+accepted, but is read whole), validated with VeterinarianCreate and written
+as they arrive in batches of IMPORT_BATCH_SIZE rows, all in one transaction,
+so memory stays bounded by the batch size rather than the file. Each batch is
+one INSERT ... ON CONFLICT on Veterinarian.import_key, the case- and
+whitespace-insensitive (clinic_name, address): clinics already in the database
+are updated in place and new ones inserted. Within a batch the last row for a
+clinic wins and earlier ones count as duplicates; a clinic repeated in a later
+batch updates the row written before and counts as updated.
+"""
+import csv
+import enum
+import io
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.hours import parse_hours
+from app.migrations import vet_import_key_index_exists
+from app.models import Veterinarian
+from app.schemas import VeterinarianCreate
+
+IMPORT_BATCH_SIZE = 1000
+
+# Validation errors reported back; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Separators accepted for the specialty column in CSV files
+SPECIALTY_SEPARATORS = ";|"
+
+
+class ImportUnavailable(Exception):
+    """The unique import key index is missing, so clinics cannot be matched"""
+
+
+class ImportFormat(str, enum.Enum):
+    CSV = "csv"
+    JSON = "json"
+
+
+@dataclass
+class ImportReport:
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[dict] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.received / self.seconds, 1) if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> ImportFormat:
+    name = (filename or "").lower()
+    if name.endswith((".json", ".jsonl", ".ndjson")) or (content_type or "").endswith(("json", "ndjson")):
+        return ImportFormat.JSON
+    return ImportFormat.CSV
+
+
+def _csv_record(row: Dict[str, str]) -> dict:
+    """Turn CSV strings into the shapes VeterinarianCreate expects"""
+    record = {key.strip(): value.strip() for key, value in row.items() if key and value is not None}
+    record = {key: value for key, value in record.items() if value != ""}
+
+    if "specialty" in record:
+        specialty = record["specialty"]
+        for separator in SPECIALTY_SEPARATORS:
+            specialty = specialty.replace(separator, ",")
+        record["specialty"] = [name for name in specialty.split(",") if name.strip()]
+    if "hours" in record:
+        record["hours"] = json.loads(record["hours"])
+    return record
+
+
+def iter_csv(stream: IO[str]) -> Iterator[Tuple[int, dict]]:
+    for line_number, row in enumerate(csv.DictReader(stream), start=2):
+        yield line_number, row
+
+
+def iter_json(stream: IO[str]) -> Iterator[Tuple[int, object]]:
+    """JSON Lines streamed as raw lines; a top-level array is read whole"""
+    first = stream.read(1)
+    while first.isspace():
+        first = stream.read(1)
+
+    if first == "[":
+        for index, record in enumerate(json.loads(first + stream.read()), start=1):
+            yield index, record
+        return
+
+    lines = io.StringIO(first + stream.readline())
+    line_number = 0
+    while True:
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+        lines = stream.readlines(1 << 20)
+        if not lines:
+            return
+
+
+def validated_records(
+    stream: IO[str],
+    import_format: ImportFormat,
+    report: ImportReport
+) -> Iterator[dict]:
+    """Column values for every valid record, ready for insert"""
+    source = iter_csv(stream) if import_format == ImportFormat.CSV else iter_json(stream)
+
+    for location, record in source:
+        report.received += 1
+        try:
+            if import_format == ImportFormat.CSV:
+                record = _csv_record(record)
+            elif isinstance(record, str):
+                record = json.loads(record)
+            values = VeterinarianCreate.model_validate(record).model_dump()
+        except (ValidationError, ValueError, TypeError) as e:
+            report.invalid += 1
+            if len(report.errors) < MAX_REPORTED_ERRORS:
+                message = e.errors(include_url=False) if isinstance(e, ValidationError) else str(e)
+                report.errors.append({"row": location, "error": message})
+            continue
+
+        values["hours_intervals"] = parse_hours(values["hours"])
+        yield values
+
+
+def dedupe_key(clinic_name: str, address: str) -> Tuple[str, str]:
+    """Python side of VET_IMPORT_KEY_SQL"""
+    return " ".join(clinic_name.lower().split()), " ".join(address.lower().split())
+
+
+def _upsert(db: Session, batch: Dict[Tuple[str, str], dict], report: ImportReport):
+    """Write one batch of distinct clinics and count the inserts and updates"""
+    now = datetime.utcnow()
+    statement = insert(Veterinarian).values([
+        {**values, "id": uuid.uuid4(), "created_at": now, "updated_at": now}
+        for values in batch.values()
+    ])
+    columns = next(iter(batch.values())).keys()
+    statement = statement.on_conflict_do_update(
+        index_elements=["import_key"],
+        set_={**{name: statement.excluded[name] for name in columns}, "updated_at": now}
+    ).returning(
+        # xmax is only zero on a freshly inserted row version
+        literal_column("xmax = 0")
+    )
+
+    inserted = sum(1 for (was_inserted,) in db.execute(statement) if was_inserted)
+    report.inserted += inserted
+    report.updated += len(batch) - inserted
+    batch.clear()
+
+
+def import_veterinarians(
+    db: Session,
+    stream: IO[str],
+    import_format: ImportFormat,
+    dry_run: bool = False
+) -> ImportReport:
+    """Validate and upsert every record in the stream; commits unless dry_run"""
+    if not vet_import_key_index_exists(db.connection()):
+        raise ImportUnavailable(
+            "Veterinarians sharing a clinic name and address must be merged before bulk imports "
+            "(the ux_veterinarians_import_key index could not be created)"
+        )
+
+    report = ImportReport()
+    started = time.perf_counter()
+
+    # One statement cannot upsert the same clinic twice, so each batch keeps
+    # only the last row per clinic
+    batch: Dict[Tuple[str, str], dict] = {}
+    for values in validated_records(stream, import_format, report):
+        key = dedupe_key(values["clinic_name"], values["address"])
+        if batch.pop(key, None) is not None:
+            report.duplicates += 1
+        batch[key] = values
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _upsert(db, batch, report)
+    if batch:
+        _upsert(db, batch, report)
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,50 @@
+"""
+Shared helpers for the benchmark scripts
+
+Benchmarks run against the database configured by DATABASE_URL, so point it
+at a disposable PostgreSQL instance (and set DEBUG=False to silence SQL
+echo) before running them.
+"""
+import os
+import sys
+import uuid
+
+# Allow running as `python benchmarks/<script>.py` from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth import hash_password, create_access_token  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+def create_bench_user(db) -> tuple:
+    """Create a throwaway user and return it with a valid access token"""
+    user = User(
+        email=f"bench-{uuid.uuid4().hex[:12]}@pawmetric.dev",
+        password=hash_password("benchmark-password"),
+        name="Benchmark User"
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+    token = create_access_token(data={"sub": str(user.id), "email": user.email})
+    return user, token
+
+
+def percentile(samples: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(label: str, samples_ms: list):
+    """Print a one-line latency summary for a list of millisecond samples"""
+    print(
+        f"{label:<40} n={len(samples_ms):<6} "
+        f"p50={percentile(samples_ms, 50):8.3f}ms "
+        f"p95={percentile(samples_ms, 95):8.3f}ms "
+        f"p99={percentile(samples_ms, 99):8.3f}ms"
+    )
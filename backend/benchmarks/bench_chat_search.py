@@ -0,0 +1,177 @@
+"""
+Benchmark chat history search for a user with a long history
+
+Seeds one user with a synthetic chat history spread over the past months
+(100k messages by default, with partitions created for every month), then
+compares an unindexed ILIKE scan of the user's messages with
+GET /chat/search for common, rare and multi-word queries, and the second
+page through the cursor.
+
+Usage:
+    python benchmarks/bench_chat_search.py --messages 100000 --queries 100
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from _common import create_bench_user, report
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import ChatMessage, User
+from app.partitions import ensure_partitions, is_partitioned, month_start
+from main import app
+
+SEED_CHUNK = 5000
+
+USER_LINES = [
+    "he has been limping on his back leg since our walk",
+    "she is not eating much and seems tired today",
+    "is it normal for a puppy to sleep this much",
+    "we noticed some redness around the left ear",
+    "can I give her the flea treatment with the dewormer",
+    "the vomiting stopped but he is drinking a lot of water",
+    "when should we book the booster vaccination",
+    "his stool has been soft for two days",
+]
+VET_LINES = [
+    "keep an eye on the leg and rest him for a few days",
+    "offer small bland meals of rice and chicken",
+    "puppies often sleep eighteen hours a day which is normal",
+    "clean the ear gently and book a check if the redness spreads",
+    "yes both treatments are safe to give together",
+    "increased thirst after vomiting is common but call us if it continues",
+    "the booster is due three weeks after the first dose",
+    "add some pumpkin to the food and keep him hydrated",
+]
+# Rare words appear in about one message in a thousand
+RARE_WORDS = ["heartworm", "cruciate", "pancreatitis", "microchip", "xylitol"]
+
+QUERIES = {
+    "common word": ["leg", "water", "ear", "food", "vaccination"],
+    "rare word": RARE_WORDS,
+    "phrase": ['"back leg"', '"flea treatment"', '"bland meals"'],
+    "several words": ["limping walk rest", "vomiting thirst", "booster dose"],
+}
+
+
+def seed_history(user_id: uuid.UUID, messages: int, months: int):
+    """Insert messages evenly spaced over the past months"""
+    now = datetime.utcnow()
+    oldest = now - timedelta(days=30 * months)
+    step = (now - oldest) / max(messages, 1)
+
+    with engine.begin() as connection:
+        if is_partitioned(connection, ChatMessage.__tablename__):
+            ensure_partitions(
+                connection,
+                ChatMessage.__tablename__,
+                "created_at",
+                settings.PARTITION_MONTHS_AHEAD,
+                start=month_start(oldest)
+            )
+
+    db = SessionLocal()
+    try:
+        for start in range(0, messages, SEED_CHUNK):
+            rows = []
+            for i in range(start, min(start + SEED_CHUNK, messages)):
+                from_user = random.random() < 0.5
+                text = random.choice(USER_LINES if from_user else VET_LINES)
+                if random.random() < 0.001 * len(RARE_WORDS):
+                    text += f" and the {random.choice(RARE_WORDS)} question"
+                rows.append({
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "message": text,
+                    "is_from_user": from_user,
+                    "created_at": oldest + step * i,
+                })
+            db.execute(insert(ChatMessage), rows)
+            db.commit()
+    finally:
+        db.close()
+
+
+def ilike_search(db, user_id: uuid.UUID, q: str, limit: int) -> list:
+    """Substring match of every term; every one of the user's messages is read"""
+    query = db.query(ChatMessage).filter(ChatMessage.user_id == user_id)
+    for term in q.strip('"').split():
+        query = query.filter(ChatMessage.message.ilike(f"%{term}%"))
+    return query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--months", type=int, default=12, help="Months the history is spread over")
+    parser.add_argument("--queries", type=int, default=100, help="Searches per query kind")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark user and messages")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user, token = create_bench_user(db)
+    user_id = user.id
+    db.close()
+
+    try:
+        started = time.perf_counter()
+        seed_history(user_id, args.messages, args.months)
+        print(f"Seeded {args.messages:,} messages in {time.perf_counter() - started:.1f}s")
+
+        headers = {"Authorization": f"Bearer {token}"}
+        with TestClient(app) as client:
+            for kind, queries in QUERIES.items():
+                baseline, searched, next_page, found = [], [], [], 0
+                db = SessionLocal()
+                try:
+                    for _ in range(args.queries):
+                        q = random.choice(queries)
+
+                        start = time.perf_counter()
+                        ilike_search(db, user_id, q, args.limit)
+                        baseline.append((time.perf_counter() - start) * 1000)
+                        db.expire_all()
+
+                        start = time.perf_counter()
+                        data = client.get(
+                            "/api/v1/chat/search", params={"q": q, "limit": args.limit}, headers=headers
+                        ).json()["data"]
+                        searched.append((time.perf_counter() - start) * 1000)
+                        found += len(data["results"])
+
+                        if data["has_more"]:
+                            start = time.perf_counter()
+                            client.get(
+                                "/api/v1/chat/search",
+                                params={"q": q, "limit": args.limit, "before": data["cursor"]},
+                                headers=headers,
+                            )
+                            next_page.append((time.perf_counter() - start) * 1000)
+                finally:
+                    db.close()
+
+                print(f"\n{kind} ({found / args.queries:.1f} results per page)")
+                report("  ILIKE scan (query only)", baseline)
+                report("  GET /chat/search", searched)
+                if next_page:
+                    report("  GET /chat/search?before= (page 2)", next_page)
+    finally:
+        if not args.keep:
+            db = SessionLocal()
+            try:
+                # Messages go with the user (ON DELETE CASCADE)
+                db.query(User).filter(User.id == user_id).delete()
+                db.commit()
+            finally:
+                db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark the pet dashboard endpoint
+
+Compares the previous six sequential queries against the current endpoint,
+both for full responses and for conditional (If-None-Match) polling.
+
+Usage:
+    python benchmarks/bench_dashboard.py --scans 500 --activities 20000 --requests 200
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from _common import create_bench_user, report
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models import Pet, HealthScore, HealthScan, Activity, ScanType, ScanStatus, ActivityType
+from main import app
+
+
+def seed_pet(db, user, scans: int, activities: int) -> Pet:
+    """Create a pet with the requested amount of history"""
+    pet = Pet(user_id=user.id, name="Benchmark", breed="Beagle", age=4)
+    db.add(pet)
+    db.commit()
+    db.refresh(pet)
+    db.add(HealthScore(pet_id=pet.id, overall_score=88))
+
+    now = datetime.utcnow()
+    db.add_all([
+        HealthScan(
+            pet_id=pet.id,
+            scan_type=random.choice(list(ScanType)),
+            image_url="/uploads/scans/bench.jpg",
+            status=ScanStatus.COMPLETED,
+            score=random.randint(70, 99),
+            scanned_at=now - timedelta(hours=i)
+        )
+        for i in range(scans)
+    ])
+    db.add_all([
+        Activity(
+            pet_id=pet.id,
+            type=random.choice(list(ActivityType)),
+            title="Benchmark activity",
+            timestamp=now - timedelta(minutes=i)
+        )
+        for i in range(activities)
+    ])
+    db.commit()
+    return pet
+
+
+def legacy_dashboard_queries(db, pet_id):
+    """The six sequential queries issued by the endpoint before it was reworked"""
+    pet = db.query(Pet).filter(Pet.id == pet_id).first()
+    health_score = db.query(HealthScore).filter(HealthScore.pet_id == pet_id).first()
+    recent_scans = db.query(HealthScan).filter(
+        HealthScan.pet_id == pet_id
+    ).order_by(HealthScan.scanned_at.desc()).limit(5).all()
+    recent_activities = db.query(Activity).filter(
+        Activity.pet_id == pet_id
+    ).order_by(Activity.timestamp.desc()).limit(10).all()
+    total_scans = db.query(func.count(HealthScan.id)).filter(HealthScan.pet_id == pet_id).scalar()
+    total_activities = db.query(func.count(Activity.id)).filter(Activity.pet_id == pet_id).scalar()
+    return pet, health_score, recent_scans, recent_activities, total_scans, total_activities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scans", type=int, default=500)
+    parser.add_argument("--activities", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user, token = create_bench_user(db)
+        pet = seed_pet(db, user, args.scans, args.activities)
+        pet_id = pet.id
+
+        legacy = []
+        for _ in range(args.requests):
+            db.expire_all()
+            start = time.perf_counter()
+            legacy_dashboard_queries(db, pet_id)
+            legacy.append((time.perf_counter() - start) * 1000)
+        report("legacy queries (no serialization)", legacy)
+
+        with TestClient(app) as client:
+            headers = {"Authorization": f"Bearer {token}"}
+            url = f"/api/v1/analytics/pet/{pet_id}/dashboard"
+
+            full = []
+            etag = None
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                response = client.get(url, headers=headers)
+                full.append((time.perf_counter() - start) * 1000)
+                etag = response.headers["etag"]
+            report("GET dashboard (200)", full)
+
+            conditional = []
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                response = client.get(url, headers={**headers, "If-None-Match": etag})
+                conditional.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 304
+            report("GET dashboard If-None-Match (304)", conditional)
+
+        db.delete(pet)
+        db.delete(user)
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark streaming exports of a pet's history
+
+Seeds a pet with many activities, then streams the export in a fresh process
+per format and reports throughput and peak RSS.
+
+Usage:
+    python benchmarks/bench_export.py --activities 1000000
+    python benchmarks/bench_export.py --pet-id <uuid>   # reuse an existing pet
+"""
+import argparse
+import multiprocessing
+import random
+import resource
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from _common import create_bench_user
+
+from sqlalchemy import func, insert
+
+from app.database import SessionLocal
+from app.models import Pet, Activity, ActivityType
+
+SEED_CHUNK = 10000
+
+
+def seed_pet(activities: int) -> uuid.UUID:
+    db = SessionLocal()
+    try:
+        user, _ = create_bench_user(db)
+        pet = Pet(user_id=user.id, name="Export Benchmark", breed="Beagle", age=4)
+        db.add(pet)
+        db.commit()
+
+        now = datetime.utcnow()
+        types = list(ActivityType)
+        for start in range(0, activities, SEED_CHUNK):
+            db.execute(insert(Activity), [
+                {
+                    "id": uuid.uuid4(),
+                    "pet_id": pet.id,
+                    "type": random.choice(types),
+                    "title": "Benchmark activity",
+                    "description": "Seeded for the export benchmark",
+                    "data": {"duration_minutes": random.randint(5, 60)},
+                    "timestamp": now - timedelta(minutes=i),
+                    "created_at": now,
+                }
+                for i in range(start, min(start + SEED_CHUNK, activities))
+            ])
+            db.commit()
+            print(f"  seeded {min(start + SEED_CHUNK, activities):,} activities", end="\r")
+        print()
+        return pet.id
+    finally:
+        db.close()
+
+
+def measure(pet_id: uuid.UUID, export_format: str, rows: int):
+    """Run one export in this (fresh) process and print its statistics"""
+    from app.exports import ExportDataset, ExportFormat, stream_export
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    total_bytes = 0
+    chunks = 0
+    for chunk in stream_export(pet_id, ExportDataset.ACTIVITIES, ExportFormat(export_format)):
+        total_bytes += len(chunk)
+        chunks += 1
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(
+        f"{export_format:<8} rows={rows:,} bytes={total_bytes / 1e6:8.1f}MB chunks={chunks:<5} "
+        f"time={elapsed:6.2f}s rows/s={rows / elapsed:12,.0f} MB/s={total_bytes / 1e6 / elapsed:6.1f} "
+        f"peak_rss={rss_after / 1024:7.1f}MB (+{(rss_after - rss_before) / 1024:.1f}MB during export)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--activities", type=int, default=1_000_000)
+    parser.add_argument("--pet-id", type=uuid.UUID, default=None)
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet"])
+    args = parser.parse_args()
+
+    pet_id = args.pet_id or seed_pet(args.activities)
+
+    db = SessionLocal()
+    try:
+        rows = db.query(func.count(Activity.id)).filter(Activity.pet_id == pet_id).scalar()
+    finally:
+        db.close()
+
+    # A fresh process per format keeps seeding and other runs out of peak RSS
+    context = multiprocessing.get_context("spawn")
+    for export_format in args.formats:
+        process = context.Process(target=measure, args=(pet_id, export_format, rows))
+        process.start()
+        process.join()
+
+    print(f"Pet id: {pet_id} (pass --pet-id to rerun without seeding)")
+
+
+if __name__ == "__main__":
+    main()
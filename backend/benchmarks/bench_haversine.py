@@ -0,0 +1,103 @@
+"""
+Benchmark scalar versus vectorized great circle distance
+
+Computes distances from a fixed point to random coordinates with the scalar
+haversine() in a Python loop and with haversine_many() over NumPy arrays,
+checks the results agree and reports the speedup. Also times walk route
+lengths with path_length_km(). Does not need a database.
+
+Usage:
+    python benchmarks/bench_haversine.py --sizes 1000 100000 1000000
+"""
+import argparse
+import time
+
+import _common  # noqa: F401  (adds the backend directory to sys.path)
+
+import numpy as np
+
+from app.geo import haversine, haversine_many, path_length_km
+
+ORIGIN = (37.7749, -122.4194)
+
+# Agreement with the scalar function, in kilometers
+TOLERANCE_KM = 1e-9
+
+
+def best_of(repeats: int, fn):
+    """Fastest wall time of several runs and the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bench_point_distances(size: int, repeats: int, rng):
+    lats = np.ascontiguousarray(rng.uniform(-90, 90, size))
+    lons = np.ascontiguousarray(rng.uniform(-180, 180, size))
+    lat, lon = ORIGIN
+
+    lat_list, lon_list = lats.tolist(), lons.tolist()
+    scalar_time, scalar = best_of(
+        1 if size > 100_000 else repeats,
+        lambda: [haversine(lon, lat, x, y) for x, y in zip(lon_list, lat_list)]
+    )
+    vector_time, vector = best_of(repeats, lambda: haversine_many(lon, lat, lons, lats))
+
+    error = float(np.max(np.abs(vector - np.array(scalar)))) if size else 0.0
+    status = "ok" if error <= TOLERANCE_KM else "MISMATCH"
+    print(
+        f"points {size:>9,}  scalar {scalar_time * 1000:10.2f}ms  "
+        f"vectorized {vector_time * 1000:8.2f}ms  "
+        f"speedup {scalar_time / vector_time:7.1f}x  max error {error:.2e}km  {status}"
+    )
+    return error <= TOLERANCE_KM
+
+
+def bench_route_length(size: int, repeats: int, rng):
+    # A random walk with steps of a few meters
+    lats = ORIGIN[0] + np.cumsum(rng.normal(0, 2e-5, size))
+    lons = ORIGIN[1] + np.cumsum(rng.normal(0, 2e-5, size))
+
+    lat_list, lon_list = lats.tolist(), lons.tolist()
+    scalar_time, scalar = best_of(
+        1 if size > 100_000 else repeats,
+        lambda: sum(
+            haversine(lon_list[i], lat_list[i], lon_list[i + 1], lat_list[i + 1])
+            for i in range(size - 1)
+        )
+    )
+    vector_time, vector = best_of(repeats, lambda: path_length_km(lons, lats))
+
+    error = abs(vector - scalar)
+    status = "ok" if error <= TOLERANCE_KM * size else "MISMATCH"
+    print(
+        f"route  {size:>9,}  scalar {scalar_time * 1000:10.2f}ms  "
+        f"vectorized {vector_time * 1000:8.2f}ms  "
+        f"speedup {scalar_time / vector_time:7.1f}x  length {vector:.3f}km  {status}"
+    )
+    return status == "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    passed = True
+    for size in args.sizes:
+        passed &= bench_point_distances(size, args.repeats, rng)
+    for size in args.sizes:
+        passed &= bench_route_length(size, args.repeats, rng)
+
+    if not passed:
+        raise SystemExit("Vectorized distances do not match the scalar function")
+
+
+if __name__ == "__main__":
+    main()
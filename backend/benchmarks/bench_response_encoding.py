@@ -0,0 +1,170 @@
+"""
+Benchmark JSON response encoding per endpoint
+
+Builds representative payloads from unsaved model instances (a pet list, a
+page of activities, a chat sync page, conversations and the pet dashboard)
+and times turning each into response bytes the way FastAPI does:
+response_model=dict with JSONResponse (before) against the typed
+SuccessResponse model with ORJSONResponse (after), plus the analytics cache
+encoding with jsonable_encoder against pydantic_core.to_json. Checks that
+both produce the same JSON. Does not need a database.
+
+Usage:
+    python benchmarks/bench_response_encoding.py --iterations 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import _common  # noqa: F401  (adds the backend directory to sys.path)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from pydantic_core import to_json
+
+from app.models import Activity, ActivityType, ChatMessage, HealthScan, HealthScore, Pet, ScanStatus, ScanType
+from app.schemas import (
+    ActivityListData, ActivityResponse, ChatMessagePage, ChatMessageResponse, ConversationListData,
+    HealthScanResponse, HealthScoreResponse, PetDashboardData, PetListData, PetResponse, PetStatistics,
+    SuccessResponse
+)
+
+STARTED = datetime(2026, 1, 1, 9, 0)
+
+
+def make_pet(rng: random.Random, user_id: uuid.UUID) -> Pet:
+    pet = Pet(
+        id=uuid.uuid4(), user_id=user_id, name=rng.choice(["Rex", "Luna", "Milo", "Bella"]),
+        breed=rng.choice(["Beagle", "Labrador", "Siamese"]), age=rng.randint(1, 14),
+        weight=round(rng.uniform(3, 40), 1), gender="female", created_at=STARTED, updated_at=STARTED
+    )
+    pet.health_score = HealthScore(
+        id=uuid.uuid4(), pet_id=pet.id, overall_score=rng.randint(70, 98),
+        eye_score=rng.randint(70, 98), dental_score=rng.randint(70, 98), last_updated=STARTED
+    )
+    return pet
+
+
+def make_activity(rng: random.Random, pet_id: uuid.UUID, i: int) -> Activity:
+    walk = rng.random() < 0.5
+    return Activity(
+        id=uuid.uuid4(), pet_id=pet_id, type=ActivityType.WALK if walk else ActivityType.MEAL,
+        title="Morning walk" if walk else "Breakfast", description="Around the park",
+        data={"route": [[37.77 + j / 1e4, -122.41 + j / 1e4] for j in range(20)], "distance_km": 1.8} if walk
+        else {"grams": 120},
+        timestamp=STARTED + timedelta(hours=i), created_at=STARTED + timedelta(hours=i)
+    )
+
+
+def make_scan(rng: random.Random, pet_id: uuid.UUID, i: int) -> HealthScan:
+    return HealthScan(
+        id=uuid.uuid4(), pet_id=pet_id, scan_type=rng.choice(list(ScanType)), image_url="/uploads/scans/x.jpg",
+        status=ScanStatus.COMPLETED, score=rng.randint(70, 98),
+        findings={"status": "healthy", "details": "No abnormalities detected.", "confidence": 0.9},
+        scanned_at=STARTED + timedelta(days=i)
+    )
+
+
+def make_message(rng: random.Random, user_id: uuid.UUID, i: int) -> ChatMessage:
+    return ChatMessage(
+        id=uuid.uuid4(), user_id=user_id, vet_id=uuid.uuid4(), message="is this normal " * rng.randint(1, 8),
+        is_from_user=rng.random() < 0.5, created_at=STARTED + timedelta(seconds=i)
+    )
+
+
+def build_payloads(rng: random.Random) -> list:
+    """(name, response model, payload) as the routes return them"""
+    user_id = uuid.uuid4()
+    pets = [make_pet(rng, user_id) for _ in range(10)]
+    pet = pets[0]
+    activities = [make_activity(rng, pet.id, i) for i in range(50)]
+    scans = [make_scan(rng, pet.id, i) for i in range(5)]
+    messages = [make_message(rng, user_id, i) for i in range(200)]
+
+    return [
+        ("pets (10)", PetListData, {"pets": [PetResponse.model_validate(p) for p in pets]}),
+        ("activities (50)", ActivityListData, {
+            "activities": [ActivityResponse.model_validate(a) for a in activities]
+        }),
+        ("chat sync page (200)", ChatMessagePage, {
+            "messages": [ChatMessageResponse.model_validate(m) for m in messages],
+            "cursor": f"{messages[-1].created_at.isoformat()}_{messages[-1].id}",
+            "has_more": True,
+        }),
+        ("conversations (20)", ConversationListData, {
+            "conversations": [
+                {"vet_id": m.vet_id, "last_message": ChatMessageResponse.model_validate(m), "unread_count": i}
+                for i, m in enumerate(messages[:20])
+            ],
+            "unread_count": 190,
+        }),
+        ("pet dashboard", PetDashboardData, PetDashboardData(
+            pet=PetResponse.model_validate(pet),
+            health_score=HealthScoreResponse.model_validate(pet.health_score),
+            recent_scans=[HealthScanResponse.model_validate(s) for s in scans],
+            recent_activities=[ActivityResponse.model_validate(a) for a in activities[:10]],
+            statistics=PetStatistics(total_scans=5, total_activities=50)
+        )),
+    ]
+
+
+def response_field(response_model):
+    return APIRoute("/", lambda: None, response_model=response_model).secure_cloned_response_field
+
+
+async def time_route(field, response_class, payload: dict, iterations: int) -> tuple:
+    """Microseconds per response through FastAPI's validate, serialize and render steps"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        content = await serialize_response(field=field, response_content=payload)
+        body = response_class(content).body
+    return (time.perf_counter() - started) / iterations * 1e6, body
+
+
+def time_cache(encode, payload: dict, iterations: int) -> tuple:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        body = encode(payload)
+    return (time.perf_counter() - started) / iterations * 1e6, body
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    print(f"{'endpoint':<24}{'bytes':>9}{'dict+json us':>15}{'typed+orjson us':>18}{'speedup':>9}"
+          f"{'cache before us':>17}{'cache after us':>16}{'speedup':>9}")
+
+    for name, data_model, data in build_payloads(rng):
+        payload = {"success": True, "data": data}
+
+        before, before_body = await time_route(response_field(dict), JSONResponse, payload, args.iterations)
+        after, after_body = await time_route(
+            response_field(SuccessResponse[data_model]), ORJSONResponse, payload, args.iterations
+        )
+        cache_before, cache_before_body = time_cache(
+            lambda p: JSONResponse(content=jsonable_encoder(p)).body, payload, args.iterations
+        )
+        cache_after, cache_after_body = time_cache(to_json, payload, args.iterations)
+
+        bodies = [before_body, after_body, cache_before_body, cache_after_body]
+        if any(json.loads(body) != json.loads(before_body) for body in bodies):
+            raise SystemExit(f"{name}: encodings disagree")
+
+        print(f"{name:<24}{len(after_body):>9}{before:>15.1f}{after:>18.1f}{before / after:>8.1f}x"
+              f"{cache_before:>17.1f}{cache_after:>16.1f}{cache_before / cache_after:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
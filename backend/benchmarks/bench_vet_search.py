@@ -0,0 +1,115 @@
+"""
+Benchmark veterinarian radius search on a large directory
+
+Seeds a synthetic directory of clinics, then compares the previous
+implementation (limit, then haversine in Python) with the current endpoint
+for latency and for how many in-radius clinics each one returns.
+
+Usage:
+    python benchmarks/bench_vet_search.py --clinics 100000 --queries 200
+"""
+import argparse
+import random
+import time
+import uuid
+
+from _common import report
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+from app.models import Veterinarian
+from app.geo import haversine
+from main import app
+
+SEED_CHUNK = 5000
+BENCH_CITY = "Benchtown"
+
+# Synthetic clinics are spread over the continental United States
+LAT_RANGE = (25.0, 49.0)
+LON_RANGE = (-124.0, -67.0)
+SPECIALTIES = ["General Practice", "Surgery", "Dentistry", "Cardiology", "Emergency Care", "Dermatology"]
+
+
+def seed_directory(clinics: int):
+    db = SessionLocal()
+    try:
+        existing = db.query(Veterinarian).filter(Veterinarian.city == BENCH_CITY).count()
+        for start in range(existing, clinics, SEED_CHUNK):
+            db.execute(insert(Veterinarian), [
+                {
+                    "id": uuid.uuid4(),
+                    "name": f"Dr. Bench {i}",
+                    "clinic_name": f"Bench Clinic {i}",
+                    "specialty": random.sample(SPECIALTIES, 2),
+                    "address": f"{i} Benchmark Ave",
+                    "city": BENCH_CITY,
+                    "state": "CA",
+                    "zip_code": "00000",
+                    "latitude": random.uniform(*LAT_RANGE),
+                    "longitude": random.uniform(*LON_RANGE),
+                    "review_count": 0,
+                    "accepts_emergencies": random.random() < 0.2,
+                }
+                for i in range(start, min(start + SEED_CHUNK, clinics))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+def legacy_search(db, latitude: float, longitude: float, radius: float, limit: int) -> list:
+    """The previous implementation: arbitrary rows first, then distance in Python"""
+    vets = db.query(Veterinarian).limit(limit).all()
+    results = []
+    for vet in vets:
+        distance = haversine(longitude, latitude, vet.longitude, vet.latitude)
+        if distance <= radius:
+            results.append((vet, distance))
+    results.sort(key=lambda x: x[1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clinics", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=50)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    seed_directory(args.clinics)
+    points = [(random.uniform(*LAT_RANGE), random.uniform(*LON_RANGE)) for _ in range(args.queries)]
+
+    db = SessionLocal()
+    legacy, legacy_found = [], 0
+    try:
+        for latitude, longitude in points:
+            start = time.perf_counter()
+            legacy_found += len(legacy_search(db, latitude, longitude, args.radius, args.limit))
+            legacy.append((time.perf_counter() - start) * 1000)
+            db.expire_all()
+    finally:
+        db.close()
+
+    current, current_found = [], 0
+    with TestClient(app) as client:
+        for latitude, longitude in points:
+            start = time.perf_counter()
+            response = client.get("/api/v1/veterinarians", params={
+                "latitude": latitude,
+                "longitude": longitude,
+                "radius": args.radius,
+                "limit": args.limit,
+            })
+            current.append((time.perf_counter() - start) * 1000)
+            current_found += len(response.json()["data"]["veterinarians"])
+
+    report("legacy limit-then-filter (queries only)", legacy)
+    report("GET /veterinarians (bounding box + SQL)", current)
+    print(f"Clinics returned within {args.radius}km: legacy={legacy_found:,} current={current_found:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark veterinarian text search on a large directory
+
+Seeds a synthetic directory of clinics with varied names, cities and
+descriptions, then compares an unindexed ILIKE scan (what a naive `q` filter
+would do) with GET /veterinarians?q=..., with and without coordinates.
+
+Usage:
+    python benchmarks/bench_vet_text_search.py --clinics 100000 --queries 200
+"""
+import argparse
+import random
+import time
+import uuid
+
+from _common import report
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, or_
+
+from app.database import SessionLocal
+from app.models import Veterinarian
+from app.vet_directory import vet_response_cache
+from main import app
+
+SEED_CHUNK = 5000
+BENCH_STATE = "BX"
+
+LAT_RANGE = (25.0, 49.0)
+LON_RANGE = (-124.0, -67.0)
+
+PREFIXES = ["Happy", "Healthy", "Gentle", "Sunny", "Riverside", "Oakwood", "Harbor", "Maple", "Summit", "Valley"]
+ANIMALS = ["Paws", "Tails", "Whiskers", "Pets", "Critters", "Hounds", "Companions"]
+KINDS = ["Veterinary Clinic", "Animal Hospital", "Pet Care Center", "Vet Practice"]
+CITIES = ["Springfield", "Riverton", "Fairview", "Georgetown", "Madison", "Clinton", "Franklin", "Greenville"]
+SURNAMES = ["Johnson", "Chen", "Rodriguez", "Patel", "Nguyen", "Kowalski", "Okafor", "Larsen"]
+SERVICES = ["dental cleaning", "orthopedic surgery", "exotic birds", "cat-only care", "emergency triage",
+            "dermatology", "vaccinations", "senior pet wellness"]
+
+QUERIES = ["happy paws", "animal hospital riverton", "dental", "Dr Chen", "exotic birds",
+           "oakwood", "harbr tails", "summit pet care", "surgery fairview", "whiskers"]
+
+
+def seed_directory(clinics: int):
+    db = SessionLocal()
+    try:
+        existing = db.query(Veterinarian).filter(Veterinarian.state == BENCH_STATE).count()
+        for start in range(existing, clinics, SEED_CHUNK):
+            db.execute(insert(Veterinarian), [
+                {
+                    "id": uuid.uuid4(),
+                    "name": f"Dr. {random.choice(SURNAMES)}",
+                    "clinic_name": f"{random.choice(PREFIXES)} {random.choice(ANIMALS)} {random.choice(KINDS)}",
+                    "address": f"{i} Benchmark Ave",
+                    "city": random.choice(CITIES),
+                    "state": BENCH_STATE,
+                    "zip_code": "00000",
+                    "latitude": random.uniform(*LAT_RANGE),
+                    "longitude": random.uniform(*LON_RANGE),
+                    "description": f"Offering {random.choice(SERVICES)} and {random.choice(SERVICES)}",
+                    "review_count": 0,
+                    "accepts_emergencies": random.random() < 0.2,
+                }
+                for i in range(start, min(start + SEED_CHUNK, clinics))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+def ilike_search(db, q: str, limit: int) -> list:
+    """Substring match of every term over every column; no index can help"""
+    query = db.query(Veterinarian)
+    for term in q.split():
+        pattern = f"%{term}%"
+        query = query.filter(or_(
+            Veterinarian.name.ilike(pattern),
+            Veterinarian.clinic_name.ilike(pattern),
+            Veterinarian.city.ilike(pattern),
+            Veterinarian.description.ilike(pattern),
+        ))
+    return query.limit(limit).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clinics", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    seed_directory(args.clinics)
+    searches = [
+        (random.choice(QUERIES), random.uniform(*LAT_RANGE), random.uniform(*LON_RANGE))
+        for _ in range(args.queries)
+    ]
+
+    db = SessionLocal()
+    baseline = []
+    try:
+        for q, _, _ in searches:
+            start = time.perf_counter()
+            ilike_search(db, q, args.limit)
+            baseline.append((time.perf_counter() - start) * 1000)
+            db.expire_all()
+    finally:
+        db.close()
+
+    text_only, with_location, found = [], [], 0
+    with TestClient(app) as client:
+        for q, latitude, longitude in searches:
+            # Measure the query, not the response cache
+            vet_response_cache.clear()
+            start = time.perf_counter()
+            response = client.get("/api/v1/veterinarians", params={"q": q, "limit": args.limit})
+            text_only.append((time.perf_counter() - start) * 1000)
+            found += len(response.json()["data"]["veterinarians"])
+
+            start = time.perf_counter()
+            client.get("/api/v1/veterinarians", params={
+                "q": q,
+                "latitude": latitude,
+                "longitude": longitude,
+                "radius": args.radius,
+                "limit": args.limit,
+            })
+            with_location.append((time.perf_counter() - start) * 1000)
+
+    report("ILIKE scan (queries only)", baseline)
+    report("GET /veterinarians?q=", text_only)
+    report("GET /veterinarians?q=&latitude&longitude", with_location)
+    print(f"Average matches returned per text query: {found / len(searches):.1f}")
+
+
+if __name__ == "__main__":
+    main()
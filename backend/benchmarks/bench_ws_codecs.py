@@ -0,0 +1,140 @@
+"""
+Benchmark chat WebSocket frame formats and fan-out encoding
+
+For pongs, single chat messages and reconnect sync frames, reports bytes on
+the wire for JSON and MessagePack, raw and after per-message deflate (with
+and without context takeover), and the CPU cost of fanning one event out to
+many connections: encoding per connection as send_json did versus encoding
+once per codec with Frame. Does not need a database.
+
+Usage:
+    python benchmarks/bench_ws_codecs.py --connections 10000
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+import _common  # noqa: F401  (adds the backend directory to sys.path)
+
+from app.chat_codec import Codec, Frame
+
+WORDS = (
+    "hi the vet said his appetite is back but he is still limping a little after "
+    "our walk this morning should we book a follow up or keep an eye on it for now "
+    "thanks she ate half her food and drank plenty of water"
+).split()
+
+
+def chat_event(rng: random.Random, created_at: datetime) -> dict:
+    return {
+        "type": "new_message",
+        "data": {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "vet_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "message": " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30))),
+            "is_from_user": rng.random() < 0.5,
+            "created_at": created_at.isoformat()
+        }
+    }
+
+
+def sync_frame(rng: random.Random, size: int) -> dict:
+    started = datetime(2026, 1, 1, 9, 0)
+    messages = [chat_event(rng, started + timedelta(seconds=i))["data"] for i in range(size)]
+    return {
+        "type": "sync",
+        "data": {"messages": messages, "cursor": f"{messages[-1]['created_at']}_{messages[-1]['id']}", "has_more": False}
+    }
+
+
+def deflate_sizes(frames: list) -> tuple:
+    """Average deflated size with a fresh context per message and with context takeover"""
+    fresh = 0
+    shared = zlib.compressobj(wbits=-15)
+    taken_over = 0
+    for data in frames:
+        raw = data.encode() if isinstance(data, str) else data
+        compressor = zlib.compressobj(wbits=-15)
+        fresh += len(compressor.compress(raw) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+        taken_over += len(shared.compress(raw) + shared.flush(zlib.Z_SYNC_FLUSH)) - 4
+    return fresh / len(frames), taken_over / len(frames)
+
+
+def bench_sizes(name: str, messages: list):
+    legacy = [json.dumps(message) for message in messages]
+    print(f"\n{name} ({len(messages)} samples)")
+    print(f"  {'format':<22}{'raw B':>10}{'deflate B':>12}{'deflate+ctx B':>15}")
+    for label, frames in (
+        ("json (send_json)", legacy),
+        ("json compact", [Frame(message).encoded(Codec.JSON) for message in messages]),
+        ("msgpack", [Frame(message).encoded(Codec.MSGPACK) for message in messages]),
+    ):
+        raw = sum(len(data.encode() if isinstance(data, str) else data) for data in frames) / len(frames)
+        fresh, taken_over = deflate_sizes(frames)
+        print(f"  {label:<22}{raw:>10.1f}{fresh:>12.1f}{taken_over:>15.1f}")
+
+
+def bench_fanout(name: str, message: dict, connections: int, msgpack_share: float):
+    """CPU to produce the payloads for one event sent to every connection"""
+    codecs = [Codec.MSGPACK if i < connections * msgpack_share else Codec.JSON for i in range(connections)]
+
+    started = time.perf_counter()
+    for _ in codecs:
+        json.dumps(message)
+    per_connection = time.perf_counter() - started
+
+    started = time.perf_counter()
+    frame = Frame(message)
+    for codec in codecs:
+        frame.encoded(codec)
+    encode_once = time.perf_counter() - started
+
+    payload = frame.encoded(Codec.JSON).encode()
+    compressor = zlib.compressobj(wbits=-15)
+    samples = min(connections, 1000)
+    started = time.perf_counter()
+    for _ in range(samples):
+        compressor.compress(payload)
+        compressor.flush(zlib.Z_SYNC_FLUSH)
+    deflate = (time.perf_counter() - started) / samples * connections
+
+    print(
+        f"  {name:<14} per-connection encode {per_connection * 1000:8.2f}ms  "
+        f"encode once {encode_once * 1000:7.2f}ms  ({per_connection / encode_once:5.1f}x)  "
+        f"deflate {deflate * 1000:8.2f}ms  "
+        f"({(encode_once + deflate) / connections * 1e6:.2f}us/connection)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--samples", type=int, default=1_000)
+    parser.add_argument("--sync-size", type=int, default=50, help="Messages per sync frame")
+    parser.add_argument("--msgpack-share", type=float, default=0.5, help="Fraction of connections using MessagePack")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime(2026, 1, 1, 9, 0)
+    pong = {"type": "pong"}
+    chats = [chat_event(rng, now + timedelta(seconds=i)) for i in range(args.samples)]
+    syncs = [sync_frame(rng, args.sync_size) for _ in range(max(1, args.samples // args.sync_size))]
+
+    print("Bytes per frame")
+    bench_sizes("pong", [pong])
+    bench_sizes("chat message", chats)
+    bench_sizes(f"sync of {args.sync_size}", syncs)
+
+    print(f"\nFan-out of one event to {args.connections:,} connections ({args.msgpack_share:.0%} msgpack)")
+    bench_fanout("pong", pong, args.connections, args.msgpack_share)
+    bench_fanout("chat message", chats[0], args.connections, args.msgpack_share)
+    bench_fanout(f"sync of {args.sync_size}", syncs[0], args.connections, args.msgpack_share)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Load test the chat WebSocket
+
+Seeds throwaway users, opens many authenticated connections to
+/chat/ws/{user_id} (several devices per user), and drives pings and chat
+messages at the given per-connection rates. Reports server memory per
+connection, ping and acknowledgement latency, fan-out latency to the
+user's other devices, and throughput, plus the server's /chat/stats when
+METRICS_TOKEN is set.
+
+By default it starts its own single-worker uvicorn against DATABASE_URL so
+the server's memory can be read; pass --url (and --server-pid) to load an
+already running server instead. Run from the backend directory, with the
+open file limit raised for large connection counts.
+
+Usage:
+    python benchmarks/load_chat_ws.py --connections 5000 --users 1000 --duration 60
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from _common import percentile
+
+import httpx
+import msgpack
+import websockets
+from sqlalchemy import delete, insert
+
+from app.auth import create_access_token, hash_password
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ChatMessage, User
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMAIL_DOMAIN = "ws-load.pawmetric.dev"
+
+
+class Results:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.closed = 0
+        self.sent = 0
+        self.received = 0
+        self.pings: List[float] = []
+        self.acks: List[float] = []
+        self.fanout: List[float] = []
+        self.errors = 0
+        # client_id -> send time, server message id -> send time
+        self.pending: Dict[str, float] = {}
+        self.sent_at: Dict[str, float] = {}
+        # server message ids delivered to other devices before their ack arrived
+        self.early: Dict[str, List[float]] = {}
+
+
+def seed_users(count: int) -> List[tuple]:
+    """Insert users in bulk with one shared password hash; returns (id, token)"""
+    password = hash_password("load-test-password")
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "email": f"{uuid.uuid4().hex[:16]}@{EMAIL_DOMAIN}",
+            "password": password,
+            "name": "WebSocket Load",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for _ in range(count)
+    ]
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), rows)
+        db.commit()
+    finally:
+        db.close()
+    return [
+        (str(row["id"]), create_access_token(data={"sub": str(row["id"]), "email": row["email"]}))
+        for row in rows
+    ]
+
+
+def remove_users(user_ids: List[str]):
+    ids = [uuid.UUID(user_id) for user_id in user_ids]
+    db = SessionLocal()
+    try:
+        db.execute(delete(ChatMessage).where(ChatMessage.user_id.in_(ids)))
+        db.execute(delete(User).where(User.id.in_(ids)))
+        db.commit()
+    finally:
+        db.close()
+
+
+def rss_kb(pid: Optional[int]) -> Optional[int]:
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def start_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DEBUG": "False", "RELOAD": "False"},
+    )
+    for _ in range(300):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    server.terminate()
+    raise SystemExit("Server did not become healthy")
+
+
+def raise_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def on_frame(results: Results, frame: dict, received_at: float):
+    results.received += 1
+    kind = frame.get("type")
+    data = frame.get("data") or {}
+
+    if kind == "message_sent":
+        sent = results.pending.pop(data.get("client_id"), None)
+        if sent is not None:
+            results.acks.append(received_at - sent)
+            results.sent_at[data["id"]] = sent
+            for delivered in results.early.pop(data["id"], ()):
+                results.fanout.append(delivered - sent)
+    elif kind == "new_message":
+        sent = results.sent_at.get(data.get("id"))
+        if sent is None:
+            results.early.setdefault(data.get("id"), []).append(received_at)
+        else:
+            results.fanout.append(received_at - sent)
+    elif kind == "error":
+        results.errors += 1
+
+
+async def run_connection(
+    url: str,
+    user_id: str,
+    token: str,
+    args,
+    results: Results,
+    stop: asyncio.Event,
+):
+    subprotocols = ["pawmetric.msgpack"] if args.msgpack else ["pawmetric.json"]
+    try:
+        socket = await websockets.connect(
+            f"{url}/api/v1/chat/ws/{user_id}?token={token}",
+            subprotocols=subprotocols,
+            open_timeout=30,
+            ping_interval=None,
+            max_queue=None,
+        )
+    except Exception:
+        results.failed += 1
+        return
+
+    results.connected += 1
+    pings: List[float] = []
+
+    def encode(message: dict):
+        return msgpack.packb(message) if args.msgpack else json.dumps(message)
+
+    async def reader():
+        async for raw in socket:
+            received_at = time.perf_counter()
+            frame = msgpack.unpackb(raw) if isinstance(raw, bytes) else json.loads(raw)
+            if frame.get("type") == "pong" and pings:
+                results.pings.append(received_at - pings.pop(0))
+                results.received += 1
+            else:
+                on_frame(results, frame, received_at)
+
+    async def writer():
+        # Poisson arrivals for pings and messages
+        rate = args.message_rate + args.ping_rate
+        while not stop.is_set():
+            await asyncio.sleep(random.expovariate(rate))
+            if stop.is_set():
+                break
+            if random.random() < args.ping_rate / rate:
+                pings.append(time.perf_counter())
+                await socket.send(encode({"type": "ping"}))
+            else:
+                client_id = uuid.uuid4().hex
+                results.pending[client_id] = time.perf_counter()
+                await socket.send(encode({
+                    "type": "message",
+                    "client_id": client_id,
+                    "message": "load test " + "x" * random.randint(10, args.message_size),
+                }))
+            results.sent += 1
+
+    read_task = asyncio.create_task(reader())
+    try:
+        if args.message_rate + args.ping_rate > 0:
+            await writer()
+        else:
+            await stop.wait()
+        # Let replies to the last frames arrive
+        await asyncio.sleep(args.drain)
+    except websockets.ConnectionClosed:
+        results.closed += 1
+    finally:
+        read_task.cancel()
+        await socket.close()
+
+
+def report(name: str, samples: List[float]):
+    samples_ms = [sample * 1000 for sample in samples]
+    print(
+        f"  {name:<24} n={len(samples_ms):<8} "
+        f"p50={percentile(samples_ms, 50):8.2f}ms  p95={percentile(samples_ms, 95):8.2f}ms  "
+        f"p99={percentile(samples_ms, 99):8.2f}ms  max={max(samples_ms, default=0):8.2f}ms"
+    )
+
+
+async def run(args, users: List[tuple], server_pid: Optional[int]):
+    results = Results()
+    stop = asyncio.Event()
+    url = args.url.rstrip("/")
+
+    baseline = rss_kb(server_pid)
+    ramp_started = time.perf_counter()
+    tasks = []
+    devices = itertools.cycle(users)
+    for index in range(args.connections):
+        user_id, token = next(devices)
+        tasks.append(asyncio.create_task(run_connection(url, user_id, token, args, results, stop)))
+        if args.ramp and index % args.ramp == args.ramp - 1:
+            await asyncio.sleep(1)
+
+    while results.connected + results.failed < args.connections:
+        await asyncio.sleep(0.1)
+    ramp_seconds = time.perf_counter() - ramp_started
+    connected_rss = rss_kb(server_pid)
+
+    sent_before, received_before = results.sent, results.received
+    started = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    stop.set()
+    elapsed = time.perf_counter() - started
+    sent, received = results.sent - sent_before, results.received - received_before
+    peak_rss = rss_kb(server_pid)
+    await asyncio.gather(*tasks)
+
+    print(f"\nConnections: {results.connected:,} open, {results.failed:,} failed, "
+          f"{results.closed:,} closed by the server ({ramp_seconds:.1f}s to connect)")
+    if baseline is not None and connected_rss is not None:
+        per_connection = (connected_rss - baseline) / max(results.connected, 1)
+        print(f"Server RSS: {baseline / 1024:.1f}MB idle, {connected_rss / 1024:.1f}MB connected, "
+              f"{peak_rss / 1024:.1f}MB under load ({per_connection:.1f}KB per connection)")
+    print(f"Throughput over {elapsed:.1f}s: {sent / elapsed:,.0f} frames/s sent, "
+          f"{received / elapsed:,.0f} frames/s received, {len(results.acks) / elapsed:,.0f} messages/s saved")
+    print(f"Unacknowledged messages: {len(results.pending):,}, errors: {results.errors:,}")
+    print("Latency")
+    report("ping -> pong", results.pings)
+    report("message -> ack", results.acks)
+    report("message -> other device", results.fanout)
+
+    # Worker stats are only served to operators holding METRICS_TOKEN
+    if settings.METRICS_TOKEN:
+        try:
+            stats = httpx.get(
+                f"{url.replace('ws', 'http', 1)}/api/v1/chat/stats",
+                headers={"X-Metrics-Token": settings.METRICS_TOKEN},
+                timeout=10,
+            ).json()["data"]
+            print("Server stats (one worker)")
+            print(f"  {json.dumps(stats, indent=2)}")
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            print(f"  Could not read server stats: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Running server, e.g. ws://127.0.0.1:8000 (default: start one)")
+    parser.add_argument("--server-pid", type=int, help="PID of the --url server, to report its memory")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the server this script starts")
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=500, help="Connections are spread over this many users")
+    parser.add_argument("--ramp", type=int, default=500, help="New connections per second (0: all at once)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load after connecting")
+    parser.add_argument("--message-rate", type=float, default=0.1, help="Chat messages per second per connection")
+    parser.add_argument("--ping-rate", type=float, default=0.2, help="Pings per second per connection")
+    parser.add_argument("--message-size", type=int, default=200, help="Maximum message length")
+    parser.add_argument("--drain", type=float, default=2.0, help="Seconds to wait for replies after stopping")
+    parser.add_argument("--msgpack", action="store_true", help="Use the MessagePack subprotocol")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded users and their messages")
+    args = parser.parse_args()
+
+    limit = raise_file_limit()
+    if args.connections + 100 > limit:
+        print(f"⚠️  Open file limit is {limit}; raise it (ulimit -n) for {args.connections:,} connections")
+
+    print(f"Seeding {args.users:,} users...")
+    users = seed_users(args.users)
+
+    server = None
+    server_pid = args.server_pid
+    if args.url is None:
+        server = start_server(args.port)
+        server_pid = server.pid
+        args.url = f"ws://127.0.0.1:{args.port}"
+
+    try:
+        asyncio.run(run(args, users, server_pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if not args.keep:
+            remove_users([user_id for user_id, _ in users])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Bulk import a veterinarian directory from CSV or JSON Lines
+
+Clinics are matched on clinic name and address (case-insensitive); existing
+ones are updated and new ones inserted. Running API workers are told to
+reload their in-memory directory afterwards.
+
+Usage:
+    python import_veterinarians.py clinics.csv
+    python import_veterinarians.py clinics.jsonl --dry-run
+    cat clinics.csv | python import_veterinarians.py - --format csv
+"""
+import argparse
+import sys
+
+from app.database import SessionLocal, init_db
+from app.vet_directory import publish_vet_reload
+from app.vet_import import ImportFormat, detect_format, import_veterinarians
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV or JSON file, or - for stdin")
+    parser.add_argument("--format", type=ImportFormat, choices=list(ImportFormat), help="Defaults to the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and report without saving")
+    args = parser.parse_args()
+
+    import_format = args.format or detect_format(args.path)
+    init_db()
+    db = SessionLocal()
+
+    try:
+        if args.path == "-":
+            sys.stdin.reconfigure(encoding="utf-8-sig", newline="")
+            report = import_veterinarians(db, sys.stdin, import_format, args.dry_run)
+        else:
+            with open(args.path, encoding="utf-8-sig", newline="") as stream:
+                report = import_veterinarians(db, stream, import_format, args.dry_run)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Import failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"{'🔍 Dry run' if args.dry_run else '✅ Imported'}: {report.received} rows in {report.seconds:.2f}s "
+          f"({report.rows_per_second} rows/s)")
+    print(f"   inserted={report.inserted} updated={report.updated} "
+          f"duplicates={report.duplicates} invalid={report.invalid}")
+    for error in report.errors:
+        print(f"⚠️  row {error['row']}: {error['error']}")
+
+    if not args.dry_run and (report.inserted or report.updated):
+        publish_vet_reload()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,21 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import os
 
 from app.config import settings
-from app.database import init_db
+from app.database import engine, init_db
+from app.schemas import HealthCheckResponse, ServiceInfoResponse
 from app.supabase_client import init_supabase_storage
+from app.pubsub import notifier
+from app.cohorts import run_cohort_refresher
+from app.partitions import run_partition_maintainer
+from app.vet_directory import vet_directory, load_vet_directory, run_vet_directory_check
+from app.chat_writer import chat_writer
+from app.chat_presence import presence, run_presence_heartbeat
 
 # Import routers
 from app.routers import auth, pets, health_scans, activities, veterinarians, chat, analytics
@@ -33,12 +41,44 @@ async def lifespan(app: FastAPI):
     else:
         print("⚠️  Supabase not configured - file uploads will not work")
 
+    # Start cross-worker notification listener; it reloads the veterinarian
+    # directory once connected, covering changes made while this one loads
+    if settings.PUBSUB_ENABLED:
+        notifier.start()
+        print("✅ Notification listener started")
+
+    # Load the in-memory veterinarian directory
+    print("🏥 Loading veterinarian directory...")
+    try:
+        load_vet_directory()
+        veterinarians.warm_veterinarian_cache()
+        print(f"✅ Loaded {len(vet_directory)} veterinarians")
+    except Exception as e:
+        print(f"⚠️  Veterinarian directory not loaded, searches will use the database: {e}")
+    vet_directory_check = asyncio.create_task(run_vet_directory_check())
+
+    # Batch writer for chat messages received over WebSockets
+    chat_writer.start()
+    presence_heartbeat = asyncio.create_task(run_presence_heartbeat(presence))
+
+    # Snapshot breed/age cohort statistics in the background
+    cohort_refresher = asyncio.create_task(run_cohort_refresher())
+
+    # Keep upcoming monthly partitions in place
+    partition_maintainer = asyncio.create_task(run_partition_maintainer(engine))
+
     print("✨ PawMetric API is ready!")
 
     yield
 
-    # Shutdown (if needed in the future)
+    # Shutdown
     print("👋 Shutting down PawMetric API...")
+    cohort_refresher.cancel()
+    vet_directory_check.cancel()
+    partition_maintainer.cancel()
+    presence_heartbeat.cancel()
+    await chat_writer.stop()
+    notifier.stop()
 
 
 # Create FastAPI app
@@ -48,6 +88,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    # Routes validate into their response models, then orjson writes the bytes
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -70,7 +112,7 @@ app.include_router(chat.router, prefix="/api/v1")
 app.include_router(analytics.router, prefix="/api/v1")
 
 
-@app.get("/")
+@app.get("/", response_model=ServiceInfoResponse)
 async def root():
     """Root endpoint"""
     return {
@@ -81,7 +123,7 @@ async def root():
     }
 
 
-@app.get("/health")
+@app.get("/health", response_model=HealthCheckResponse)
 async def health_check():
     """Health check endpoint"""
     return {
@@ -96,7 +138,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
     print(f"❌ Unhandled exception: {exc}")
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -114,5 +156,6 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.RELOAD,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
         log_level="info"
     )
@@ -0,0 +1,116 @@
+"""
+Manage monthly table partitions
+
+convert rebuilds an existing table as a partitioned one in a single
+transaction (writes to it block until it finishes), create adds upcoming
+partitions, list shows them, and archive detaches months older than the
+retention period, exports each to gzipped CSV and drops it.
+
+Usage:
+    python manage_partitions.py convert chat_messages
+    python manage_partitions.py convert activities --column timestamp
+    python manage_partitions.py create
+    python manage_partitions.py list chat_messages
+    python manage_partitions.py archive chat_messages --output archive/ --dry-run
+"""
+import argparse
+import sys
+
+from app.config import settings
+from app.database import engine
+from app.partitions import (
+    PARTITIONED_TABLES,
+    archive_partitions,
+    convert_to_partitioned,
+    is_partitioned,
+    maintain_partitions,
+    monthly_partitions,
+    partition_name,
+)
+
+
+def convert(args):
+    column = args.column or next(
+        (partitioned.column for partitioned in PARTITIONED_TABLES if partitioned.name == args.table), None
+    )
+    if column is None:
+        print(f"❌ {args.table} is not in PARTITIONED_TABLES; pass --column")
+        sys.exit(1)
+
+    with engine.begin() as connection:
+        copied = convert_to_partitioned(
+            connection, args.table, column, settings.PARTITION_MONTHS_AHEAD, keep_original=args.keep_original
+        )
+    print(f"✅ Partitioned {args.table} by {column}: {copied} rows copied")
+    if args.keep_original:
+        print(f"   The original rows are kept in {args.table}_unpartitioned")
+
+
+def create(args):
+    with engine.begin() as connection:
+        created, unconverted = maintain_partitions(connection)
+    print(f"✅ Created {created} partitions")
+    for table in unconverted:
+        print(f"⚠️  {table} is not partitioned yet; run python manage_partitions.py convert {table}")
+
+
+def list_partitions(args):
+    with engine.connect() as connection:
+        if not is_partitioned(connection, args.table):
+            print(f"{args.table} is not partitioned")
+            return
+        for month in monthly_partitions(connection, args.table):
+            print(partition_name(args.table, month))
+    print(f"{args.table}_default")
+
+
+def archive(args):
+    archived = archive_partitions(
+        engine,
+        args.table,
+        args.older_than_months,
+        args.output,
+        drop=not args.keep_detached,
+        dry_run=args.dry_run,
+    )
+    if not archived:
+        print(f"Nothing older than {args.older_than_months} months in {args.table}")
+    for name in archived:
+        print(f"{'🔍 Would archive' if args.dry_run else '✅ Archived'} {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="Rebuild a table as monthly partitions")
+    convert_parser.add_argument("table")
+    convert_parser.add_argument("--column", help="Timestamp to partition by (default: from PARTITIONED_TABLES)")
+    convert_parser.add_argument("--keep-original", action="store_true", help="Keep the old table as <table>_unpartitioned")
+    convert_parser.set_defaults(handler=convert)
+
+    create_parser = commands.add_parser("create", help="Create upcoming partitions for every partitioned table")
+    create_parser.set_defaults(handler=create)
+
+    list_parser = commands.add_parser("list", help="List a table's partitions")
+    list_parser.add_argument("table")
+    list_parser.set_defaults(handler=list_partitions)
+
+    archive_parser = commands.add_parser("archive", help="Export and drop old partitions")
+    archive_parser.add_argument("table")
+    archive_parser.add_argument("--older-than-months", type=int, default=settings.CHAT_RETENTION_MONTHS)
+    archive_parser.add_argument("--output", required=True, help="Directory for the <partition>.csv.gz files")
+    archive_parser.add_argument("--keep-detached", action="store_true", help="Detach and export but do not drop")
+    archive_parser.add_argument("--dry-run", action="store_true", help="Only list the partitions that would be archived")
+    archive_parser.set_defaults(handler=archive)
+
+    args = parser.parse_args()
+    try:
+        args.handler(args)
+    except Exception as e:
+        print(f"❌ {args.command} failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
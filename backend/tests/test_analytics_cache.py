@@ -0,0 +1,70 @@
+"""
+Analytics cache bookkeeping: invalidations only refuse payloads for the pet
+that was written, and the memory they use is bounded
+"""
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.cache import AnalyticsCache
+from app.config import settings
+from main import app
+
+OWNER = uuid.uuid4()
+
+
+def test_other_pets_writes_do_not_stop_a_result_being_cached():
+    cache = AnalyticsCache(max_entries=10, ttl_seconds=60)
+    pet_id = uuid.uuid4()
+
+    key = cache.key(pet_id, "dashboard")
+    for _ in range(5):
+        cache.bump(uuid.uuid4())
+    cache.store(key, OWNER, {"pet": str(pet_id)})
+
+    assert cache.get(cache.key(pet_id, "dashboard")) is not None
+
+
+def test_a_payload_computed_before_a_write_is_not_stored():
+    cache = AnalyticsCache(max_entries=10, ttl_seconds=60)
+    pet_id = uuid.uuid4()
+
+    # Cached, then invalidated while a request is computing
+    cache.store(cache.key(pet_id, "dashboard"), OWNER, {"version": 1})
+    stale_key = cache.key(pet_id, "dashboard")
+    cache.bump(pet_id)
+    cache.store(stale_key, OWNER, {"version": 1})
+    assert cache.get(cache.key(pet_id, "dashboard")) is None
+
+    # Even once the pet's tombstone has been pushed out by other writes
+    stale_key = cache.key(pet_id, "dashboard")
+    cache.bump(pet_id)
+    for _ in range(20):
+        cache.bump(uuid.uuid4())
+    cache.store(stale_key, OWNER, {"version": 2})
+    assert cache.get(cache.key(pet_id, "dashboard")) is None
+
+
+def test_bookkeeping_is_bounded_by_the_cache_size():
+    cache = AnalyticsCache(max_entries=2, ttl_seconds=60)
+    for _ in range(100):
+        pet_id = uuid.uuid4()
+        cache.bump(pet_id)
+        cache.store(cache.key(pet_id, "dashboard"), OWNER, {"pet": str(pet_id)})
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["cached_pets"] == 2
+    assert stats["tombstones"] == 2
+
+
+def test_stats_need_the_metrics_token(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/api/v1/analytics/cache/stats").status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "operator-secret")
+    assert client.get("/api/v1/analytics/cache/stats", headers={"X-Metrics-Token": "guess"}).status_code == 403
+    response = client.get("/api/v1/analytics/cache/stats", headers={"X-Metrics-Token": "operator-secret"})
+    assert response.status_code == 200
+    assert "hit_ratio" in response.json()["data"]
@@ -0,0 +1,110 @@
+"""
+Pet dashboard: a full response, then a 304 for the same ETag
+
+Runs against an in-memory SQLite database holding only the tables the
+dashboard reads.
+"""
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth import get_current_user
+from app.cache import AnalyticsCache, analytics_cache
+from app.database import Base, get_db
+from app.routers import analytics
+from app.models import Activity, ActivityType, HealthScan, HealthScore, Pet, ScanStatus, ScanType, User
+from main import app
+
+TABLES = [User.__table__, Pet.__table__, HealthScore.__table__, HealthScan.__table__, Activity.__table__]
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=TABLES)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def pet(session_factory):
+    db = session_factory()
+    user = User(email="owner@example.com", password="x", name="Owner")
+    db.add(user)
+    db.flush()
+    pet = Pet(user_id=user.id, name="Rex")
+    db.add(pet)
+    db.flush()
+    db.add_all([
+        HealthScore(pet_id=pet.id, overall_score=90),
+        HealthScan(pet_id=pet.id, scan_type=ScanType.EYE, image_url="/x.jpg", status=ScanStatus.COMPLETED, score=90),
+        Activity(pet_id=pet.id, type=ActivityType.WALK, title="Walk", timestamp=datetime.utcnow()),
+    ])
+    db.commit()
+    db.refresh(pet)
+    db.refresh(user)
+    db.expunge_all()
+    db.close()
+    return pet, user
+
+
+@pytest.fixture
+def client(session_factory, pet):
+    def override_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: pet[1]
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    analytics_cache.bump(pet[0].id)
+
+
+def test_dashboard_then_not_modified(client, pet):
+    url = f"/api/v1/analytics/pet/{pet[0].id}/dashboard"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    statistics = response.json()["data"]["statistics"]
+    assert statistics == {"total_scans": 1, "total_activities": 1}
+
+    etag = response.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_dashboard_etag_changes_when_an_activity_is_edited(client, session_factory, pet, monkeypatch):
+    url = f"/api/v1/analytics/pet/{pet[0].id}/dashboard"
+    # Recompute the ETag from the database on every request
+    monkeypatch.setattr(analytics_cache, "get", lambda key: None)
+    etag = client.get(url).headers["ETag"]
+
+    # Edit straight in the database, without invalidating the cache version
+    db = session_factory()
+    activity = db.query(Activity).filter(Activity.pet_id == pet[0].id).one()
+    activity.title = "Long walk"
+    db.commit()
+    db.close()
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_workers_agree_on_the_etag(client, pet, monkeypatch):
+    url = f"/api/v1/analytics/pet/{pet[0].id}/dashboard"
+    etags = []
+    # Two workers whose caches have seen different invalidations
+    for bumps in (0, 7):
+        cache = AnalyticsCache(max_entries=10, ttl_seconds=60)
+        for _ in range(bumps):
+            cache.bump(pet[0].id)
+        monkeypatch.setattr(analytics, "analytics_cache", cache)
+        etags.append(client.get(url).headers["ETag"])
+
+    assert etags[0] == etags[1]
@@ -0,0 +1,115 @@
+"""
+Activity baselines: the running EWMA, gap alerts and odd timestamps
+
+The locking upsert needs Postgres, so baselines are plain model instances.
+"""
+import math
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app import anomalies
+from app.anomalies import ALPHA, detect_anomalies, forget_activity, record_activity
+from app.models import ActivityBaseline, ActivityType
+
+NOW = datetime(2026, 5, 20, 15, 0)
+TODAY = NOW.date()
+
+
+def baseline(**fields) -> ActivityBaseline:
+    values = dict(
+        pet_id=uuid.uuid4(), type=ActivityType.WALK, current_day=TODAY, current_count=0,
+        mean=0.0, variance=0.0, days_observed=0, last_activity_at=None,
+    )
+    values.update(fields)
+    return ActivityBaseline(**values)
+
+
+class FakeSession:
+    def __init__(self, row: ActivityBaseline):
+        self.row = row
+
+    def query(self, *entities):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def with_for_update(self):
+        return self
+
+    def first(self):
+        return self.row
+
+
+@pytest.fixture
+def walks(monkeypatch):
+    row = baseline()
+    monkeypatch.setattr(anomalies, "_lock_baseline", lambda db, pet_id, activity_type, day: row)
+    return row
+
+
+def test_folded_days_match_the_exponentially_weighted_mean_and_variance():
+    counts = [3, 5, 2, 0, 4, 4, 7, 1, 3]
+    row = baseline()
+    for count in counts:
+        anomalies._fold_day(row, count)
+
+    # Weight of each day once all have been folded in; the first day seeds the mean
+    weights = np.array([(1 - ALPHA) ** (len(counts) - 1)] + [
+        ALPHA * (1 - ALPHA) ** (len(counts) - 1 - i) for i in range(1, len(counts))
+    ])
+    mean = np.dot(weights, counts)
+
+    assert row.days_observed == len(counts)
+    assert row.mean == pytest.approx(mean, abs=1e-12)
+    assert row.variance == pytest.approx(np.dot(weights, (np.array(counts) - mean) ** 2), abs=1e-12)
+
+
+def test_empty_days_are_folded_in_as_zero_counts(walks):
+    walks.current_count, walks.current_day = 4, TODAY - timedelta(days=3)
+    record_activity(None, walks.pet_id, walks.type, NOW, now=NOW)
+
+    assert walks.days_observed == 3
+    assert walks.current_day == TODAY
+    assert walks.current_count == 1
+    assert walks.mean == pytest.approx(4 * (1 - ALPHA) ** 2)
+
+
+def test_gap_z_score_grows_with_the_square_root_of_missed_days():
+    row = baseline(current_day=TODAY - timedelta(days=3), current_count=2, mean=4.0, variance=1.0, days_observed=30)
+    [alert] = detect_anomalies([row], NOW)
+
+    assert alert["kind"] == "missed"
+    assert alert["message"] == "No walk logged for 2 day(s)"
+    assert alert["z_score"] == round(-math.sqrt(2) * 4.0, 2)
+
+
+def test_future_activities_leave_today_in_progress(walks):
+    record_activity(None, walks.pet_id, walks.type, NOW + timedelta(days=2), now=NOW)
+    record_activity(None, walks.pet_id, walks.type, NOW, now=NOW)
+
+    assert walks.current_day == TODAY
+    assert walks.current_count == 1
+    assert walks.days_observed == 0
+    assert walks.last_activity_at == NOW
+
+
+def test_timestamps_are_bucketed_by_utc_day(walks):
+    # 01:00 on the 21st in UTC+3 is still the 20th in UTC
+    local = datetime(2026, 5, 21, 1, 0, tzinfo=timezone(timedelta(hours=3)))
+    record_activity(None, walks.pet_id, walks.type, local, now=NOW)
+
+    assert walks.current_day == TODAY
+    assert walks.current_count == 1
+    assert walks.last_activity_at == datetime(2026, 5, 20, 22, 0)
+
+    forget_activity(FakeSession(walks), walks.pet_id, walks.type, local)
+    assert walks.current_count == 0
+
+
+def test_baselines_ahead_of_today_do_not_fail():
+    row = baseline(current_day=TODAY + timedelta(days=1), current_count=0, mean=2.0, variance=1.0, days_observed=30)
+    assert detect_anomalies([row], NOW) == []
@@ -0,0 +1,58 @@
+"""
+Ephemeral chat events and presence bookkeeping, without a database
+
+Publishing is replaced with a recorder, so the tests see what one flush would
+send to the other workers.
+"""
+import asyncio
+import json
+import time
+
+from app import chat_hub
+from app.chat_hub import ConnectionManager, MAX_NOTIFY_PAYLOAD, ephemeral_payloads
+from app.chat_presence import PresenceStatus, PresenceTracker
+
+
+def test_one_flush_publishes_every_coalesced_event_once(monkeypatch):
+    published = []
+    monkeypatch.setattr(chat_hub.notifier, "publish_many", lambda channel, payloads: published.append(payloads))
+    monkeypatch.setattr(chat_hub.settings, "CHAT_EPHEMERAL_COALESCE_MS", 10)
+
+    async def scenario():
+        manager = ConnectionManager()
+        for user in ["a", "b", "c"]:
+            for typing in [True, False, True]:
+                event = {"type": "typing", "data": {"vet_id": None, "typing": typing}}
+                manager.send_ephemeral(user, "typing:None", event)
+        await asyncio.sleep(0.1)
+        return manager
+
+    manager = asyncio.run(scenario())
+
+    assert manager.ephemeral_received == 9
+    assert manager.ephemeral_sent == 3
+    assert len(published) == 1 and len(published[0]) == 1
+    batch = json.loads(published[0][0].split(":", 1)[1])
+    assert [event["user_id"] for event in batch["events"]] == ["a", "b", "c"]
+
+
+def test_payloads_stay_under_the_notify_limit():
+    events = [json.dumps({"user_id": str(i), "event": {"cursor": "x" * 500}}) for i in range(40)]
+    payloads = ephemeral_payloads(events, time.time())
+
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) <= MAX_NOTIFY_PAYLOAD for payload in payloads)
+    unpacked = [event for payload in payloads for event in json.loads(payload.split(":", 1)[1])["events"]]
+    assert [event["user_id"] for event in unpacked] == [str(i) for i in range(40)]
+
+
+def test_prune_forgets_expired_workers_and_old_last_seen():
+    tracker = PresenceTracker(heartbeat_seconds=1, last_seen_seconds=60)
+    long_ago = time.time() - 3600
+    announcement = json.dumps({"at": long_ago, "users": {"gone": "online", "recent": "online"}})
+    tracker.on_notification(f"another-worker:{announcement}")
+    tracker._last_seen["recent"] = time.time()
+
+    assert tracker.prune() == 1
+    assert tracker.stats() == {"local_users": 0, "remote_users": 0, "last_seen_users": 1}
+    assert tracker.lookup(["gone"])["gone"] == {"status": PresenceStatus.OFFLINE.value, "last_seen": None}
@@ -0,0 +1,61 @@
+"""
+Message lookups bound created_at when the caller has a cursor, so Postgres
+only reads the matching monthly partition
+
+The query is recorded instead of run, since chat_messages needs Postgres.
+"""
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.routers.chat import get_message
+
+
+class RecordingQuery:
+    def __init__(self):
+        self.criteria = []
+
+    def filter(self, *criteria):
+        self.criteria.extend(criteria)
+        return self
+
+    def first(self):
+        return None
+
+    def sql(self) -> str:
+        return " AND ".join(str(c.compile(dialect=postgresql.dialect())) for c in self.criteria)
+
+
+class RecordingSession:
+    def __init__(self):
+        self.recorded = RecordingQuery()
+
+    def query(self, *entities):
+        return self.recorded
+
+
+def lookup(message_id: uuid.UUID, cursor: str = None) -> RecordingSession:
+    db = RecordingSession()
+    with pytest.raises(HTTPException) as missing:
+        asyncio.run(get_message(message_id, cursor=cursor, current_user=None, db=db))
+    assert missing.value.status_code == 404
+    return db
+
+
+def test_cursor_bounds_the_lookup_to_its_partition():
+    message_id = uuid.uuid4()
+    cursor = f"{datetime(2026, 3, 14, 9, 30).isoformat()}_{message_id}"
+
+    assert "created_at" not in lookup(message_id).recorded.sql()
+    assert "chat_messages.created_at = " in lookup(message_id, cursor).recorded.sql()
+
+
+def test_cursor_must_belong_to_the_message():
+    cursor = f"{datetime(2026, 3, 14).isoformat()}_{uuid.uuid4()}"
+    with pytest.raises(HTTPException) as mismatched:
+        asyncio.run(get_message(uuid.uuid4(), cursor=cursor, current_user=None, db=RecordingSession()))
+    assert mismatched.value.status_code == 400
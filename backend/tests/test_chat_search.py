@@ -0,0 +1,21 @@
+"""
+Search snippets are highlighted over HTML-escaped message text
+
+The escaping expression is evaluated on SQLite, which has the same replace()
+as Postgres; ts_headline itself needs Postgres.
+"""
+import html
+
+from sqlalchemy import create_engine, literal, select
+
+from app.routers.chat import html_escaped
+
+
+def test_message_text_is_escaped_like_html_escape():
+    message = """<img src=x onerror="alert('hi')"> & <mark>fake</mark>"""
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        escaped = connection.execute(select(html_escaped(literal(message)))).scalar()
+
+    assert escaped == html.escape(message)
+    assert "<" not in escaped
@@ -0,0 +1,61 @@
+"""
+Chat WebSocket authentication: stored history and presence only follow a
+verified access token
+"""
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.auth import create_access_token
+from app.chat_presence import presence
+from app.config import settings
+from main import app
+
+SINCE = f"2026-01-01T00:00:00_{uuid.uuid4()}"
+
+
+def test_connections_without_a_token_are_rejected_by_default():
+    assert settings.CHAT_WS_REQUIRE_TOKEN
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with TestClient(app).websocket_connect(f"/api/v1/chat/ws/{uuid.uuid4()}?since={SINCE}") as websocket:
+            websocket.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_unauthenticated_connections_never_sync_history(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_WS_REQUIRE_TOKEN", False)
+    with TestClient(app).websocket_connect(f"/api/v1/chat/ws/{uuid.uuid4()}?since={SINCE}") as websocket:
+        assert websocket.receive_json() == {"type": "error", "data": {"detail": "since requires an access token"}}
+
+
+def test_presence_is_only_set_by_token_subjects(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_WS_REQUIRE_TOKEN", False)
+    monkeypatch.setattr(settings, "PUBSUB_ENABLED", False)
+    anonymous, verified = str(uuid.uuid4()), str(uuid.uuid4())
+    token = create_access_token(data={"sub": verified})
+
+    client = TestClient(app)
+    with client.websocket_connect(f"/api/v1/chat/ws/{anonymous}") as websocket:
+        websocket.send_json({"type": "presence", "status": "away"})
+        websocket.send_json({"type": "ping"})
+        websocket.receive_json()
+        assert presence.lookup([anonymous])[anonymous]["status"] == "offline"
+
+    with client.websocket_connect(f"/api/v1/chat/ws/{verified}?token={token}") as websocket:
+        websocket.send_json({"type": "ping"})
+        websocket.receive_json()
+        assert presence.lookup([verified])[verified]["status"] == "online"
+
+
+def test_worker_stats_need_the_metrics_token(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/api/v1/chat/stats").status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "operator-secret")
+    assert client.get("/api/v1/chat/stats", headers={"X-Metrics-Token": "guess"}).status_code == 403
+    response = client.get("/api/v1/chat/stats", headers={"X-Metrics-Token": "operator-secret"})
+    assert response.status_code == 200
+    assert "connections" in response.json()["data"]
@@ -0,0 +1,42 @@
+"""
+Chat write-behind: a failed batch is retried row by row
+
+The database insert is replaced with one that rejects any batch holding a
+message from an unknown user, as a foreign key violation would.
+"""
+import asyncio
+import uuid
+
+from app import chat_writer as chat_writer_module
+from app.chat_writer import ChatMessageWriter
+from app.models import ChatMessage
+
+KNOWN_USER = uuid.uuid4()
+
+
+def fake_insert(rows):
+    if any(row["user_id"] != KNOWN_USER for row in rows):
+        raise ValueError("violates foreign key constraint chat_messages_user_id_fkey")
+    return [ChatMessage(**row) for row in rows]
+
+
+def test_one_bad_row_does_not_fail_its_batch(monkeypatch):
+    monkeypatch.setattr(chat_writer_module, "_insert_messages", fake_insert)
+
+    async def scenario():
+        writer = ChatMessageWriter(batch_size=10, max_delay_ms=50)
+        users = [KNOWN_USER, uuid.uuid4(), KNOWN_USER]
+        results = await asyncio.gather(
+            *(writer.save(user_id, None, f"message {i}", True) for i, user_id in enumerate(users)),
+            return_exceptions=True
+        )
+        await writer.stop()
+        return results, writer.stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert [result.message for result in (results[0], results[2])] == ["message 0", "message 2"]
+    assert isinstance(results[1], ValueError)
+    assert stats["rows"] == 2
+    assert stats["retried"] == 2
+    assert stats["failed"] == 1
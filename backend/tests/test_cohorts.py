@@ -0,0 +1,81 @@
+"""
+Cohort snapshots agree with NumPy's own quantile and mean per cohort
+"""
+import numpy as np
+import pytest
+
+from app.cohorts import ALL_AGES, ALL_BREEDS, QUANTILES, age_band, build_snapshot, cohort_engine, normalize_breed
+
+PETS = [
+    ("Labrador", 2, 81.0),
+    ("labrador ", 2, 64.5),
+    ("Labrador", 5, 90.0),
+    ("Labrador", None, 72.0),
+    ("Labrador", 2, 55.0),
+    ("Beagle", 8, 47.0),
+    ("Beagle", 12, 99.0),
+    (None, 0, 30.0),
+]
+
+
+def members(breed: str, band: int) -> np.ndarray:
+    return np.array([
+        score for pet_breed, age, score in PETS
+        if breed in (ALL_BREEDS, normalize_breed(pet_breed)) and band in (ALL_AGES, age_band(age))
+    ], dtype=np.float32)
+
+
+@pytest.fixture
+def snapshot():
+    return build_snapshot(*zip(*PETS))
+
+
+@pytest.mark.parametrize("breed", ["labrador", "beagle", "unknown", ALL_BREEDS])
+@pytest.mark.parametrize("band", range(ALL_AGES + 1))
+def test_cohorts_match_numpy(snapshot, breed, band):
+    cohort = snapshot.cohort_id(breed, band)
+    expected = members(breed, band)
+    start, end = snapshot.offsets[cohort], snapshot.offsets[cohort + 1]
+
+    assert snapshot.size(cohort) == expected.size
+    np.testing.assert_array_equal(snapshot.scores[start:end], np.sort(expected))
+    if expected.size:
+        np.testing.assert_allclose(snapshot.quantiles[cohort], np.quantile(expected, QUANTILES), rtol=1e-6)
+        assert snapshot.means[cohort] == pytest.approx(expected.mean())
+        assert snapshot.histograms[cohort].sum() == expected.size
+    else:
+        assert np.isnan(snapshot.quantiles[cohort]).all()
+        assert np.isnan(snapshot.means[cohort])
+        assert snapshot.histograms[cohort].sum() == 0
+
+
+def test_single_member_cohort(snapshot):
+    # The only beagle over ten years old
+    cohort = snapshot.cohort_id("beagle", age_band(12))
+
+    assert snapshot.size(cohort) == 1
+    np.testing.assert_array_equal(snapshot.quantiles[cohort], np.full(len(QUANTILES), 99.0))
+    assert snapshot.means[cohort] == 99.0
+
+
+def test_empty_snapshot(monkeypatch):
+    snapshot = build_snapshot([], [], [])
+    everyone = snapshot.cohort_id(ALL_BREEDS, ALL_AGES)
+
+    assert snapshot.pet_count == 0
+    assert snapshot.size(everyone) == 0
+    assert np.isnan(snapshot.means[everyone])
+    assert snapshot.cohort_id("labrador", ALL_AGES) is None
+
+    monkeypatch.setattr(cohort_engine, "snapshot", snapshot)
+    assert cohort_engine.compare("Labrador", 2, 70.0) is None
+
+
+def test_compare_falls_back_to_a_cohort_with_enough_pets(snapshot, monkeypatch):
+    monkeypatch.setattr(cohort_engine, "snapshot", snapshot)
+    result = cohort_engine.compare("Labrador", 2, 64.5)
+
+    # Three labradors aged 1-3 are too few, all five labradors are enough
+    assert result["cohort"] == {"breed": "labrador", "age_band": None, "size": 5}
+    assert result["percentile"] == 30.0
+    assert result["mean"] == round(float(members("labrador", ALL_AGES).mean()), 1)
@@ -0,0 +1,18 @@
+"""
+Settings with a fixed set of values reject anything else at startup
+"""
+import pytest
+from pydantic import ValidationError
+
+from app.config import OverflowPolicy, Settings
+
+
+def test_chat_send_overflow_rejects_unknown_policies(monkeypatch):
+    monkeypatch.setenv("CHAT_SEND_OVERFLOW", "disconect")
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+def test_chat_send_overflow_reads_a_policy(monkeypatch):
+    monkeypatch.setenv("CHAT_SEND_OVERFLOW", "disconnect")
+    assert Settings().CHAT_SEND_OVERFLOW is OverflowPolicy.DISCONNECT
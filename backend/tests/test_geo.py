@@ -0,0 +1,56 @@
+"""
+The vectorized haversine agrees with the scalar one
+"""
+import numpy as np
+import pytest
+
+from app.geo import EARTH_RADIUS_KM, haversine, haversine_many, path_length_km
+
+ORIGINS = [
+    (0.0, 0.0),
+    (-89.6, 39.8),
+    (139.69, 35.69),
+    (0.0, 90.0),
+    (45.0, -90.0),
+    (179.9, -17.7),
+]
+
+
+def targets(lon: float, lat: float):
+    rng = np.random.default_rng(11)
+    lons = list(rng.uniform(-180, 180, 200))
+    lats = list(rng.uniform(-90, 90, 200))
+    special = [
+        (lon, lat),  # the origin itself
+        ((lon + 360) % 360 - 180, -lat),  # antipode
+        (lon, 90.0),  # north pole
+        (lon + 123.0, 90.0),  # north pole, another longitude
+        (lon, -90.0),  # south pole
+        (-lon, lat),  # mirrored across the prime meridian
+        (lon + 180.0, lat),  # half a turn of longitude
+        (lon + 1e-9, lat + 1e-9),  # nearly the same point
+    ]
+    lons += [point[0] for point in special]
+    lats += [point[1] for point in special]
+    return np.array(lons), np.array(lats)
+
+
+@pytest.mark.parametrize("lon, lat", ORIGINS)
+def test_vectorized_matches_scalar(lon, lat):
+    lons, lats = targets(lon, lat)
+    expected = np.array([haversine(lon, lat, x, y) for x, y in zip(lons, lats)])
+    np.testing.assert_allclose(haversine_many(lon, lat, lons, lats), expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("lon, lat", ORIGINS)
+def test_antipodes_are_half_the_circumference(lon, lat):
+    antipode = ((lon + 360) % 360 - 180, -lat)
+    # asin is ill-conditioned next to 1, so antipodes are only good to within a meter
+    assert haversine(lon, lat, *antipode) == pytest.approx(np.pi * EARTH_RADIUS_KM, abs=1e-3)
+
+
+def test_path_length_sums_scalar_legs():
+    lons = np.array([0.0, 90.0, 180.0, -90.0, 0.0])
+    lats = np.array([0.0, 45.0, 90.0, -89.0, -90.0])
+    legs = sum(haversine(lons[i], lats[i], lons[i + 1], lats[i + 1]) for i in range(len(lons) - 1))
+    assert path_length_km(lons, lats) == pytest.approx(legs, abs=1e-9)
@@ -0,0 +1,99 @@
+"""
+Opening hours parsing and the open-now check
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from app.config import settings
+from app.hours import DAYS, MINUTES_PER_DAY, is_open, open_checker, parse_hours
+
+
+def minute(day: str, time: str) -> int:
+    hour, _, mins = time.partition(":")
+    return DAYS.index(day) * MINUTES_PER_DAY + int(hour) * 60 + int(mins)
+
+
+WEEK = {"mon-fri": "8:00-18:00", "sat": "9:00-14:00", "sun": "closed"}
+
+
+@pytest.mark.parametrize("hours, day, time, expected", [
+    # Day ranges; opening minutes are inclusive, closing ones exclusive
+    (WEEK, "mon", "08:00", True),
+    (WEEK, "mon", "07:59", False),
+    (WEEK, "wed", "12:00", True),
+    (WEEK, "fri", "18:00", False),
+    (WEEK, "sat", "13:59", True),
+    (WEEK, "sat", "14:30", False),
+    (WEEK, "sun", "10:00", False),
+    # Always open
+    ({"all": "24/7"}, "sun", "23:59", True),
+    ({"all": "24/7"}, "mon", "00:00", True),
+    ({"daily": "open 24 hours"}, "thu", "03:00", True),
+    # Intervals past midnight continue on the next day
+    ({"fri": "20:00-02:00"}, "fri", "19:59", False),
+    ({"fri": "20:00-02:00"}, "fri", "23:00", True),
+    ({"fri": "20:00-02:00"}, "sat", "01:30", True),
+    ({"fri": "20:00-02:00"}, "sat", "02:00", False),
+    # ...and Sunday's run into Monday
+    ({"sun": "22:00-03:00"}, "sun", "23:00", True),
+    ({"sun": "22:00-03:00"}, "mon", "02:00", True),
+    ({"sun": "22:00-03:00"}, "mon", "03:00", False),
+    # Day ranges wrapping the end of the week; "10-4" is 10am to 4pm
+    ({"fri-mon": "10-4"}, "fri", "12:00", True),
+    ({"fri-mon": "10-4"}, "sun", "12:00", True),
+    ({"fri-mon": "10-4"}, "mon", "15:59", True),
+    ({"fri-mon": "10-4"}, "tue", "12:00", False),
+    ({"fri-mon": "10-4"}, "thu", "12:00", False),
+    # Lists of intervals and of days
+    ({"mon": ["9:00-12:00", "14:00-17:00"]}, "mon", "10:00", True),
+    ({"mon": ["9:00-12:00", "14:00-17:00"]}, "mon", "13:00", False),
+    ({"mon": "9:00-12:00, 14:00-17:00"}, "mon", "16:00", True),
+    ({"sat,sun": "10am-2pm"}, "sun", "13:00", True),
+    ({"sat & sun": "10am-2pm"}, "fri", "13:00", False),
+    # Single days override broader keys whatever the order
+    ({"wed": "closed", "mon-fri": "9-17"}, "wed", "12:00", False),
+    ({"wed": "closed", "mon-fri": "9-17"}, "thu", "12:00", True),
+])
+def test_open_at(hours, day, time, expected):
+    assert is_open(parse_hours(hours), minute(day, time)) is expected
+
+
+@pytest.mark.parametrize("hours, boundaries", [
+    ({"mon": "9:00-17:00"}, [minute("mon", "09:00"), minute("mon", "17:00")]),
+    ({"mon": "9am-12pm", "tue": "closed"}, [minute("mon", "09:00"), minute("mon", "12:00")]),
+    ({"mon": "20:00-24:00", "tue": "0:00-02:00"}, [minute("mon", "20:00"), minute("tue", "02:00")]),
+    ({"sun": "23:00-01:00"}, [0, 60, minute("sun", "23:00"), 7 * MINUTES_PER_DAY]),
+    ({"all": "24/7"}, [0, 7 * MINUTES_PER_DAY]),
+    ({"all": "closed"}, []),
+])
+def test_boundaries(hours, boundaries):
+    assert parse_hours(hours) == boundaries
+
+
+@pytest.mark.parametrize("hours", [
+    None,
+    {},
+    ["mon", "9-5"],
+    {"funday": "9-5"},
+    {"mon-someday": "9-5"},
+    {"mon": "whenever"},
+    {"mon": "9:00-9:00"},
+    {"mon": "25:00-26:00"},
+    {"mon": "13pm-2pm"},
+    {"mon": ["9-12", 14]},
+])
+def test_unreadable_hours(hours):
+    assert parse_hours(hours) is None
+
+
+def test_open_checker_uses_each_clinics_timezone(monkeypatch):
+    monkeypatch.setattr(settings, "DEFAULT_VET_TIMEZONE", "UTC")
+    weekdays = parse_hours({"mon-fri": "9:00-17:00"})
+    # Monday 14:00 UTC
+    check = open_checker(datetime(2026, 10, 19, 14, 0, tzinfo=timezone.utc))
+
+    assert check(weekdays, "America/New_York")  # 10:00
+    assert not check(weekdays, "Asia/Tokyo")  # 23:00
+    assert check(weekdays, None)
+    assert not check(None, "UTC")
@@ -0,0 +1,86 @@
+"""
+Map clusters: each level aggregates the one below, viewports select the
+clusters inside them, and oversized viewports are refused
+"""
+import uuid
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.vet_clusters import MAX_CLUSTER_ZOOM, MAX_VIEWPORT_CELLS, VetClusterIndex, build_levels, viewport_size
+from main import app
+
+
+class FakeDirectory:
+    version = 1
+
+    def __init__(self, latitudes, longitudes):
+        self.ids = [uuid.uuid4() for _ in latitudes]
+        self.latitudes = np.array(latitudes, dtype=np.float64)
+        self.longitudes = np.array(longitudes, dtype=np.float64)
+
+    def coordinates(self):
+        return self.version, self.ids, self.latitudes, self.longitudes
+
+
+def scattered(count: int = 500):
+    rng = np.random.default_rng(7)
+    return rng.uniform(25, 49, count), rng.uniform(-124, -67, count)
+
+
+def test_each_level_merges_the_cells_of_the_level_below():
+    latitudes, longitudes = scattered()
+    levels = build_levels(latitudes, longitudes)
+
+    for zoom in range(MAX_CLUSTER_ZOOM):
+        finer, coarser = levels[zoom + 1], levels[zoom]
+        parents = {}
+        for x, y, count, min_lat, max_lat in zip(
+            finer.x >> 1, finer.y >> 1, finer.count, finer.min_lat, finer.max_lat
+        ):
+            total, low, high = parents.get((x, y), (0, 90.0, -90.0))
+            parents[(x, y)] = (total + count, min(low, min_lat), max(high, max_lat))
+
+        assert {
+            (x, y): (count, low, high) for x, y, count, low, high in zip(
+                coarser.x, coarser.y, coarser.count, coarser.min_lat, coarser.max_lat
+            )
+        } == parents
+        assert coarser.count.sum() == latitudes.size
+        assert np.isclose(coarser.sum_lat.sum(), latitudes.sum())
+
+
+def test_viewport_returns_the_vets_inside_it():
+    latitudes, longitudes = scattered()
+    directory = FakeDirectory(latitudes, longitudes)
+    index = VetClusterIndex(directory)
+
+    south, west, north, east = 38.0, -100.0, 40.0, -97.0
+    clusters = index.clusters(south, west, north, east, MAX_CLUSTER_ZOOM)
+    inside = (latitudes >= south) & (latitudes <= north) & (longitudes >= west) & (longitudes <= east)
+
+    assert all(cluster["count"] == 1 for cluster in clusters)
+    assert {cluster["vet_id"] for cluster in clusters} == {
+        str(vet_id) for vet_id, keep in zip(directory.ids, inside) if keep
+    }
+
+    # Coarser levels group the same vets
+    coarse = index.clusters(south, west, north, east, 6)
+    assert sum(cluster["count"] for cluster in coarse) >= inside.sum()
+
+
+def test_viewport_across_the_antimeridian():
+    directory = FakeDirectory([-17.7, -17.8, 21.3, -41.3], [178.4, -178.1, -157.8, 174.8])
+    clusters = VetClusterIndex(directory).clusters(-20.0, 170.0, -15.0, -170.0, MAX_CLUSTER_ZOOM)
+
+    assert {cluster["vet_id"] for cluster in clusters} == {str(directory.ids[0]), str(directory.ids[1])}
+
+
+def test_oversized_viewports_are_refused():
+    assert viewport_size(-85, -180, 85, 180, 0) <= MAX_VIEWPORT_CELLS
+    assert viewport_size(40.75, -73.99, 40.76, -73.98, MAX_CLUSTER_ZOOM) <= MAX_VIEWPORT_CELLS
+
+    response = TestClient(app).get(
+        "/api/v1/veterinarians/clusters", params={"south": 20, "west": -130, "north": 50, "east": -60, "zoom": 18}
+    )
+    assert response.status_code == 400
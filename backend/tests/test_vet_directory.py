@@ -0,0 +1,49 @@
+"""
+Directory encoding of veterinarians saved before every field was validated
+"""
+import json
+import uuid
+from datetime import datetime
+
+from app.models import Veterinarian
+from app.vet_directory import VetDirectory, encode_vet
+
+
+def legacy_vet(**overrides) -> Veterinarian:
+    values = dict(
+        id=uuid.uuid4(), name="Dr Ada", clinic_name="Ada's Clinic", address="1 Main St", city="Springfield",
+        state="IL", zip_code="62701", latitude=39.8, longitude=-89.6, review_count=0, accepts_emergencies=False,
+        created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 1, 1)
+    )
+    values.update(overrides)
+    return Veterinarian(**values)
+
+
+class FakeQuery:
+    def __init__(self, vets):
+        self.vets = vets
+
+    def all(self):
+        return self.vets
+
+
+class FakeSession:
+    def __init__(self, vets):
+        self.vets = vets
+
+    def query(self, model):
+        return FakeQuery(self.vets)
+
+
+def test_a_bad_stored_email_is_encoded_as_stored():
+    vet = legacy_vet(email="front desk at ada clinic")
+    assert json.loads(encode_vet(vet))["email"] == "front desk at ada clinic"
+
+
+def test_one_legacy_row_does_not_fail_the_load():
+    vets = [legacy_vet(), legacy_vet(email="not-an-email"), legacy_vet(email="vet@example.com")]
+    directory = VetDirectory()
+    directory.load(FakeSession(vets))
+
+    assert directory.loaded
+    assert len(directory) == 3
@@ -0,0 +1,79 @@
+"""
+Bulk veterinarian import writes as it reads
+
+The upsert is replaced with a recorder, so these check batching and
+deduplication without a database.
+"""
+import io
+import json
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from app import vet_import
+from app.routers.veterinarians import commit_unique_clinic
+from app.vet_import import ImportFormat, ImportUnavailable, import_veterinarians
+
+
+class FakeSession:
+    def __init__(self, commit_error: Exception = None):
+        self.commit_error = commit_error
+        self.rolled_back = False
+
+    def connection(self):
+        return None
+
+    def commit(self):
+        if self.commit_error:
+            raise self.commit_error
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def clinic(i: int, clinic_name: str = None) -> str:
+    return json.dumps({
+        "name": f"Dr {i}", "clinic_name": clinic_name or f"Clinic {i}", "address": f"{i} Main St",
+        "city": "Springfield", "state": "IL", "zip_code": "62701", "latitude": 39.8, "longitude": -89.6,
+    })
+
+
+def test_rows_are_written_in_batches_as_they_arrive(monkeypatch):
+    batches = []
+
+    def record_upsert(db, batch, report):
+        batches.append([values["name"] for values in batch.values()])
+        report.inserted += len(batch)
+        batch.clear()
+
+    monkeypatch.setattr(vet_import, "_upsert", record_upsert)
+    monkeypatch.setattr(vet_import, "vet_import_key_index_exists", lambda connection: True)
+    monkeypatch.setattr(vet_import, "IMPORT_BATCH_SIZE", 3)
+
+    lines = [clinic(1), clinic(2), clinic(1, "  CLINIC 1 "), clinic(3), clinic(4), clinic(5), clinic(6)]
+    report = import_veterinarians(FakeSession(), io.StringIO("\n".join(lines)), ImportFormat.JSON)
+
+    # The repeat of clinic 1 replaced the earlier row within its batch
+    assert batches == [["Dr 2", "Dr 1", "Dr 3"], ["Dr 4", "Dr 5", "Dr 6"]]
+    assert report.received == 7
+    assert report.duplicates == 1
+    assert report.inserted == 6
+
+
+def test_imports_stop_before_reading_without_the_unique_key(monkeypatch):
+    monkeypatch.setattr(vet_import, "vet_import_key_index_exists", lambda connection: False)
+    stream = io.StringIO(clinic(1))
+
+    with pytest.raises(ImportUnavailable):
+        import_veterinarians(FakeSession(), stream, ImportFormat.JSON)
+    assert stream.tell() == 0
+
+
+def test_a_second_vet_at_the_same_clinic_is_a_conflict():
+    db = FakeSession(commit_error=IntegrityError("INSERT", {}, Exception("ux_veterinarians_import_key")))
+
+    with pytest.raises(HTTPException) as conflict:
+        commit_unique_clinic(db)
+    assert conflict.value.status_code == 409
+    assert db.rolled_back